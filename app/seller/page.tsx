@@ -59,7 +59,7 @@ export default function SellerDashboard() {
         // Fetch recent orders
         const { data: ordersData } = await shopsApi.getOrders({ limit: 5 });
         if (ordersData) {
-          setRecentOrders(ordersData as Order[]);
+          setRecentOrders((ordersData as { results: Order[] }).results);
         }
       }
 
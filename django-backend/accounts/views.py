@@ -24,6 +24,7 @@ class RegisterView(generics.CreateAPIView):
     
     queryset = User.objects.all()
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'login'
     serializer_class = RegisterSerializer
 
     def create(self, request, *args, **kwargs):
@@ -46,6 +47,7 @@ class LoginView(APIView):
     """API endpoint for user login."""
     
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'login'
     serializer_class = LoginSerializer
 
     def post(self, request):
@@ -0,0 +1,32 @@
+from django.contrib import admin
+from .models import IdempotencyKey, Job, TransitionLog
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key_hash', 'scope', 'status', 'response_status', 'created_at', 'expires_at')
+    list_filter = ('scope', 'status')
+    search_fields = ('key_hash',)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'queue', 'status', 'attempts', 'run_at', 'created_at')
+    list_filter = ('queue', 'status', 'name')
+    search_fields = ('id', 'name')
+
+
+@admin.register(TransitionLog)
+class TransitionLogAdmin(admin.ModelAdmin):
+    list_display = ('model_label', 'object_id', 'from_status', 'to_status', 'actor', 'created_at')
+    list_filter = ('model_label', 'to_status')
+    search_fields = ('object_id',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        # Register job handlers defined in each app's tasks.py
+        autodiscover_modules('tasks')
+
+        from . import checks  # noqa: F401
+        from .instrumentation import instrument_serializers
+        instrument_serializers()
@@ -0,0 +1,243 @@
+"""
+Endpoint benchmarks driven through the real URL routes.
+
+Each scenario prepares a request (any untimed setup, such as filling a cart
+before checkout), then the harness times only the request itself through
+Django's test client, with real JWT authentication. Results are
+machine-readable so runs can be compared across commits.
+"""
+import json
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.db import close_old_connections
+from django.test import Client, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from deliveries.models import BodaProfile
+from orders.models import CartItem
+from products.models import Product
+
+from .synthetic import LOAD_EMAIL_DOMAIN
+
+SAMPLE_SIZE = 200
+PRODUCT_SORTS = ['newest', 'price_asc', 'popular', 'rating']
+SEARCH_TERMS = ['phone', 'rice', 'tea', 'bag', 'lamp']
+
+
+class Context:
+    """Users and products sampled from the load data, shared by scenarios."""
+
+    def __init__(self, seed=None):
+        from django.contrib.auth import get_user_model
+        User = get_user_model()
+
+        self.rng = np.random.default_rng(seed)
+        generated = User.objects.filter(email__endswith=f'@{LOAD_EMAIL_DOMAIN}')
+        self.customers = list(generated.filter(role='customer')[:SAMPLE_SIZE])
+        self.riders = list(
+            generated.filter(role='boda', id__in=BodaProfile.objects.values('user_id'))[:SAMPLE_SIZE]
+        )
+        self.products = list(
+            Product.objects.filter(is_active=True, stock_quantity__gte=100)
+            .order_by('-created_at').values_list('id', flat=True)[:SAMPLE_SIZE * 10]
+        )
+        if not (self.customers and self.riders and self.products):
+            raise ValueError('No load data found; run generate_load_data first')
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def pick(self, items):
+        with self._lock:
+            return items[self.rng.integers(0, len(items))]
+
+    def auth(self, user):
+        token = self._tokens.get(user.pk)
+        if token is None:
+            token = self._tokens[user.pk] = str(RefreshToken.for_user(user).access_token)
+        return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+
+def product_list(ctx, i):
+    return 'get', '/api/products/', {'sort': PRODUCT_SORTS[i % len(PRODUCT_SORTS)], 'limit': 20}, {}
+
+
+def product_search(ctx, i):
+    return 'get', '/api/products/', {'search': SEARCH_TERMS[i % len(SEARCH_TERMS)], 'facets': 1}, {}
+
+
+def product_detail(ctx, i):
+    return 'get', f'/api/products/{ctx.pick(ctx.products)}/', None, {}
+
+
+def cart_add(ctx, i):
+    customer = ctx.pick(ctx.customers)
+    return 'post', '/api/cart/add/', {'product_id': str(ctx.pick(ctx.products)), 'quantity': 1}, ctx.auth(customer)
+
+
+def order_create(ctx, i):
+    customer = ctx.pick(ctx.customers)
+    CartItem.objects.filter(user=customer).delete()
+    CartItem.objects.create(user=customer, product_id=ctx.pick(ctx.products), quantity=1)
+    data = {'delivery_address': 'Benchmark Rd, Nairobi', 'phone': '+254700000000', 'payment_method': 'mobile_money'}
+    return 'post', '/api/orders/create/', data, ctx.auth(customer)
+
+
+def deliveries_available(ctx, i):
+    return 'get', '/api/deliveries/available/', None, ctx.auth(ctx.pick(ctx.riders))
+
+
+def lunch_rush(ctx, i):
+    # One checkout and one cart write for every three catalogue reads
+    mix = (order_create, cart_add, product_list, product_detail, product_search)
+    return mix[i % len(mix)](ctx, i)
+
+
+SCENARIOS = {
+    'products_list': product_list,
+    'products_search': product_search,
+    'product_detail': product_detail,
+    'cart_add': cart_add,
+    'order_create': order_create,
+    'deliveries_available': deliveries_available,
+    'lunch_rush': lunch_rush,
+}
+WRITE_SCENARIOS = {'cart_add', 'order_create', 'lunch_rush'}
+
+
+def _run_worker(ctx, prepare, indexes):
+    # Count server errors such as "database is locked" instead of stopping
+    client = Client(SERVER_NAME='localhost', raise_request_exception=False)
+    latencies, errors = [], 0
+    try:
+        for i in indexes:
+            method, path, data, headers = prepare(ctx, i)
+            kwargs = {'content_type': 'application/json'} if method == 'post' else {}
+            payload = json.dumps(data) if method == 'post' else data
+            start = time.perf_counter()
+            # The test client skips the per-request connection handling a
+            # server does, so apply CONN_MAX_AGE here to include its cost.
+            close_old_connections()
+            response = getattr(client, method)(path, payload, **kwargs, **headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+    finally:
+        close_old_connections()
+    return latencies, errors
+
+
+def run_scenario(ctx, name, requests, concurrency=1, warmup=10):
+    """Run one scenario and return its throughput and latency percentiles."""
+    prepare = SCENARIOS[name]
+    _run_worker(ctx, prepare, range(warmup))
+
+    chunks = [range(worker, requests, concurrency) for worker in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(lambda chunk: _run_worker(ctx, prepare, chunk), chunks))
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([latency for result, _ in outcomes for latency in result]) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors for _, errors in outcomes),
+        'concurrency': concurrency,
+        'throughput_rps': round(len(latencies) / elapsed, 2),
+        'mean_ms': round(float(latencies.mean()), 3),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'max_ms': round(float(latencies.max()), 3),
+    }
+
+
+def _percentiles(seconds):
+    latencies = np.array(seconds) * 1000
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return {'p50_ms': round(float(p50), 3), 'p95_ms': round(float(p95), 3)}
+
+
+def connection_overhead(samples=200):
+    """
+    Time ``SELECT 1`` on a freshly acquired connection and on a reused one.
+
+    A fresh connection is a new server connection, or a checkout from the
+    pool when ``DB_POOL`` is enabled; the difference between the two is the
+    setup cost every request pays without persistent or pooled connections.
+    """
+    from django.db import connection
+
+    def select_one(reconnect):
+        if reconnect:
+            connection.close()
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return time.perf_counter() - start
+
+    select_one(True)
+    fresh = _percentiles([select_one(True) for _ in range(samples)])
+    reused = _percentiles([select_one(False) for _ in range(samples)])
+    return {
+        'samples': samples,
+        'pooled': 'pool' in connection.settings_dict['OPTIONS'],
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'fresh': fresh,
+        'reused': reused,
+        'setup_p50_ms': round(fresh['p50_ms'] - reused['p50_ms'], 3),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names, requests, concurrency=1, warmup=10, seed=None, connection_samples=0):
+    """Run the named scenarios; returns a JSON-serializable report."""
+    from django.db import connection
+
+    ctx = Context(seed)
+    results = {}
+    # Every client comes from one address; measure the endpoints, not the rate limits
+    with override_settings(THROTTLE_ENABLED=False):
+        for name in names:
+            results[name] = run_scenario(ctx, name, requests, concurrency, warmup)
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'started_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'requests_per_scenario': requests,
+            'concurrency': concurrency,
+        },
+        'results': results,
+    }
+    if connection_samples:
+        report['connections'] = connection_overhead(connection_samples)
+    return report
+
+
+def compare(report, baseline):
+    """Return ``{scenario: {metric: percent change}}`` against a baseline report."""
+    changes = {}
+    for name, result in report['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before:
+            continue
+        changes[name] = {
+            metric: round((result[metric] - before[metric]) / before[metric] * 100, 1)
+            for metric in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms')
+            if before.get(metric)
+        }
+    return changes
@@ -0,0 +1,35 @@
+"""
+System checks for deployment settings the code relies on.
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from .db_routing import replica_aliases
+
+# Backends whose entries are not seen by other processes
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_process_local():
+    return settings.CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHES
+
+
+@register(Tags.caches, Tags.database)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Token clients are pinned to the primary through the cache, which workers must share."""
+    if not replica_aliases() or not cache_is_process_local():
+        return []
+    return [
+        Warning(
+            'Read replicas are configured but the default cache is local to each process.',
+            hint=(
+                'Clients without cookies are pinned to the primary through the cache, '
+                'so another worker may send their reads to a lagging replica. '
+                'Set REDIS_URL when running more than one worker.'
+            ),
+            id='core.W001',
+        )
+    ]
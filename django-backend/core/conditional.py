@@ -0,0 +1,121 @@
+"""
+Conditional GET for read endpoints.
+
+``ConditionalGetMixin`` gives a DRF view ``ETag`` and ``Last-Modified``
+validators from one aggregate query, ``MAX(updated_at)`` and ``COUNT(*)``
+over the rows the response is built from, plus an optional version
+counter for data those rows embed from elsewhere. A request whose
+``If-None-Match`` or ``If-Modified-Since`` still matches is answered with
+304 before anything is fetched or serialized.
+
+List responses carry only an ETag: a row leaving a list can leave
+``MAX(updated_at)`` where it was, and only the count notices. Detail
+responses carry both validators. A list view can reuse the count as
+``validator_count`` instead of counting again, and can opt out of
+validators for requests too costly to aggregate twice.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+DIGEST_SIZE = 16
+
+
+class NotModified(Exception):
+    """Carries the 304 for a request whose validators still match."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Answer unchanged GETs with 304.
+
+    Views override ``get_validator_queryset`` (default: the view's filtered
+    queryset, narrowed to the looked-up row on detail views) and
+    ``get_validator_version``. A view without a queryset can return None
+    from the former and rely on the version alone.
+    """
+
+    validator_field = 'updated_at'
+    # Catalogue views share responses between users; the rest are per user
+    cache_public = False
+    cache_max_age = 0
+
+    # COUNT over the validator queryset, once validators are computed
+    validator_count = None
+
+    def has_validators(self):
+        """Whether to compute validators for this request."""
+        return True
+
+    def is_detail(self):
+        lookup = getattr(self, 'lookup_url_kwarg', None) or getattr(self, 'lookup_field', None)
+        return lookup is not None and lookup in self.kwargs
+
+    def get_validator_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.is_detail():
+            lookup = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup]})
+        return queryset
+
+    def get_validator_version(self):
+        """Version of data the response embeds beyond its own rows, or None."""
+        return None
+
+    def get_validators(self):
+        """Return ``(etag, last_modified)``; either may be None."""
+        parts = [self.request.get_full_path(), self.get_validator_version()]
+        if not self.cache_public:
+            parts.append(self.request.user.pk)
+
+        last_modified = None
+        queryset = self.get_validator_queryset()
+        if queryset is not None:
+            stats = queryset.order_by().aggregate(last=Max(self.validator_field), count=Count('pk'))
+            if self.is_detail() and not stats['count']:
+                # Leave 404s and fallbacks to the view
+                return None, None
+            self.validator_count = stats['count']
+            parts += [stats['last'] and stats['last'].isoformat(), stats['count']]
+            if self.is_detail():
+                last_modified = int(stats['last'].timestamp())
+
+        digest = hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=DIGEST_SIZE).hexdigest()
+        return f'W/"{digest}"', last_modified
+
+    def initial(self, request, *args, **kwargs):
+        # After authentication, permissions and throttles; before the handler
+        super().initial(request, *args, **kwargs)
+        self.validators = (None, None)
+        if request.method not in ('GET', 'HEAD') or not self.has_validators():
+            return
+        self.validators = self.get_validators()
+        etag, last_modified = self.validators
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag, last_modified = getattr(self, 'validators', (None, None))
+        if response.status_code in (200, 304) and (etag or last_modified is not None):
+            if etag:
+                response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            if self.cache_public:
+                patch_cache_control(response, public=True, max_age=self.cache_max_age)
+            else:
+                patch_cache_control(response, private=True, no_cache=True)
+        return response
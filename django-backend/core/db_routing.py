@@ -0,0 +1,194 @@
+"""
+Read-replica routing with read-your-writes consistency.
+
+Every database alias other than ``default`` is treated as a read replica.
+Reads are sent to a replica only while handling a safe (GET/HEAD) request
+for a view that sets ``replica_reads = True``; everything else, including
+any read made inside a transaction, stays on the primary.
+
+A replica may lag the primary, so a client that has just written is pinned
+to the primary for ``READ_YOUR_WRITES_SECONDS``. The pin is a signed cookie
+for browsers and a cache entry keyed by user id for token clients, which do
+not keep cookies; that cache must be shared by all workers (see
+``core.checks``).
+"""
+import contextvars
+import itertools
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'sokoni_primary'
+PIN_SALT = 'core.db_routing.pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_current = contextvars.ContextVar('db_routing', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def _pin_cache_key(user_id):
+    return f'db:pin:{user_id}'
+
+
+class ReplicaPool:
+    """
+    Round robin over the configured replicas, skipping unhealthy ones.
+
+    A replica is probed with ``SELECT 1`` at most once per
+    ``REPLICA_HEALTH_CHECK_INTERVAL`` seconds per process; one that fails is
+    left out until its next probe succeeds.
+    """
+
+    def __init__(self, aliases):
+        self.aliases = list(aliases)
+        self._cycle = itertools.cycle(self.aliases)
+        self._checked = {}
+        self._healthy = {}
+        self._lock = threading.Lock()
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        if now - self._checked.get(alias, float('-inf')) >= settings.REPLICA_HEALTH_CHECK_INTERVAL:
+            self._checked[alias] = now
+            healthy = self.probe(alias)
+            if healthy != self._healthy.get(alias, True):
+                logger.warning('Replica %s is now %s', alias, 'healthy' if healthy else 'unavailable')
+            self._healthy[alias] = healthy
+        return self._healthy.get(alias, True)
+
+    def probe(self, alias):
+        connection = connections[alias]
+        try:
+            # On the raw DB-API connection, bypassing execute wrappers, so the
+            # probe never counts toward the request's query budget or metrics
+            connection.ensure_connection()
+            with connection.wrap_database_errors:
+                cursor = connection.connection.cursor()
+                try:
+                    cursor.execute('SELECT 1')
+                finally:
+                    cursor.close()
+            return True
+        except DatabaseError:
+            connection.close()
+            return False
+
+    def choose(self):
+        """Return the next healthy replica alias, or None if there is none."""
+        for _ in range(len(self.aliases)):
+            with self._lock:
+                alias = next(self._cycle)
+            if self.is_healthy(alias):
+                return alias
+        return None
+
+
+class RoutingState:
+    """Routing decisions for the request being handled."""
+
+    def __init__(self, request, use_replica):
+        self.request = request
+        self.use_replica = use_replica
+        self.replica = None
+        self._pinned_user = None
+
+    def pinned(self):
+        """Whether this client wrote recently and must read from the primary."""
+        if self.request.get_signed_cookie(
+            PIN_COOKIE, default=None, salt=PIN_SALT, max_age=settings.READ_YOUR_WRITES_SECONDS
+        ):
+            return True
+        # DRF copies the authenticated user onto the underlying request
+        user = getattr(self.request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return False
+        if self._pinned_user is None or self._pinned_user[0] != user.pk:
+            self._pinned_user = (user.pk, bool(cache.get(_pin_cache_key(user.pk))))
+        return self._pinned_user[1]
+
+
+class PrimaryReplicaRouter:
+    """Send writes to ``default`` and eligible reads to a healthy replica."""
+
+    def __init__(self):
+        self.pool = ReplicaPool(replica_aliases())
+
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if state is None or not state.use_replica or not self.pool.aliases:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block or state.pinned():
+            return DEFAULT_DB_ALIAS
+        # Keep one request on one replica so its reads see a single snapshot
+        if state.replica is None:
+            state.replica = self.pool.choose() or DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def replica_reads(enabled=True):
+    """Set ``replica_reads`` on a function-based view."""
+    def decorator(view):
+        view.replica_reads = enabled
+        return view
+    return decorator
+
+
+def pin_to_primary(request, response):
+    """Route this client's reads to the primary for the read-your-writes window."""
+    seconds = settings.READ_YOUR_WRITES_SECONDS
+    response.set_signed_cookie(
+        PIN_COOKIE, '1', salt=PIN_SALT, max_age=seconds, httponly=True, samesite='Lax'
+    )
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        cache.set(_pin_cache_key(user.pk), True, seconds)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Enable replica reads for opted-in views and pin clients after writes.
+
+    Views opt in with a ``replica_reads = True`` class attribute (or the
+    ``replica_reads`` decorator); setting it to False keeps a view on the
+    primary.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState(request, use_replica=False)
+        token = _current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _current.get()
+        if state is not None and request.method in SAFE_METHODS:
+            view = getattr(view_func, 'view_class', view_func)
+            state.use_replica = getattr(view, 'replica_reads', False)
@@ -0,0 +1,120 @@
+"""
+Per-view statement timeouts and clean 503s for database timeouts.
+
+PostgreSQL connections start with the server-wide ``DB_STATEMENT_TIMEOUT_MS``
+from settings. A view can tighten or relax it with a ``statement_timeout``
+class attribute in seconds; the limit is applied with ``SET`` on the first
+statement each connection runs for the request and reset afterwards, so
+pooled and persistent connections go back clean.
+
+A statement cancelled by the timeout, or a request that could not get a
+pooled connection in time, is answered with 503 and ``Retry-After`` instead
+of a 500.
+"""
+import logging
+from contextlib import ExitStack
+
+from django.db import OperationalError, connections
+from django.http import JsonResponse
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+QUERY_CANCELED = '57014'
+RETRY_AFTER_SECONDS = 2
+
+DB_TIMEOUTS = metrics.REGISTRY.register(metrics.Counter(
+    'sokoni_db_timeouts', 'Requests failed by a statement or connection pool timeout', ('kind',)
+))
+
+
+def statement_timeout(seconds):
+    """Set ``statement_timeout`` on a function-based view."""
+    def decorator(view):
+        view.statement_timeout = seconds
+        return view
+    return decorator
+
+
+def timeout_kind(exc):
+    """Return 'statement' or 'pool' if ``exc`` is a database timeout, else None."""
+    if not isinstance(exc, OperationalError):
+        return None
+    cause = exc.__cause__
+    if QUERY_CANCELED in (getattr(cause, 'sqlstate', None), getattr(cause, 'pgcode', None)):
+        return 'statement'
+    if type(cause).__name__ == 'PoolTimeout':
+        return 'pool'
+    return None
+
+
+class StatementTimeout:
+    """Database execute wrapper applying a statement timeout on first use."""
+
+    def __init__(self):
+        self.milliseconds = None
+        self.applied = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        connection = context['connection']
+        if (self.milliseconds is not None and connection.vendor == 'postgresql'
+                and self.applied.get(connection.alias) is not connection.connection):
+            # The raw cursor keeps the SET out of query counts and budgets;
+            # SET takes no bind parameters, and milliseconds is an int.
+            context['cursor'].cursor.execute(f'SET statement_timeout = {self.milliseconds}')
+            self.applied[connection.alias] = connection.connection
+        return execute(sql, params, many, context)
+
+    def reset(self):
+        for alias, raw in self.applied.items():
+            connection = connections[alias]
+            if connection.connection is not raw:
+                continue
+            try:
+                with raw.cursor() as cursor:
+                    cursor.execute('RESET statement_timeout')
+            except Exception:
+                # An aborted transaction rejects RESET; drop the connection
+                # rather than hand it back with the override still set.
+                logger.warning('Could not reset statement_timeout on %s; closing it', alias)
+                connection.close()
+        self.applied.clear()
+
+
+class StatementTimeoutMiddleware:
+    """Apply view statement timeouts and turn database timeouts into 503s."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        wrapper = StatementTimeout()
+        request._statement_timeout = wrapper
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(wrapper))
+                return self.get_response(request)
+        finally:
+            wrapper.reset()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', view_func)
+        seconds = getattr(view, 'statement_timeout', None)
+        if seconds is not None:
+            request._statement_timeout.milliseconds = int(seconds * 1000)
+
+    def process_exception(self, request, exception):
+        kind = timeout_kind(exception)
+        if kind is None:
+            return None
+        DB_TIMEOUTS.inc((kind,))
+        logger.warning('Database %s timeout on %s %s', kind, request.method, request.path)
+        message = (
+            'The request took too long to process' if kind == 'statement'
+            else 'The service is busy'
+        )
+        response = JsonResponse({'error': f'{message}; please retry shortly'}, status=503)
+        response['Retry-After'] = str(RETRY_AFTER_SECONDS)
+        return response
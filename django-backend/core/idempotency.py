@@ -0,0 +1,215 @@
+"""
+Idempotency-Key support for unsafe API requests.
+
+Clients on flaky connections retry POSTs. When a request carries an
+``Idempotency-Key`` header, the first execution is recorded together with its
+response; retries with the same key replay that response instead of running
+the view again. A retry that arrives while the first execution is still in
+flight waits for it to finish rather than racing it.
+"""
+import hashlib
+import json
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+
+# Executions owned by this process, so same-process duplicates can block on
+# an event instead of polling the database.
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _digest(*parts):
+    """Return a compact hex digest of the given string parts."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part.encode('utf-8'))
+        h.update(b'\x1f')
+    return h.hexdigest()
+
+
+def _request_hash(request):
+    """Hash the parsed request body in a key-order independent way."""
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = {key: values for key, values in data.lists()}
+    return _digest(json.dumps(data, sort_keys=True, default=str))
+
+
+def _claim(key_hash, scope, request_hash, attempts=2):
+    """
+    Insert an in-progress record for the key.
+
+    Returns ``(record, owner)``; ``owner`` is True when this request should
+    execute the view. Expired records and records whose owner appears to have
+    died are taken over.
+    """
+    for _ in range(attempts):
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    key_hash=key_hash,
+                    scope=scope,
+                    request_hash=request_hash,
+                    locked_at=now,
+                    expires_at=now + settings.IDEMPOTENCY_KEY_TTL,
+                )
+            return record, True
+        except IntegrityError:
+            pass
+
+        record = IdempotencyKey.objects.filter(key_hash=key_hash).first()
+        if record is None:
+            # The previous owner failed and released the key in between.
+            continue
+
+        stale = (
+            record.expires_at <= now
+            or (record.status == 'in_progress'
+                and record.locked_at <= now - settings.IDEMPOTENCY_LOCK_TIMEOUT)
+        )
+        if stale:
+            taken = IdempotencyKey.objects.filter(
+                key_hash=key_hash, locked_at=record.locked_at, status=record.status
+            ).update(
+                status='in_progress',
+                request_hash=request_hash,
+                response_status=None,
+                response_body=None,
+                locked_at=now,
+                expires_at=now + settings.IDEMPOTENCY_KEY_TTL,
+            )
+            if taken:
+                record.status = 'in_progress'
+                record.request_hash = request_hash
+                return record, True
+
+        return record, False
+
+    return None, False
+
+
+def _wait_for_completion(key_hash):
+    """
+    Block until the in-flight execution for ``key_hash`` completes.
+
+    Returns the completed record, or None if it did not complete within
+    ``IDEMPOTENCY_WAIT_TIMEOUT`` or the owner released the key after failing.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+    with _inflight_lock:
+        event = _inflight.get(key_hash)
+
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        if event is not None:
+            event.wait(min(remaining, 1.0))
+        else:
+            time.sleep(min(remaining, POLL_INTERVAL))
+
+        record = IdempotencyKey.objects.filter(key_hash=key_hash).first()
+        if record is None:
+            return None
+        if record.status == 'completed':
+            return record
+
+
+def _release(key_hash):
+    with _inflight_lock:
+        event = _inflight.pop(key_hash, None)
+    if event is not None:
+        event.set()
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.response_status)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(scope):
+    """
+    Make an APIView handler idempotent for requests carrying an
+    ``Idempotency-Key`` header.
+
+    The view runs inside a transaction together with the write that records
+    its response, so a committed side effect always has a stored response.
+    Requests without the header run unchanged.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            raw_key = request.META.get(IDEMPOTENCY_HEADER)
+            if not raw_key:
+                return view_method(self, request, *args, **kwargs)
+
+            if len(raw_key) > MAX_KEY_LENGTH:
+                return Response(
+                    {'error': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            user_id = str(request.user.pk) if request.user.is_authenticated else 'anonymous'
+            key_hash = _digest(scope, user_id, raw_key)
+            request_hash = _request_hash(request)
+
+            record, owner = _claim(key_hash, scope, request_hash)
+
+            if not owner:
+                if record is not None and record.request_hash != request_hash:
+                    return Response(
+                        {'error': 'Idempotency-Key was already used with a different request'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                if record is not None and record.status == 'completed':
+                    return _replay(record)
+
+                record = _wait_for_completion(key_hash)
+                if record is None or record.request_hash != request_hash:
+                    response = Response(
+                        {'error': 'A request with this Idempotency-Key is still being processed'},
+                        status=status.HTTP_409_CONFLICT
+                    )
+                    response['Retry-After'] = '1'
+                    return response
+                return _replay(record)
+
+            with _inflight_lock:
+                _inflight[key_hash] = threading.Event()
+
+            try:
+                with transaction.atomic():
+                    response = view_method(self, request, *args, **kwargs)
+                    if response.status_code < 500:
+                        IdempotencyKey.objects.filter(key_hash=key_hash).update(
+                            status='completed',
+                            response_status=response.status_code,
+                            response_body=response.data,
+                        )
+            except Exception:
+                IdempotencyKey.objects.filter(key_hash=key_hash, status='in_progress').delete()
+                _release(key_hash)
+                raise
+
+            if response.status_code >= 500:
+                IdempotencyKey.objects.filter(key_hash=key_hash, status='in_progress').delete()
+            _release(key_hash)
+            return response
+
+        return wrapper
+    return decorator
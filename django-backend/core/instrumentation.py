@@ -0,0 +1,156 @@
+"""
+Per-request instrumentation: SQL queries, DB time, serializer time.
+
+``RequestMetricsMiddleware`` records these for every request, labelled by
+the resolved URL name, into the histograms in ``core.metrics``. It also
+writes a sampled log of slow requests with their most expensive queries,
+and enforces ``query_budget`` declared on views.
+"""
+import contextvars
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger('sokoni.slow_requests')
+
+TOP_QUERIES = 5
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a view runs more queries than its ``query_budget``."""
+
+
+class RequestStats:
+    """Measurements collected while one request is handled."""
+
+    def __init__(self):
+        self.queries = []
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        # Database execute wrapper; see connection.execute_wrapper()
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries.append((sql, elapsed))
+            self.db_seconds += elapsed
+
+    def top_queries(self, limit=TOP_QUERIES):
+        """Return ``(sql, count, seconds)`` for the costliest statements."""
+        grouped = defaultdict(lambda: [0, 0.0])
+        for sql, elapsed in self.queries:
+            grouped[sql][0] += 1
+            grouped[sql][1] += elapsed
+        ranked = sorted(grouped.items(), key=lambda item: -item[1][1])
+        return [(sql, count, seconds) for sql, (count, seconds) in ranked[:limit]]
+
+
+def _timed_data(prop):
+    def data(self):
+        stats = _current.get()
+        if stats is None or stats.serializing:
+            return prop.fget(self)
+        stats.serializing = True
+        start = time.perf_counter()
+        try:
+            return prop.fget(self)
+        finally:
+            stats.serializing = False
+            stats.serializer_seconds += time.perf_counter() - start
+    data._instrumented = True
+    return property(data)
+
+
+def instrument_serializers():
+    """Time the outermost ``.data`` access of DRF serializers during requests."""
+    from rest_framework.serializers import ListSerializer, Serializer
+
+    for cls in (Serializer, ListSerializer):
+        prop = cls.__dict__['data']
+        if not getattr(prop.fget, '_instrumented', False):
+            cls.data = _timed_data(prop)
+
+
+def query_budget(limit):
+    """Declare the maximum number of SQL queries a function-based view may run."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def _budget_for(resolver_match):
+    if resolver_match is None:
+        return None
+    view = resolver_match.func
+    return getattr(getattr(view, 'view_class', view), 'query_budget', None)
+
+
+def _response_size(response):
+    if response.streaming:
+        return int(response.get('Content-Length') or 0)
+    return len(response.content)
+
+
+class RequestMetricsMiddleware:
+    """Record query count, DB/serializer time and response size per endpoint."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        labels = (match.view_name if match else 'unmatched', request.method)
+        metrics.REQUESTS.inc(labels + (response.status_code,))
+        metrics.REQUEST_SECONDS.observe(labels, duration)
+        metrics.DB_QUERIES.observe(labels, len(stats.queries))
+        metrics.DB_SECONDS.observe(labels, stats.db_seconds)
+        metrics.SERIALIZER_SECONDS.observe(labels, stats.serializer_seconds)
+        metrics.RESPONSE_BYTES.observe(labels, _response_size(response))
+
+        if duration >= settings.SLOW_REQUEST_SECONDS and random.random() < settings.SLOW_REQUEST_SAMPLE_RATE:
+            self.log_slow_request(request, response, labels[0], duration, stats)
+
+        budget = _budget_for(match)
+        if budget is not None and len(stats.queries) > budget:
+            message = f'{labels[0]} ran {len(stats.queries)} queries; its budget is {budget}'
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
+
+    def log_slow_request(self, request, response, endpoint, duration, stats):
+        top = '\n'.join(
+            f'  {count}x {seconds * 1000:.1f}ms {sql}' for sql, count, seconds in stats.top_queries()
+        )
+        logger.warning(
+            'Slow request %s %s (%s) -> %s in %.0fms: %s queries, %.0fms SQL, %.0fms serializing\n%s',
+            request.method, request.get_full_path(), endpoint, response.status_code, duration * 1000,
+            len(stats.queries), stats.db_seconds * 1000, stats.serializer_seconds * 1000, top,
+        )
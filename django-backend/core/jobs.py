@@ -0,0 +1,214 @@
+"""
+Database-backed background jobs.
+
+Register a handler with ``@task('name')`` in an app's ``tasks.py`` and queue
+work with ``enqueue('name', {...})`` inside the request transaction; the job
+row commits with the request's writes and ``manage.py run_workers`` executes
+it afterwards.
+"""
+import logging
+import random
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 3600
+LOCK_TIMEOUT = timedelta(minutes=15)
+# How often long-running handlers extend their claim
+HEARTBEAT_INTERVAL = timedelta(minutes=1)
+
+_registry = {}
+_current_job = ContextVar('current_job', default=None)
+
+
+class Task:
+    """A registered job handler."""
+
+    def __init__(self, func, name, queue, max_attempts, atomic):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.atomic = atomic
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, payload=None, delay=None):
+        return enqueue(self.name, payload, delay=delay)
+
+
+def task(name, queue='default', max_attempts=5, atomic=True):
+    """
+    Register the decorated function as the handler for jobs called ``name``.
+
+    Long-running handlers that commit their own progress pass
+    ``atomic=False`` to run outside the per-job transaction, and call
+    ``heartbeat()`` as they go.
+    """
+    def decorator(func):
+        registered = Task(func, name, queue, max_attempts, atomic)
+        _registry[name] = registered
+        return registered
+    return decorator
+
+
+def get_task(name):
+    return _registry[name]
+
+
+def enqueue(name, payload=None, queue=None, delay=None):
+    """
+    Queue a job for the handler registered as ``name``.
+
+    ``payload`` is passed to the handler as keyword arguments and must be
+    JSON serializable.
+    """
+    registered = get_task(name)
+    return Job.objects.create(
+        name=name,
+        queue=queue or registered.queue,
+        payload=payload or {},
+        max_attempts=registered.max_attempts,
+        run_at=timezone.now() + (delay or timedelta()),
+    )
+
+
+def claim_rows(queryset, limit, **updates):
+    """
+    Atomically apply ``updates`` to up to ``limit`` rows of ``queryset``.
+
+    Returns the primary keys of the rows claimed by this caller. Uses
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` where supported so concurrent
+    workers never wait on each other. On SQLite, which serializes writers,
+    each row is claimed with an UPDATE that re-checks the ``queryset``
+    filters, so a row taken by another worker in the meantime is skipped.
+    """
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                queryset.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit]
+            )
+            if ids:
+                queryset.model.objects.filter(pk__in=ids).update(**updates)
+        return ids
+
+    ids = []
+    for pk in list(queryset.values_list('pk', flat=True)[:limit]):
+        if queryset.filter(pk=pk).update(**updates):
+            ids.append(pk)
+    return ids
+
+
+def claim_jobs(queue, limit, worker_id):
+    """Claim up to ``limit`` due jobs from ``queue`` for ``worker_id``."""
+    now = timezone.now()
+    due = (
+        Job.objects.filter(queue=queue, status='queued', run_at__lte=now)
+        | Job.objects.filter(queue=queue, status='running', locked_at__lte=now - LOCK_TIMEOUT)
+    ).order_by('run_at')
+    return claim_rows(due, limit, status='running', locked_at=now, locked_by=worker_id)
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter for the given number of failed attempts."""
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+class LeaseLost(Exception):
+    """Raised when a job was reclaimed by another worker while it ran."""
+
+
+def finish_job(job, attempts):
+    """
+    Mark ``job`` done if this worker still holds its claim.
+
+    Returns False when the lease expired and another worker reclaimed it.
+    """
+    return bool(Job.objects.filter(
+        pk=job.pk, status='running', locked_by=job.locked_by, locked_at=job.locked_at,
+    ).update(
+        status='done', attempts=attempts, last_error=None,
+        locked_at=None, finished_at=timezone.now(),
+    ))
+
+
+def heartbeat():
+    """
+    Extend the claim on the job being run, at most every ``HEARTBEAT_INTERVAL``.
+
+    ``atomic=False`` handlers that may outlast ``LOCK_TIMEOUT`` call this as
+    they make progress so no other worker reclaims the job. Raises
+    ``LeaseLost`` if one already has; does nothing outside a job.
+    """
+    job = _current_job.get()
+    if job is None:
+        return
+    now = timezone.now()
+    if now - job.locked_at < HEARTBEAT_INTERVAL:
+        return
+    if not Job.objects.filter(
+        pk=job.pk, status='running', locked_by=job.locked_by, locked_at=job.locked_at,
+    ).update(locked_at=now):
+        raise LeaseLost()
+    job.locked_at = now
+
+
+def run_job(job_id):
+    """
+    Execute one claimed job and record the outcome.
+
+    The handler runs in a transaction unless registered with
+    ``atomic=False``, so a failed attempt leaves no partial writes behind
+    before it is retried. The job is marked done in that same transaction,
+    so a crash after the handler's writes commit can't run it again, and a
+    job reclaimed by another worker meanwhile rolls back instead of
+    applying twice.
+    """
+    job = Job.objects.get(pk=job_id)
+    attempts = job.attempts + 1
+    token = _current_job.set(job)
+    try:
+        handler = get_task(job.name)
+        if handler.atomic:
+            with transaction.atomic():
+                handler(**job.payload)
+                if not finish_job(job, attempts):
+                    raise LeaseLost()
+            return True
+        handler(**job.payload)
+    except LeaseLost:
+        logger.warning('Job %s (%s) was reclaimed while running; discarding this attempt', job.id, job.name)
+        return False
+    except Exception as exc:
+        logger.exception('Job %s (%s) failed on attempt %s', job.id, job.name, attempts)
+        if attempts >= job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(
+                status='failed', attempts=attempts, last_error=repr(exc),
+                locked_at=None, finished_at=timezone.now(),
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status='queued', attempts=attempts, last_error=repr(exc),
+                locked_at=None, run_at=timezone.now() + retry_delay(attempts),
+            )
+        return False
+    finally:
+        _current_job.reset(token)
+
+    finish_job(job, attempts)
+    return True
+
+
+def queue_concurrency():
+    """Return ``{queue: max concurrent jobs}`` from ``settings.JOB_QUEUES``."""
+    return {name: config.get('CONCURRENCY', 1) for name, config in settings.JOB_QUEUES.items()}
@@ -0,0 +1,42 @@
+"""
+Management command to generate synthetic marketplace data for load testing.
+Run with: python manage.py generate_load_data [--preset large] [--orders 100000]
+"""
+from django.core.management.base import BaseCommand
+
+from core.synthetic import LOAD_PASSWORD, LoadGenerator, clear_load_data
+
+PRESETS = {
+    'small': {'users': 1000, 'shops': 50, 'products': 10_000, 'orders': 20_000, 'riders': 50},
+    'medium': {'users': 20_000, 'shops': 1000, 'products': 100_000, 'orders': 500_000, 'riders': 500},
+    'large': {'users': 100_000, 'shops': 5000, 'products': 1_000_000, 'orders': 10_000_000, 'riders': 2000},
+}
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users, shops, products, riders and orders in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--preset', choices=PRESETS, default='small', help='Base volumes')
+        for name in PRESETS['small']:
+            parser.add_argument(f'--{name}', type=int, help=f'Number of {name} (overrides the preset)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for repeatable data')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated data first')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted = clear_load_data()
+            self.stdout.write(f'Deleted {deleted} generated row(s)')
+
+        volumes = {
+            name: options[name] if options[name] is not None else default
+            for name, default in PRESETS[options['preset']].items()
+        }
+        generator = LoadGenerator(
+            batch_size=options['batch_size'], seed=options['seed'], log=self.stdout.write
+        )
+        generator.generate(**volumes)
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {volumes}. Every generated user has password "{LOAD_PASSWORD}".'
+        ))
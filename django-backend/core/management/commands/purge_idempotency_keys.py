@@ -0,0 +1,48 @@
+"""
+Management command to delete expired idempotency keys.
+Run with: python manage.py purge_idempotency_keys [--interval 300]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Delete expired idempotency keys'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of keys deleted per statement',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Keep running and sweep every N seconds (0 runs once)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = self.sweep(options['batch_size'])
+            self.stdout.write(f'Deleted {deleted} expired idempotency key(s)')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def sweep(self, batch_size):
+        """Delete expired keys in small batches to keep each statement short."""
+        total = 0
+        while True:
+            expired = list(
+                IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+                .values_list('key_hash', flat=True)[:batch_size]
+            )
+            if not expired:
+                return total
+            total += IdempotencyKey.objects.filter(key_hash__in=expired).delete()[0]
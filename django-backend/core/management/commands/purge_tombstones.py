@@ -0,0 +1,18 @@
+"""
+Management command to delete sync tombstones past their retention period.
+Run with: python manage.py purge_tombstones
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION'
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - settings.SYNC_TOMBSTONE_RETENTION
+        deleted, _ = Tombstone.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(f'Deleted {deleted} tombstone(s)')
@@ -0,0 +1,80 @@
+"""
+Management command to benchmark API endpoints against generated load data.
+Run with: python manage.py run_benchmarks [--requests 500] [--output results.json]
+
+Write scenarios (cart_add, order_create) change the database; run them
+against a disposable copy.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import SCENARIOS, WRITE_SCENARIOS, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Measure throughput and p50/p95/p99 latency per endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenarios',
+            default='',
+            help=f"Comma-separated scenarios (default: all read-only). Available: {', '.join(SCENARIOS)}",
+        )
+        parser.add_argument('--writes', action='store_true', help='Include scenarios that write data')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=1, help='Client threads per scenario')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed requests before measuring')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for request selection')
+        parser.add_argument(
+            '--connections',
+            type=int,
+            default=0,
+            metavar='SAMPLES',
+            help='Also measure connection setup cost with this many samples',
+        )
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--compare', help='Baseline JSON report to compare against')
+
+    def handle(self, *args, **options):
+        if options['scenarios']:
+            names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+            unknown = set(names) - set(SCENARIOS)
+            if unknown:
+                raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+        else:
+            names = [name for name in SCENARIOS if options['writes'] or name not in WRITE_SCENARIOS]
+
+        try:
+            report = run_benchmarks(
+                names, options['requests'], options['concurrency'], options['warmup'], options['seed'],
+                options['connections'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(f"{'scenario':<22}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name, result in report['results'].items():
+            self.stdout.write(
+                f"{name:<22}{result['throughput_rps']:>10}{result['p50_ms']:>10}"
+                f"{result['p95_ms']:>10}{result['p99_ms']:>10}{result['errors']:>8}"
+            )
+
+        if 'connections' in report:
+            overhead = report['connections']
+            self.stdout.write(
+                f"connection setup: {overhead['setup_p50_ms']}ms p50 "
+                f"(fresh {overhead['fresh']['p50_ms']}ms, reused {overhead['reused']['p50_ms']}ms, "
+                f"pooled={overhead['pooled']}, CONN_MAX_AGE={overhead['conn_max_age']})"
+            )
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                report['comparison'] = compare(report, json.load(f))
+            for name, changes in report['comparison'].items():
+                self.stdout.write(f'{name}: ' + ', '.join(f'{k} {v:+}%' for k, v in changes.items()))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
@@ -0,0 +1,106 @@
+"""
+Management command that runs background job workers.
+Run with: python manage.py run_workers [--queues default,media] [--mode thread|process]
+"""
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+from core.jobs import claim_jobs, queue_concurrency, run_job
+
+
+def _init_process():
+    # Spawned children start without Django configured; forked ones must not
+    # reuse the parent's database connections.
+    django.setup()
+    connections.close_all()
+
+
+def _run_in_thread(job_id):
+    try:
+        return run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queues',
+            default='',
+            help='Comma-separated queues to serve (default: all in settings.JOB_QUEUES)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=0,
+            help='Override the per-queue concurrency from settings',
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['thread', 'process'],
+            default='thread',
+            help='Run jobs in a thread pool or a process pool',
+        )
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when idle')
+        parser.add_argument('--once', action='store_true', help='Exit when no work is left instead of polling')
+
+    def handle(self, *args, **options):
+        limits = queue_concurrency()
+        if options['queues']:
+            names = [name.strip() for name in options['queues'].split(',') if name.strip()]
+            unknown = set(names) - set(limits)
+            if unknown:
+                raise CommandError(f"Unknown queue(s): {', '.join(sorted(unknown))}")
+            limits = {name: limits[name] for name in names}
+        if options['concurrency']:
+            limits = {name: options['concurrency'] for name in limits}
+
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        if options['mode'] == 'process':
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=sum(limits.values()), initializer=_init_process)
+            runner = run_job
+        else:
+            executor = ThreadPoolExecutor(max_workers=sum(limits.values()))
+            runner = _run_in_thread
+
+        self.stdout.write(
+            f"Worker {worker_id} serving " + ', '.join(f'{q} ({n})' for q, n in limits.items())
+        )
+        in_flight = {name: set() for name in limits}
+
+        with executor:
+            while not self.stopping:
+                claimed = 0
+                for queue, limit in limits.items():
+                    in_flight[queue] = {f for f in in_flight[queue] if not f.done()}
+                    free = limit - len(in_flight[queue])
+                    if free <= 0:
+                        continue
+                    for job_id in claim_jobs(queue, free, worker_id):
+                        in_flight[queue].add(executor.submit(runner, job_id))
+                        claimed += 1
+
+                busy = any(in_flight.values())
+                if not claimed and not busy and options['once']:
+                    break
+                if not claimed:
+                    time.sleep(options['interval'] if not busy else 0.1)
+
+        self.stdout.write(f'Worker {worker_id} stopped')
+
+    def stop(self, signum, frame):
+        self.stopping = True
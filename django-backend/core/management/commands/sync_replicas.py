@@ -0,0 +1,47 @@
+"""
+Management command to copy the SQLite primary into its local read replicas.
+Run with: DB_REPLICAS=replica1.sqlite3 python manage.py sync_replicas [--interval 2]
+"""
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.db_routing import replica_aliases
+
+
+class Command(BaseCommand):
+    help = 'Copy the SQLite primary database into each configured replica file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Keep copying every N seconds, simulating replication lag',
+        )
+
+    def handle(self, *args, **options):
+        aliases = replica_aliases()
+        if not aliases:
+            raise CommandError('No replicas configured; set DB_REPLICAS')
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError('Only SQLite replicas can be synced; PostgreSQL uses streaming replication')
+
+        while True:
+            source = sqlite3.connect(connections[DEFAULT_DB_ALIAS].settings_dict['NAME'])
+            try:
+                for alias in aliases:
+                    connections[alias].close()
+                    target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+                    try:
+                        source.backup(target)
+                    finally:
+                        target.close()
+            finally:
+                source.close()
+            self.stdout.write(f"Synced {', '.join(aliases)}")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,133 @@
+"""
+In-process request metrics with Prometheus text exposition.
+
+Metrics are kept per process; when running several workers, scrape each
+one or aggregate downstream.
+"""
+import threading
+from collections import defaultdict
+
+# Upper bounds of histogram buckets for each kind of measurement
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+BYTES_BUCKETS = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count per label set."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[tuple(labels)] += amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f'{self.name}_total{_format_labels(self.labelnames, labels)} {_format_number(value)}'
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label set."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        labels = tuple(labels)
+        with self._lock:
+            counts, total = self._values.get(labels) or ([0] * (len(self.buckets) + 1), 0)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            counts[-1] += 1
+            self._values[labels] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = {labels: (list(counts), total) for labels, (counts, total) in self._values.items()}
+        for labels, (counts, total) in sorted(values.items()):
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                le = f'le="{bound}"'
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {count}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_number(total)}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, labels)} {counts[-1]}'
+
+
+class Registry:
+    """The metrics exposed on /metrics."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+ENDPOINT_LABELS = ('endpoint', 'method')
+
+REQUESTS = REGISTRY.register(Counter(
+    'sokoni_http_requests', 'HTTP requests by endpoint and status', ENDPOINT_LABELS + ('status',)
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'sokoni_http_request_duration_seconds', 'Time spent handling the request',
+    ENDPOINT_LABELS, SECONDS_BUCKETS,
+))
+DB_QUERIES = REGISTRY.register(Histogram(
+    'sokoni_http_request_db_queries', 'SQL queries executed per request',
+    ENDPOINT_LABELS, COUNT_BUCKETS,
+))
+DB_SECONDS = REGISTRY.register(Histogram(
+    'sokoni_http_request_db_seconds', 'Time spent in SQL per request',
+    ENDPOINT_LABELS, SECONDS_BUCKETS,
+))
+SERIALIZER_SECONDS = REGISTRY.register(Histogram(
+    'sokoni_http_request_serializer_seconds', 'Time spent producing serializer data per request',
+    ENDPOINT_LABELS, SECONDS_BUCKETS,
+))
+RESPONSE_BYTES = REGISTRY.register(Histogram(
+    'sokoni_http_response_bytes', 'Response body size',
+    ENDPOINT_LABELS, BYTES_BUCKETS,
+))
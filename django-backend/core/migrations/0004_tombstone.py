@@ -0,0 +1,28 @@
+# Generated migration for sync tombstones
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_transition_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('model_label', models.CharField(max_length=100)),
+                ('object_id', models.UUIDField()),
+                ('owner_id', models.UUIDField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'tombstones',
+                'indexes': [models.Index(fields=['owner_id', 'model_label', 'created_at'], name='tombstones_owner_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1 @@
+# Migrations
@@ -0,0 +1,116 @@
+"""
+Models for shared platform infrastructure.
+"""
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+import uuid
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a request made with an Idempotency-Key header."""
+
+    STATUS_CHOICES = [
+        ('in_progress', 'In Progress'),
+        ('completed', 'Completed'),
+    ]
+
+    # blake2b digest of (scope, user, client key); compact and fixed width
+    key_hash = models.CharField(max_length=32, primary_key=True)
+    scope = models.CharField(max_length=50)
+    request_hash = models.CharField(max_length=32)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+    response_status = models.PositiveSmallIntegerField(blank=True, null=True)
+    response_body = models.JSONField(blank=True, null=True, encoder=DjangoJSONEncoder)
+    locked_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'idempotency_keys'
+
+    def __str__(self):
+        return f"{self.scope}:{self.key_hash} ({self.status})"
+
+
+class Job(models.Model):
+    """Background job stored in the database (transactional outbox).
+
+    Jobs enqueued inside a request's transaction only become visible to
+    ``manage.py run_workers`` once that transaction commits.
+    """
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    queue = models.CharField(max_length=50, default='default')
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField()
+    locked_at = models.DateTimeField(blank=True, null=True)
+    locked_by = models.CharField(max_length=100, blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'jobs'
+        indexes = [
+            models.Index(fields=['queue', 'status', 'run_at'], name='jobs_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} [{self.queue}] ({self.status})"
+
+
+class TransitionLog(models.Model):
+    """Append-only record of status transitions made through a StateMachine."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    model_label = models.CharField(max_length=100)
+    object_id = models.UUIDField()
+    from_status = models.CharField(max_length=20)
+    to_status = models.CharField(max_length=20)
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'transition_log'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['model_label', 'object_id', 'created_at'], name='transition_log_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label} {self.object_id}: {self.from_status} -> {self.to_status}"
+
+
+class Tombstone(models.Model):
+    """Marker left behind when a synced row is deleted.
+
+    Delta-sync endpoints report tombstones newer than the client's watermark
+    so the client can drop rows it still holds.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    model_label = models.CharField(max_length=100)
+    object_id = models.UUIDField()
+    owner_id = models.UUIDField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'tombstones'
+        indexes = [
+            models.Index(fields=['owner_id', 'model_label', 'created_at'], name='tombstones_owner_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label} {self.object_id} deleted"
@@ -0,0 +1,81 @@
+"""
+Shared pagination classes.
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Newest-first cursor pagination; stable while new rows are inserted."""
+
+    ordering = '-created_at'
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keep full microsecond precision, which DjangoJSONEncoder truncates."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def int_param(params, name, default, minimum=None, maximum=None):
+    """
+    Integer query parameter ``name`` clamped to ``[minimum, maximum]``.
+
+    Raises ValidationError if it isn't an integer.
+    """
+    try:
+        value = int(params.get(name, default))
+    except (TypeError, ValueError):
+        raise ValidationError({name: 'Must be an integer'})
+    if minimum is not None:
+        value = max(value, minimum)
+    if maximum is not None:
+        value = min(value, maximum)
+    return value
+
+
+def encode_cursor(values):
+    """Encode the sort key values of the last row on a page as an opaque token."""
+    raw = json.dumps(list(values), cls=CursorEncoder).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(token, length):
+    """Decode a token from ``encode_cursor``; raises ValidationError if invalid."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except (ValueError, TypeError, binascii.Error):
+        values = None
+    if not isinstance(values, list) or len(values) != length:
+        raise ValidationError({'cursor': 'Invalid cursor'})
+    return values
+
+
+def keyset_filter(ordering, values):
+    """
+    Return a Q matching rows that sort strictly after ``values``.
+
+    ``ordering`` is a sequence of field names (``-`` for descending) whose
+    last entry is unique, so the position is never ambiguous.
+    """
+    after = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        after |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return after
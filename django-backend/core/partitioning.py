@@ -0,0 +1,105 @@
+"""
+Monthly range partitions for PostgreSQL tables.
+
+A partitioned table keeps each calendar month of rows (by a timestamp
+column) in its own child table, so indexes stay month-sized, vacuum works
+on one month at a time, and an old month can be detached or dropped
+without a bulk DELETE. PostgreSQL requires the partition column in every
+unique constraint, so the primary key becomes ``(id, <column>)``; tables
+referenced by foreign keys therefore cannot be partitioned this way.
+
+Every function here is a no-op on other databases, where the tables stay
+ordinary ones.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection
+
+
+def is_supported(conn=None):
+    return (conn or connection).vendor == 'postgresql'
+
+
+def month_start(value):
+    """First instant of ``value``'s month, in UTC."""
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    """Shift a month start by ``months`` (negative to go back)."""
+    index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table, start):
+    return f'{table}_p{start:%Y%m}'
+
+
+def convert_to_partitioned(schema_editor, table, column):
+    """
+    Recreate the empty ``table`` as a table partitioned by month on ``column``.
+
+    Used from migrations right after the table is created. Columns,
+    defaults, indexes and foreign keys are carried over; the primary key is
+    widened to ``(id, column)``.
+    """
+    if not is_supported(schema_editor.connection):
+        return
+    quote = schema_editor.quote_name
+    old = f'{table}_unpartitioned'
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+            [table, f'{table}_pkey'],
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [table],
+        )
+        foreign_keys = cursor.fetchall()
+
+    schema_editor.execute(f'ALTER TABLE {quote(table)} RENAME TO {quote(old)}')
+    schema_editor.execute(
+        f'CREATE TABLE {quote(table)} (LIKE {quote(old)} INCLUDING DEFAULTS) '
+        f'PARTITION BY RANGE ({quote(column)})'
+    )
+    schema_editor.execute(f'DROP TABLE {quote(old)}')
+    schema_editor.execute(f'ALTER TABLE {quote(table)} ADD PRIMARY KEY (id, {quote(column)})')
+    for definition in indexes:
+        # Definitions were read before the rename, so they name the new table
+        schema_editor.execute(definition)
+    for name, definition in foreign_keys:
+        schema_editor.execute(f'ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} {definition}')
+
+
+def ensure_partitions(table, months):
+    """Create the partitions of ``table`` for the given month starts if missing."""
+    if not is_supported():
+        return
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for start in sorted(set(months)):
+            # DDL takes no bind parameters; the bounds are formatted datetimes
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {quote(partition_name(table, start))} '
+                f'PARTITION OF {quote(table)} '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{add_months(start, 1).isoformat()}')"
+            )
+
+
+def list_partitions(table):
+    """Return the names of ``table``'s partitions, oldest first."""
+    if not is_supported():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = %s ORDER BY child.relname",
+            [table],
+        )
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,132 @@
+"""
+Declarative status state machines.
+
+A ``StateMachine`` declares which status changes a model allows. Transitions
+are applied as a guarded ``UPDATE ... WHERE status = <from>`` touching only
+the changed columns, so two concurrent requests cannot both move the same row
+and unrelated fields are never overwritten. Every transition is recorded in
+the append-only ``TransitionLog``, and announced with the ``transitioned``
+signal so denormalized copies of the row can follow.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import TransitionLog
+
+
+# Sent inside the transition's transaction with the model as sender and
+# ``object_ids``, ``from_status`` and ``to_status``.
+transitioned = Signal()
+
+
+class TransitionError(Exception):
+    """Raised when a transition is not allowed from the current status."""
+
+
+class StaleStateError(TransitionError):
+    """Raised when the row's status changed before the transition was applied."""
+
+
+class StateMachine:
+    """Allowed status transitions for a model with a ``status`` field."""
+
+    def __init__(self, model, transitions, field='status'):
+        self.model = model
+        self.field = field
+        self.transitions = {source: frozenset(targets) for source, targets in transitions.items()}
+
+    @property
+    def label(self):
+        return self.model._meta.label_lower
+
+    def allowed(self, from_status):
+        """Return the statuses reachable from ``from_status``."""
+        return self.transitions.get(from_status, frozenset())
+
+    def can_transition(self, from_status, to_status):
+        return to_status in self.allowed(from_status)
+
+    def _log(self, object_ids, from_status, to_status, actor, now):
+        actor_id = actor.pk if actor is not None and actor.is_authenticated else None
+        return [
+            TransitionLog(
+                model_label=self.label,
+                object_id=object_id,
+                from_status=from_status,
+                to_status=to_status,
+                actor_id=actor_id,
+                created_at=now,
+            )
+            for object_id in object_ids
+        ]
+
+    def transition(self, obj, to_status, actor=None, guard=None, **changes):
+        """
+        Move ``obj`` to ``to_status`` and apply ``changes`` in the same UPDATE.
+
+        ``guard`` adds extra filter conditions the row must still satisfy.
+        Raises ``TransitionError`` if the move is not declared and
+        ``StaleStateError`` if the row changed concurrently. ``obj`` is updated
+        in place on success.
+        """
+        from_status = getattr(obj, self.field)
+        if not self.can_transition(from_status, to_status):
+            raise TransitionError(f'Cannot move {self.label} from {from_status} to {to_status}')
+
+        now = timezone.now()
+        updates = {self.field: to_status, 'updated_at': now, **changes}
+        with transaction.atomic():
+            updated = self.model.objects.filter(
+                pk=obj.pk, **{self.field: from_status}, **(guard or {})
+            ).update(**updates)
+            if not updated:
+                raise StaleStateError(f'{self.label} {obj.pk} is no longer {from_status}')
+            TransitionLog.objects.bulk_create(self._log([obj.pk], from_status, to_status, actor, now))
+            transitioned.send(self.model, object_ids=[obj.pk], from_status=from_status, to_status=to_status)
+
+        for name, value in updates.items():
+            setattr(obj, name, value)
+        return obj
+
+    def bulk_transition(self, queryset, to_status, actor=None, sources=None):
+        """
+        Move every row of ``queryset`` that may reach ``to_status``.
+
+        ``sources`` further limits the statuses rows may move from. Rows are
+        locked and grouped by current status, then each group is moved with
+        one guarded UPDATE; rows that changed status in the meantime are
+        skipped. Returns ``(moved_ids, skipped_ids)``.
+        """
+        now = timezone.now()
+        moved, skipped = [], []
+        with transaction.atomic():
+            by_status = defaultdict(list)
+            for pk, current in queryset.select_for_update().values_list('pk', self.field):
+                by_status[current].append(pk)
+
+            logs = []
+            for from_status, ids in by_status.items():
+                allowed = self.can_transition(from_status, to_status)
+                if not allowed or (sources is not None and from_status not in sources):
+                    skipped.extend(ids)
+                    continue
+                updated = self.model.objects.filter(pk__in=ids, **{self.field: from_status}).update(
+                    **{self.field: to_status, 'updated_at': now}
+                )
+                if updated < len(ids):
+                    # Where rows aren't locked (SQLite), some may have moved on
+                    changed = set(self.model.objects.filter(
+                        pk__in=ids, **{self.field: to_status}, updated_at=now
+                    ).values_list('pk', flat=True))
+                    skipped.extend(pk for pk in ids if pk not in changed)
+                    ids = [pk for pk in ids if pk in changed]
+                if not ids:
+                    continue
+                moved.extend(ids)
+                logs.extend(self._log(ids, from_status, to_status, actor, now))
+                transitioned.send(self.model, object_ids=ids, from_status=from_status, to_status=to_status)
+            TransitionLog.objects.bulk_create(logs)
+        return moved, skipped
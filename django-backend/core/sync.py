@@ -0,0 +1,140 @@
+"""
+Helpers for delta-sync endpoints.
+"""
+import base64
+import binascii
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .models import Tombstone
+from .pagination import CreatedAtCursorPagination
+
+# Rows committed slightly after a sync started may carry an earlier
+# updated_at; handing out a watermark a little in the past re-sends them
+# rather than losing them. Clients upsert, so repeats are harmless.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def parse_since(request, param='since'):
+    """Return the ``since`` query parameter as an aware datetime, or None."""
+    value = request.query_params.get(param)
+    if not value:
+        return None
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        # Well-formed but out of range, e.g. month 13
+        since = None
+    if since is None:
+        raise ValidationError({param: 'Must be an ISO 8601 datetime'})
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def next_since(started_at):
+    """Watermark a client should send as ``since`` on its next sync."""
+    return (started_at - SYNC_OVERLAP).isoformat()
+
+
+def encode_watermark(updated_at, pk=''):
+    """Encode an ``(updated_at, pk)`` position as an opaque token."""
+    raw = json.dumps([updated_at.isoformat(), str(pk)]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_watermark(token):
+    """Decode a token from ``encode_watermark``; raises ValidationError if invalid."""
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        updated_at = parse_datetime(value)
+    except (ValueError, TypeError, binascii.Error):
+        updated_at = None
+    if updated_at is None or not isinstance(pk, str):
+        raise ValidationError({'since': 'Invalid sync watermark'})
+    if timezone.is_naive(updated_at):
+        updated_at = timezone.make_aware(updated_at)
+    return updated_at, pk
+
+
+class DeltaSyncMixin:
+    """
+    List view mixin implementing watermark-based sync.
+
+    Without ``since`` the view returns a full, cursor-paginated listing plus a
+    ``watermark``. With ``since=<watermark>`` it returns only rows changed
+    after the watermark (oldest change first, ``has_more`` when more remain),
+    the ids of rows deleted since then, and a new watermark. Clients whose
+    watermark predates the tombstone retention get ``reset: true`` and must
+    run a full sync again.
+    """
+
+    pagination_class = CreatedAtCursorPagination
+    delta_page_size = 200
+
+    def get_tombstone_owner(self):
+        return self.request.user.pk
+
+    def list(self, request, *args, **kwargs):
+        started_at = timezone.now()
+        cutoff = started_at - SYNC_OVERLAP
+        queryset = self.filter_queryset(self.get_queryset())
+
+        token = request.query_params.get('since')
+        if not token:
+            page = self.paginate_queryset(queryset)
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+            response.data['watermark'] = encode_watermark(cutoff)
+            return response
+
+        since, since_pk = decode_watermark(token)
+        if since < started_at - settings.SYNC_TOMBSTONE_RETENTION:
+            return Response({'reset': True})
+
+        changed = Q(updated_at__gt=since)
+        if since_pk:
+            try:
+                pk_value = queryset.model._meta.pk.to_python(since_pk)
+            except DjangoValidationError:
+                raise ValidationError({'since': 'Invalid sync watermark'})
+            changed |= Q(updated_at=since, pk__gt=pk_value)
+        rows = list(queryset.filter(changed).order_by('updated_at', 'pk')[:self.delta_page_size + 1])
+        has_more = len(rows) > self.delta_page_size
+        rows = rows[:self.delta_page_size]
+
+        deleted = Tombstone.objects.filter(
+            owner_id=self.get_tombstone_owner(),
+            model_label=queryset.model._meta.label_lower,
+            created_at__gt=since,
+        ).values_list('object_id', flat=True)
+
+        position = (rows[-1].updated_at, str(rows[-1].pk)) if rows else (since, since_pk)
+        if not has_more and position[0] > cutoff:
+            # Never move past the overlap window on the last page
+            position = max((since, since_pk), (cutoff, ''))
+
+        return Response({
+            'results': self.get_serializer(rows, many=True).data,
+            'deleted': [str(pk) for pk in deleted],
+            'has_more': has_more,
+            'watermark': encode_watermark(*position),
+        })
+
+
+def record_tombstone(instance, owner_id):
+    """Record that ``instance`` was deleted for the user ``owner_id``."""
+    if owner_id is None:
+        return
+    Tombstone.objects.create(
+        model_label=instance._meta.label_lower,
+        object_id=instance.pk,
+        owner_id=owner_id,
+    )
@@ -0,0 +1,318 @@
+"""
+Synthetic marketplace data for load testing.
+
+``LoadGenerator`` writes users, shops, products, riders and order history
+with ``bulk_create`` in fixed-size batches, so volumes in the millions fit
+in bounded memory. Generated users share one email domain, which is how
+``clear_load_data`` finds them again. Coordinates fall within about 13 km
+of central Nairobi.
+"""
+import math
+import secrets
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from deliveries.cards import refresh_cards
+from deliveries.models import BodaProfile, Delivery
+from orders.models import Order, OrderItem
+from products.categories import invalidate_category_tree
+from products.facets import bump_catalog_version
+from products.models import Category, Product
+from shops.models import Shop
+
+User = get_user_model()
+
+LOAD_EMAIL_DOMAIN = 'load.sokoni.test'
+LOAD_PASSWORD = 'loadtest123'
+
+NAIROBI_CENTER = (-1.286389, 36.817223)
+NAIROBI_RADIUS_DEG = 0.12
+
+HISTORY_DAYS = 180
+MIN_PRICE = 50
+MAX_PRICE = 50_000
+DELIVERY_FEE = Decimal('500')
+PLATFORM_FEE_RATE = Decimal('0.05')
+BODA_SHARE = Decimal('0.8')
+
+# Share of generated orders in each status
+ORDER_STATUS_WEIGHTS = {
+    'delivered': 0.80,
+    'cancelled': 0.06,
+    'pending': 0.04,
+    'confirmed': 0.03,
+    'preparing': 0.02,
+    'ready': 0.03,
+    'in_transit': 0.02,
+}
+DELIVERY_STATUS_FOR_ORDER = {'ready': 'pending', 'in_transit': 'in_transit', 'delivered': 'delivered'}
+
+DEFAULT_CATEGORIES = [
+    'Electronics', 'Groceries', 'Fashion', 'Home & Garden',
+    'Health & Beauty', 'Sports', 'Books', 'Food & Drinks',
+]
+WORDS = [
+    'Fresh', 'Classic', 'Premium', 'Eco', 'Smart', 'Mini', 'Pro', 'Organic', 'Local', 'Deluxe',
+    'Sukuma', 'Kikoi', 'Kiondo', 'Chapati', 'Mandazi', 'Maasai', 'Safari', 'Jua', 'Pwani', 'Rift',
+]
+NOUNS = [
+    'Phone', 'Charger', 'Rice', 'Maize Flour', 'Shirt', 'Dress', 'Sandals', 'Kettle', 'Blender', 'Soap',
+    'Lotion', 'Football', 'Novel', 'Tea', 'Coffee', 'Honey', 'Bag', 'Radio', 'Lamp', 'Mattress',
+]
+
+
+@contextmanager
+def historical_timestamps(*models):
+    """Let ``bulk_create`` keep explicit ``auto_now``/``auto_now_add`` values."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _batches(total, size):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def _money(value):
+    return Decimal(value).quantize(Decimal('0.01'))
+
+
+class LoadGenerator:
+    """Writes a synthetic marketplace in batches of ``batch_size`` rows."""
+
+    def __init__(self, batch_size=5000, seed=None, log=None):
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self.log = log or (lambda message: None)
+        self.token = secrets.token_hex(3)
+        self.password = make_password(LOAD_PASSWORD)
+        self.now = timezone.now()
+
+    def coordinates(self, count):
+        angle = self.rng.uniform(0, 2 * math.pi, count)
+        radius = NAIROBI_RADIUS_DEG * np.sqrt(self.rng.uniform(0, 1, count))
+        lat = NAIROBI_CENTER[0] + radius * np.sin(angle)
+        lng = NAIROBI_CENTER[1] + radius * np.cos(angle)
+        return [(Decimal(f'{a:.6f}'), Decimal(f'{b:.6f}')) for a, b in zip(lat, lng)]
+
+    def timestamps(self, count, days=HISTORY_DAYS):
+        offsets = self.rng.uniform(0, days * 86400, count)
+        return [self.now - timedelta(seconds=float(offset)) for offset in offsets]
+
+    def users(self, role, count):
+        """Create ``count`` users with ``role``; returns their ids."""
+        ids = []
+        for start, size in _batches(count, self.batch_size):
+            coords = self.coordinates(size)
+            users = [
+                User(
+                    email=f'{role}.{self.token}.{start + i}@{LOAD_EMAIL_DOMAIN}',
+                    username=f'{role}_{self.token}_{start + i}',
+                    password=self.password,
+                    first_name=role.title(),
+                    last_name=str(start + i),
+                    role=role,
+                    phone=f'+2547{self.rng.integers(0, 10 ** 8):08d}',
+                    latitude=lat,
+                    longitude=lng,
+                )
+                for i, (lat, lng) in enumerate(coords)
+            ]
+            User.objects.bulk_create(users)
+            ids.extend(user.id for user in users)
+            self.log(f'  {role}s: {start + size}/{count}')
+        return ids
+
+    def categories(self):
+        ids = list(Category.objects.filter(is_active=True).values_list('id', flat=True))
+        if ids:
+            return ids
+        for order, name in enumerate(DEFAULT_CATEGORIES, start=1):
+            slug = name.lower().replace(' & ', '-').replace(' ', '-')
+            Category.objects.get_or_create(slug=slug, defaults={'name': name, 'sort_order': order})
+        return list(Category.objects.values_list('id', flat=True))
+
+    def shops(self, owner_ids):
+        """Create one verified shop per seller; returns shop ids."""
+        shop_ids = []
+        for start, size in _batches(len(owner_ids), self.batch_size):
+            owners = owner_ids[start:start + size]
+            coords = self.coordinates(size)
+            shops = [
+                Shop(
+                    owner_id=owner_id,
+                    name=f'{self.rng.choice(WORDS)} {self.rng.choice(NOUNS)} Store {start + i}',
+                    address=f'Shop {start + i}, Nairobi',
+                    latitude=lat,
+                    longitude=lng,
+                    is_verified=True,
+                )
+                for i, (owner_id, (lat, lng)) in enumerate(zip(owners, coords))
+            ]
+            Shop.objects.bulk_create(shops)
+            shop_ids.extend(shop.id for shop in shops)
+        self.log(f'  shops: {len(shop_ids)}')
+        return shop_ids
+
+    def riders(self, user_ids):
+        for start, size in _batches(len(user_ids), self.batch_size):
+            coords = self.coordinates(size)
+            BodaProfile.objects.bulk_create([
+                BodaProfile(
+                    user_id=user_id,
+                    vehicle_plate=f'KM{self.rng.integers(100, 999)}{chr(65 + start % 26)}',
+                    license_number=f'DL{self.token}{start + i}',
+                    is_verified=True,
+                    current_latitude=lat,
+                    current_longitude=lng,
+                )
+                for i, (user_id, (lat, lng)) in enumerate(zip(user_ids[start:start + size], coords))
+            ])
+        return list(BodaProfile.objects.filter(user_id__in=user_ids).values_list('id', flat=True))
+
+    def products(self, shop_ids, category_ids, count):
+        """Create products spread over shops; returns ``{shop_id: [(id, name, price)]}``."""
+        catalogue = {}
+        for start, size in _batches(count, self.batch_size):
+            shops = self.rng.integers(0, len(shop_ids), size)
+            categories = self.rng.integers(0, len(category_ids), size)
+            prices = np.round(np.exp(self.rng.uniform(np.log(MIN_PRICE), np.log(MAX_PRICE), size)), -1)
+            discounted = self.rng.random(size) < 0.2
+            created = self.timestamps(size, days=HISTORY_DAYS * 2)
+            products = []
+            for i in range(size):
+                price = _money(max(prices[i], MIN_PRICE))
+                products.append(Product(
+                    shop_id=shop_ids[shops[i]],
+                    category_id=category_ids[categories[i]],
+                    name=f'{self.rng.choice(WORDS)} {self.rng.choice(NOUNS)} {start + i}',
+                    description='Synthetic product for load testing.',
+                    price=price,
+                    discount_price=_money(price * Decimal('0.85')) if discounted[i] else None,
+                    stock_quantity=int(self.rng.integers(0, 500)),
+                    images=[],
+                    is_featured=bool(self.rng.random() < 0.02),
+                    created_at=created[i],
+                    updated_at=created[i],
+                ))
+            with historical_timestamps(Product):
+                Product.objects.bulk_create(products)
+            for product in products:
+                catalogue.setdefault(product.shop_id, []).append(
+                    (product.id, product.name, product.discount_price or product.price)
+                )
+            self.log(f'  products: {start + size}/{count}')
+        return catalogue
+
+    def orders(self, customer_ids, catalogue, rider_ids, count):
+        """Create order history with items and deliveries."""
+        shops = list(catalogue)
+        # Zipf-like shop popularity so a few shops take most orders
+        weights = 1.0 / np.arange(1, len(shops) + 1) ** 0.8
+        weights /= weights.sum()
+        statuses = list(ORDER_STATUS_WEIGHTS)
+        status_p = np.array(list(ORDER_STATUS_WEIGHTS.values()))
+        status_p /= status_p.sum()
+
+        for start, size in _batches(count, self.batch_size):
+            order_shops = self.rng.choice(len(shops), size, p=weights)
+            customers = self.rng.integers(0, len(customer_ids), size)
+            order_statuses = self.rng.choice(len(statuses), size, p=status_p)
+            item_counts = self.rng.integers(1, 5, size)
+            created = self.timestamps(size)
+            coords = self.coordinates(size)
+
+            orders, items, deliveries = [], [], []
+            for i in range(size):
+                shop_id = shops[order_shops[i]]
+                products = catalogue[shop_id]
+                picks = self.rng.choice(len(products), min(item_counts[i], len(products)), replace=False)
+                quantities = self.rng.integers(1, 4, len(picks))
+                subtotal = Decimal(0)
+                order = Order(
+                    user_id=customer_ids[customers[i]],
+                    shop_id=shop_id,
+                    status=statuses[order_statuses[i]],
+                    delivery_address=f'House {start + i}, Nairobi',
+                    delivery_latitude=coords[i][0],
+                    delivery_longitude=coords[i][1],
+                    created_at=created[i],
+                    updated_at=created[i] + timedelta(hours=float(self.rng.uniform(0, 6))),
+                )
+                for pick, quantity in zip(picks, quantities):
+                    product_id, name, price = products[pick]
+                    subtotal += price * int(quantity)
+                    items.append(OrderItem(
+                        order=order,
+                        product_id=product_id,
+                        product_name=name,
+                        quantity=int(quantity),
+                        unit_price=price,
+                        total_price=price * int(quantity),
+                    ))
+                order.subtotal = subtotal
+                order.delivery_fee = DELIVERY_FEE
+                order.platform_fee = _money(subtotal * PLATFORM_FEE_RATE)
+                order.total_amount = subtotal + DELIVERY_FEE + order.platform_fee
+                orders.append(order)
+
+                delivery_status = DELIVERY_STATUS_FOR_ORDER.get(order.status)
+                if delivery_status is not None:
+                    assigned = delivery_status != 'pending' and bool(rider_ids)
+                    deliveries.append(Delivery(
+                        order=order,
+                        boda_id=rider_ids[self.rng.integers(0, len(rider_ids))] if assigned else None,
+                        status=delivery_status,
+                        pickup_address=f'Shop pickup {start + i}',
+                        delivery_address=order.delivery_address,
+                        delivery_latitude=order.delivery_latitude,
+                        delivery_longitude=order.delivery_longitude,
+                        distance_km=_money(self.rng.uniform(0.5, 15)),
+                        delivery_fee=DELIVERY_FEE,
+                        boda_earnings=DELIVERY_FEE * BODA_SHARE if assigned else 0,
+                        actual_delivery_time=order.updated_at if delivery_status == 'delivered' else None,
+                        created_at=order.created_at,
+                        updated_at=order.updated_at,
+                    ))
+
+            with transaction.atomic(), historical_timestamps(Order, Delivery):
+                Order.objects.bulk_create(orders)
+                OrderItem.objects.bulk_create(items)
+                Delivery.objects.bulk_create(deliveries)
+                refresh_cards([delivery.id for delivery in deliveries])
+            self.log(f'  orders: {start + size}/{count}')
+
+    def generate(self, users, shops, products, orders, riders):
+        self.log(f'Generating load data (run {self.token})')
+        category_ids = self.categories()
+        customer_ids = self.users('customer', users)
+        shop_ids = self.shops(self.users('seller', shops))
+        rider_ids = self.riders(self.users('boda', riders))
+        catalogue = self.products(shop_ids, category_ids, products)
+        if catalogue and customer_ids:
+            self.orders(customer_ids, catalogue, rider_ids, orders)
+        # bulk_create sends no signals, so drop the caches they would have
+        bump_catalog_version()
+        invalidate_category_tree()
+
+
+def clear_load_data():
+    """Delete every generated user; shops, products and orders cascade."""
+    return User.objects.filter(email__endswith=f'@{LOAD_EMAIL_DOMAIN}').delete()[0]
@@ -0,0 +1,269 @@
+"""
+Rate limiting and load shedding.
+
+Rate limits are token buckets: a bucket holds up to one period's worth of
+requests and refills continuously at the configured rate, so a client may
+burst up to the limit but sustains no more than the rate. Three DRF
+throttles share one bucket store:
+
+- ``AnonBucketThrottle``: per client IP for anonymous requests (``anon``).
+- ``UserBucketThrottle``: per user for authenticated requests (``user``).
+- ``ScopedBucketThrottle``: per user or IP for views with a
+  ``throttle_scope`` class attribute (``login``, ``catalogue``, ...).
+  Catalogue reads with a search term count against ``search`` instead.
+
+Buckets live in Redis when the default cache is Redis, updated atomically
+by a Lua script so every worker shares them. Otherwise, or when Redis is
+unreachable, they live in this process behind a lock.
+
+``LoadSheddingMiddleware`` protects the endpoints that matter when the
+process is overloaded. Views declare ``shed_priority`` ('critical',
+'normal' or 'low'; default 'normal'). Past ``SHED_MAX_IN_FLIGHT``
+concurrent requests or ``SHED_LATENCY_SECONDS`` recent average latency,
+low-priority requests are refused with 503; past twice either threshold,
+normal ones are too. Critical requests (checkout, payment callbacks,
+delivery status) are never shed. Refusals carry ``Retry-After``.
+"""
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.redis import RedisCache
+from django.http import JsonResponse
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_LOCAL_BUCKETS = 100_000
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+# Seconds between warnings while Redis is unreachable
+STORE_WARNING_INTERVAL = 60
+
+PRIORITIES = {'low': 1, 'normal': 2, 'critical': 3}
+# Weight of the newest request in the average latency
+LATENCY_SMOOTHING = 0.2
+# An average not updated for this long is stale (nothing is being admitted)
+LATENCY_WINDOW = 10.0
+
+THROTTLED = metrics.REGISTRY.register(metrics.Counter(
+    'sokoni_throttled', 'Requests refused by a rate limit', ('scope',)
+))
+SHED = metrics.REGISTRY.register(metrics.Counter(
+    'sokoni_shed', 'Requests refused by load shedding', ('priority',)
+))
+
+# Refill the bucket for the time elapsed, then take ``cost`` tokens if there
+# are enough. Returns {allowed, seconds until enough tokens}.
+TOKEN_BUCKET_SCRIPT = """
+local rate, capacity, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = tonumber(state[1]) or capacity
+local stamp = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - stamp) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'stamp', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+if allowed == 1 then
+    return {1, '0'}
+end
+return {0, tostring((cost - tokens) / rate)}
+"""
+
+
+def parse_rate(rate):
+    """``'60/min'`` -> ``(refill per second, capacity)``."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count / PERIODS[period[0]], count
+
+
+class LocalBuckets:
+    """Token buckets in this process; the least recently used are evicted."""
+
+    def __init__(self, max_buckets=MAX_LOCAL_BUCKETS):
+        self.max_buckets = max_buckets
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, rate, capacity, cost=1):
+        now = time.monotonic()
+        with self.lock:
+            tokens, stamp = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - stamp) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+
+class RedisBuckets:
+    """Token buckets in Redis, shared by every worker."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.script = backend._cache.get_client(write=True).register_script(TOKEN_BUCKET_SCRIPT)
+
+    def take(self, key, rate, capacity, cost=1):
+        allowed, wait = self.script(keys=[self.backend.make_key(key)], args=[rate, capacity, cost])
+        return bool(allowed), float(wait)
+
+
+_local = LocalBuckets()
+_shared = None
+_last_warning = 0.0
+
+
+def take_token(key, rate, capacity, cost=1):
+    """Take ``cost`` tokens from bucket ``key``; returns ``(allowed, wait seconds)``."""
+    global _shared, _last_warning
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    if isinstance(backend, RedisCache):
+        try:
+            if _shared is None:
+                _shared = RedisBuckets(backend)
+            return _shared.take(key, rate, capacity, cost)
+        except Exception as exc:
+            if time.monotonic() - _last_warning >= STORE_WARNING_INTERVAL:
+                _last_warning = time.monotonic()
+                logger.warning('Rate limit store unavailable, limiting per process: %s', exc)
+    return _local.take(key, rate, capacity, cost)
+
+
+class BucketThrottle(BaseThrottle):
+    """DRF throttle drawing one token per request from a per-client bucket."""
+
+    scope = None
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_client_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        if not settings.THROTTLE_ENABLED:
+            return True
+        scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+        client = self.get_client_key(request)
+        if rate is None or client is None:
+            return True
+        allowed, self.wait_seconds = take_token(f'throttle:{scope}:{client}', *parse_rate(rate))
+        if not allowed:
+            THROTTLED.inc((scope,))
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AnonBucketThrottle(BucketThrottle):
+    scope = 'anon'
+
+    def get_client_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return None
+        return f'ip:{self.get_ident(request)}'
+
+
+class UserBucketThrottle(BucketThrottle):
+    scope = 'user'
+
+    def get_client_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return None
+
+
+class ScopedBucketThrottle(BucketThrottle):
+    """Limits views by their ``throttle_scope`` attribute."""
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope == 'catalogue' and request.query_params.get('search'):
+            return 'search'
+        return scope
+
+
+class LoadShedder:
+    """Concurrency and recent latency of this process's requests."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.latency = 0.0
+        self.updated = 0.0
+
+    def started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def finished(self, duration=None):
+        with self.lock:
+            self.in_flight -= 1
+            if duration is not None:
+                self.latency += LATENCY_SMOOTHING * (duration - self.latency)
+                self.updated = time.monotonic()
+
+    def level(self):
+        """0 when healthy, 1 to shed low priority, 2 to shed normal priority too."""
+        latency = self.latency if time.monotonic() - self.updated < LATENCY_WINDOW else 0.0
+        # The current request is counted in in_flight
+        pressure = max(
+            (self.in_flight - 1) / settings.SHED_MAX_IN_FLIGHT,
+            latency / settings.SHED_LATENCY_SECONDS,
+        )
+        return min(int(pressure), 2)
+
+
+SHEDDER = LoadShedder()
+
+
+class LoadSheddingMiddleware:
+    """Refuse lower-priority requests while the process is overloaded."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._shed = False
+        SHEDDER.started()
+        start = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            SHEDDER.finished(None if request._shed else time.perf_counter() - start)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.LOAD_SHEDDING_ENABLED:
+            return None
+        view = getattr(view_func, 'view_class', view_func)
+        priority = getattr(view, 'shed_priority', 'normal')
+        if PRIORITIES[priority] > SHEDDER.level():
+            return None
+        request._shed = True
+        SHED.inc((priority,))
+        response = JsonResponse({'error': 'The service is busy; please retry shortly'}, status=503)
+        response['Retry-After'] = str(math.ceil(settings.SHED_RETRY_AFTER_SECONDS))
+        return response
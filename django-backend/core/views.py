@@ -0,0 +1,38 @@
+"""
+Views for platform infrastructure.
+"""
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .metrics import REGISTRY
+
+
+def metrics_allowed(request):
+    """
+    Whether ``request`` may scrape metrics.
+
+    With ``METRICS_TOKEN`` set the scraper must send it as a bearer token.
+    Otherwise the client address must be in ``METRICS_ALLOWED_IPS``. It is
+    ``REMOTE_ADDR`` unless ``NUM_PROXIES`` names a count of trusted proxies,
+    in which case it is read from ``X-Forwarded-For`` as rate limiting does;
+    the header is never trusted on its own.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'.encode('utf-8')
+        return hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', '').encode('utf-8'), expected)
+    if api_settings.NUM_PROXIES:
+        client = BaseThrottle().get_ident(request)
+    else:
+        client = request.META.get('REMOTE_ADDR')
+    return client in settings.METRICS_ALLOWED_IPS
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, reachable only by allowed scrapers."""
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
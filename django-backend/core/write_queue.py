@@ -0,0 +1,130 @@
+"""
+Write serialization for hot endpoints on SQLite.
+
+SQLite allows one writer at a time. When a burst of checkouts hits a
+single-box deployment, writers that find the database locked spin in
+SQLite's busy handler and the unlucky ones time out with "database is
+locked". ``serialized_write`` queues such handlers instead: a thread lock
+within the process and an ``flock`` on a file next to the database across
+processes, so each writer starts only when the previous one has finished.
+Catalogue reads are unaffected; under WAL they never wait for writers.
+
+On other databases the decorator does nothing.
+"""
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: serialize within the process only
+    fcntl = None
+
+POLL_INTERVAL = 0.005
+
+_thread_lock = threading.Lock()
+
+WRITE_QUEUE_SECONDS = metrics.REGISTRY.register(metrics.Histogram(
+    'sokoni_sqlite_write_queue_seconds', 'Time a write waited for its turn',
+    ('endpoint',), metrics.SECONDS_BUCKETS,
+))
+
+
+class WriteQueueTimeout(Exception):
+    """Raised when a write waited longer than SQLITE_WRITE_QUEUE_TIMEOUT."""
+
+
+def _lock_path():
+    return f"{connections[DEFAULT_DB_ALIAS].settings_dict['NAME']}.write-lock"
+
+
+class _FileLock:
+    """Exclusive ``flock`` held by at most one process at a time."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def acquire(self, deadline):
+        self.file = open(self.path, 'a')
+        while True:
+            try:
+                fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    self.file.close()
+                    raise WriteQueueTimeout()
+                time.sleep(POLL_INTERVAL)
+
+    def release(self):
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+
+def _enabled():
+    connection = connections[DEFAULT_DB_ALIAS]
+    return (
+        settings.SQLITE_SERIALIZE_WRITES
+        and connection.vendor == 'sqlite'
+        and not connection.is_in_memory_db()
+    )
+
+
+class write_turn:
+    """Context manager holding the database-wide write turn."""
+
+    def __init__(self, endpoint='other'):
+        self.endpoint = endpoint
+        self.file_lock = None
+
+    def __enter__(self):
+        start = time.monotonic()
+        deadline = start + settings.SQLITE_WRITE_QUEUE_TIMEOUT
+        if not _thread_lock.acquire(timeout=settings.SQLITE_WRITE_QUEUE_TIMEOUT):
+            raise WriteQueueTimeout()
+        if fcntl is not None:
+            try:
+                self.file_lock = _FileLock(_lock_path())
+                self.file_lock.acquire(deadline)
+            except BaseException:
+                _thread_lock.release()
+                raise
+        WRITE_QUEUE_SECONDS.observe((self.endpoint,), time.monotonic() - start)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.file_lock is not None:
+            self.file_lock.release()
+        _thread_lock.release()
+
+
+def serialized_write(view_method):
+    """
+    Run an APIView handler only while holding the SQLite write turn.
+
+    A request that waits longer than ``SQLITE_WRITE_QUEUE_TIMEOUT`` seconds
+    is answered with 503 and ``Retry-After``.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if not _enabled():
+            return view_method(self, request, *args, **kwargs)
+        try:
+            with write_turn(type(self).__name__):
+                return view_method(self, request, *args, **kwargs)
+        except WriteQueueTimeout:
+            response = Response(
+                {'error': 'The service is busy; please retry shortly'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+            response['Retry-After'] = '1'
+            return response
+    return wrapper
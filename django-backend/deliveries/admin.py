@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import BodaProfile, Delivery
+from .models import BodaProfile, Delivery, PricingRule
 
 
 @admin.register(BodaProfile)
@@ -14,3 +14,9 @@ class DeliveryAdmin(admin.ModelAdmin):
     list_display = ('order', 'boda', 'status', 'delivery_fee', 'boda_earnings', 'created_at')
     list_filter = ('status', 'created_at')
     search_fields = ('order__id', 'boda__user__email')
+
+
+@admin.register(PricingRule)
+class PricingRuleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'is_active', 'base_fee', 'per_km_fee', 'supply_target', 'boda_share', 'updated_at')
+    list_filter = ('is_active',)
@@ -0,0 +1,163 @@
+"""
+Delivery cards: the denormalized rows rider feeds are served from.
+
+Cards are rewritten whenever their delivery is saved or changes status, and
+when the customer edits their name or phone. The open-delivery feed is
+cached as ready-to-send rows under a version that every card write bumps,
+so a rider poll normally costs no query at all.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from .geo import geohash
+from .models import Delivery, DeliveryCard
+from .routing import get_router
+
+FEED_VERSION_KEY = 'deliveries:feed_version'
+FEED_TIMEOUT = 60
+
+# Prefix length matched when a rider asks for nearby deliveries (~20 km)
+NEAR_PRECISION = 4
+COMPACT_FIELDS = ['id', 'order_number', 'pickup', 'dropoff', 'distance_km', 'fee', 'lat', 'lng']
+COMPACT_ADDRESS_LENGTH = 32
+COMPACT_LIMIT = 10
+
+CARD_FIELDS = [
+    'order_id', 'boda_id', 'customer_id', 'status', 'order_number', 'pickup_address',
+    'pickup_latitude', 'pickup_longitude', 'delivery_address', 'delivery_latitude',
+    'delivery_longitude', 'geocell', 'distance_km', 'estimated_time', 'delivery_fee',
+    'boda_earnings', 'customer_name', 'customer_phone', 'actual_pickup_time',
+    'actual_delivery_time', 'updated_at',
+]
+
+
+def feed_version():
+    return cache.get_or_set(FEED_VERSION_KEY, 1, None)
+
+
+def bump_feed_version():
+    try:
+        cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        cache.set(FEED_VERSION_KEY, 1, None)
+
+
+def order_number(order_id):
+    return str(order_id)[:8].upper()
+
+
+def build_card(delivery):
+    """Card for a delivery fetched with ``select_related('order__user')``."""
+    latitude = delivery.pickup_latitude if delivery.pickup_latitude is not None else delivery.delivery_latitude
+    longitude = delivery.pickup_longitude if delivery.pickup_longitude is not None else delivery.delivery_longitude
+    customer = delivery.order.user
+    return DeliveryCard(
+        delivery_id=delivery.id,
+        order_id=delivery.order_id,
+        boda_id=delivery.boda_id,
+        customer_id=customer.pk,
+        status=delivery.status,
+        order_number=order_number(delivery.order_id),
+        pickup_address=delivery.pickup_address,
+        pickup_latitude=delivery.pickup_latitude,
+        pickup_longitude=delivery.pickup_longitude,
+        delivery_address=delivery.delivery_address,
+        delivery_latitude=delivery.delivery_latitude,
+        delivery_longitude=delivery.delivery_longitude,
+        geocell=geohash(latitude, longitude) if latitude is not None and longitude is not None else None,
+        distance_km=delivery.distance_km,
+        estimated_time=delivery.estimated_time,
+        delivery_fee=delivery.delivery_fee,
+        boda_earnings=delivery.boda_earnings,
+        customer_name=customer.full_name,
+        customer_phone=customer.phone,
+        actual_pickup_time=delivery.actual_pickup_time,
+        actual_delivery_time=delivery.actual_delivery_time,
+        updated_at=delivery.updated_at,
+    )
+
+
+def refresh_cards(delivery_ids):
+    """Rewrite the cards of the given deliveries from their current rows."""
+    deliveries = Delivery.objects.filter(id__in=delivery_ids).select_related('order__user')
+    cards = [build_card(delivery) for delivery in deliveries]
+    if cards:
+        DeliveryCard.objects.bulk_create(
+            cards, update_conflicts=True, unique_fields=['delivery'], update_fields=CARD_FIELDS,
+        )
+    transaction.on_commit(bump_feed_version)
+    return len(cards)
+
+
+def refresh_customer(user):
+    """Copy a customer's current name and phone onto their cards."""
+    updated = DeliveryCard.objects.filter(customer_id=user.pk).update(
+        customer_name=user.full_name, customer_phone=user.phone,
+    )
+    if updated:
+        transaction.on_commit(bump_feed_version)
+
+
+def rebuild_cards(batch_size=1000):
+    """Recreate every card; returns how many were written."""
+    written = 0
+    ids = Delivery.objects.order_by('id').values_list('id', flat=True)
+    last = None
+    while True:
+        batch = list((ids.filter(id__gt=last) if last else ids)[:batch_size])
+        if not batch:
+            return written
+        with transaction.atomic():
+            written += refresh_cards(batch)
+        last = batch[-1]
+
+
+def get_available_feed():
+    """Open deliveries as API rows, newest first, cached until a card changes."""
+    from .serializers import DeliveryFeedSerializer
+
+    key = f'deliveries:feed:{feed_version()}'
+    feed = cache.get(key)
+    if feed is None:
+        cards = DeliveryCard.objects.filter(status='pending', boda_id__isnull=True).order_by('-updated_at')
+        feed = DeliveryFeedSerializer(cards, many=True).data
+        cache.set(key, feed, FEED_TIMEOUT)
+    return feed
+
+
+def near(feed, latitude, longitude):
+    """
+    Rows whose geocell shares the rider's ~20 km neighbourhood, closest first.
+
+    Each row gains ``rider_distance_km``, the routed distance from the rider
+    to the pickup point, measured for the whole batch at once.
+    """
+    prefix = geohash(latitude, longitude, NEAR_PRECISION)
+    rows = [row for row in feed if (row['geocell'] or '').startswith(prefix)]
+    if not rows:
+        return rows
+    distances, _ = get_router().route_many(
+        latitude, longitude,
+        [float(row['latitude']) for row in rows], [float(row['longitude']) for row in rows],
+    )
+    rows = [{**row, 'rider_distance_km': round(float(distance), 2)} for row, distance in zip(rows, distances)]
+    rows.sort(key=lambda row: row['rider_distance_km'])
+    return rows
+
+
+def _shorten(address):
+    if len(address) <= COMPACT_ADDRESS_LENGTH:
+        return address
+    return address[:COMPACT_ADDRESS_LENGTH - 1].rstrip() + '…'
+
+
+def compact(feed, limit=COMPACT_LIMIT):
+    """Column-oriented form of the feed, small enough for one packet."""
+    rows = []
+    for row in feed[:limit]:
+        rows.append([
+            row['id'], row['order_number'], _shorten(row['pickup_address']),
+            _shorten(row['delivery_address']), row['distance_km'], row['delivery_fee'],
+            row['latitude'], row['longitude'],
+        ])
+    return {'fields': COMPACT_FIELDS, 'rows': rows, 'total': len(feed)}
@@ -0,0 +1,32 @@
+"""
+Management command to build the routing graph from an OpenStreetMap extract.
+Run with: python manage.py build_road_graph tanzania-latest.osm.bz2
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from deliveries.routing import RoadGraph
+
+
+class Command(BaseCommand):
+    help = 'Convert an OSM XML extract into the compact road graph used by ROUTING_MODE=graph'
+
+    def add_arguments(self, parser):
+        parser.add_argument('extract', help='Path to a .osm or .osm.bz2 file')
+        parser.add_argument('--output', default=settings.ROUTING_GRAPH_PATH, help='Where to write the graph')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            graph = RoadGraph.from_osm(options['extract'])
+        except (OSError, SyntaxError) as exc:
+            raise CommandError(f"Could not read {options['extract']}: {exc}")
+        if not graph.edge_count:
+            raise CommandError('The extract contains no routable roads')
+        graph.save(options['output'])
+        self.stdout.write(
+            f"Wrote {graph.node_count} nodes and {graph.edge_count} edges to {options['output']} "
+            f'in {time.monotonic() - started:.1f}s'
+        )
@@ -0,0 +1,18 @@
+"""
+Management command to rebuild every delivery card from the delivery tables.
+Run with: python manage.py rebuild_delivery_cards
+"""
+from django.core.management.base import BaseCommand
+
+from deliveries.cards import rebuild_cards
+
+
+class Command(BaseCommand):
+    help = 'Recreate the denormalized delivery cards served to rider feeds'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Deliveries per transaction')
+
+    def handle(self, *args, **options):
+        written = rebuild_cards(options['batch_size'])
+        self.stdout.write(f'Rebuilt {written} delivery card(s)')
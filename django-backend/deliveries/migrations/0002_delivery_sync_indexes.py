@@ -0,0 +1,22 @@
+# Generated migration for delivery sync indexes
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0001_initial'),
+        ('orders', '0003_order_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='delivery',
+            index=models.Index(fields=['boda', '-created_at'], name='deliveries_boda_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='delivery',
+            index=models.Index(fields=['boda', 'updated_at'], name='deliveries_boda_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated migration for delivery cards
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from deliveries.geo import geohash
+
+
+def build_cards(apps, schema_editor):
+    Delivery = apps.get_model('deliveries', 'Delivery')
+    DeliveryCard = apps.get_model('deliveries', 'DeliveryCard')
+    cards = []
+    for delivery in Delivery.objects.select_related('order__user').iterator(chunk_size=1000):
+        user = delivery.order.user
+        latitude = delivery.pickup_latitude if delivery.pickup_latitude is not None else delivery.delivery_latitude
+        longitude = delivery.pickup_longitude if delivery.pickup_longitude is not None else delivery.delivery_longitude
+        cards.append(DeliveryCard(
+            delivery_id=delivery.id,
+            order_id=delivery.order_id,
+            boda_id=delivery.boda_id,
+            customer_id=user.pk,
+            status=delivery.status,
+            order_number=str(delivery.order_id)[:8].upper(),
+            pickup_address=delivery.pickup_address,
+            pickup_latitude=delivery.pickup_latitude,
+            pickup_longitude=delivery.pickup_longitude,
+            delivery_address=delivery.delivery_address,
+            delivery_latitude=delivery.delivery_latitude,
+            delivery_longitude=delivery.delivery_longitude,
+            geocell=geohash(latitude, longitude) if latitude is not None and longitude is not None else None,
+            distance_km=delivery.distance_km,
+            estimated_time=delivery.estimated_time,
+            delivery_fee=delivery.delivery_fee,
+            boda_earnings=delivery.boda_earnings,
+            customer_name=f'{user.first_name} {user.last_name}'.strip() or user.username,
+            customer_phone=user.phone,
+            actual_pickup_time=delivery.actual_pickup_time,
+            actual_delivery_time=delivery.actual_delivery_time,
+            updated_at=delivery.updated_at,
+        ))
+        if len(cards) >= 1000:
+            DeliveryCard.objects.bulk_create(cards)
+            cards = []
+    DeliveryCard.objects.bulk_create(cards)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0002_delivery_sync_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryCard',
+            fields=[
+                ('delivery', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='deliveries.delivery')),
+                ('order_id', models.UUIDField()),
+                ('boda_id', models.UUIDField(blank=True, null=True)),
+                ('customer_id', models.UUIDField(blank=True, null=True)),
+                ('status', models.CharField(max_length=20)),
+                ('order_number', models.CharField(max_length=8)),
+                ('pickup_address', models.TextField()),
+                ('pickup_latitude', models.DecimalField(blank=True, decimal_places=8, max_digits=10, null=True)),
+                ('pickup_longitude', models.DecimalField(blank=True, decimal_places=8, max_digits=11, null=True)),
+                ('delivery_address', models.TextField()),
+                ('delivery_latitude', models.DecimalField(blank=True, decimal_places=8, max_digits=10, null=True)),
+                ('delivery_longitude', models.DecimalField(blank=True, decimal_places=8, max_digits=11, null=True)),
+                ('geocell', models.CharField(blank=True, max_length=12, null=True)),
+                ('distance_km', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True)),
+                ('estimated_time', models.IntegerField(blank=True, null=True)),
+                ('delivery_fee', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('boda_earnings', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('customer_name', models.CharField(blank=True, max_length=150)),
+                ('customer_phone', models.CharField(blank=True, max_length=20, null=True)),
+                ('actual_pickup_time', models.DateTimeField(blank=True, null=True)),
+                ('actual_delivery_time', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'delivery_cards',
+                'indexes': [models.Index(fields=['status', 'geocell'], name='delivery_cards_feed_idx'), models.Index(fields=['boda_id', 'status'], name='delivery_cards_boda_idx'), models.Index(fields=['customer_id'], name='delivery_cards_customer_idx')],
+            },
+        ),
+        migrations.RunPython(build_cards, migrations.RunPython.noop),
+    ]
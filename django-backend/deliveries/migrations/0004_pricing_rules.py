@@ -0,0 +1,36 @@
+# Generated migration for delivery pricing rules
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0003_delivery_cards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('is_active', models.BooleanField(default=False)),
+                ('base_fee', models.DecimalField(decimal_places=2, default=300, max_digits=10)),
+                ('per_km_fee', models.DecimalField(decimal_places=2, default=150, max_digits=10)),
+                ('min_fee', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('max_fee', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('flat_fee', models.DecimalField(decimal_places=2, default=500, help_text='Charged when the shop or drop-off point has no coordinates', max_digits=10)),
+                ('surge_schedule', models.JSONField(blank=True, default=list, help_text='[[start_hour, end_hour, multiplier], ...] in local time, end exclusive')),
+                ('supply_target', models.PositiveSmallIntegerField(default=0, help_text='Available riders near the pickup below which supply surge applies (0 disables)')),
+                ('max_supply_surge', models.DecimalField(decimal_places=2, default=1.5, max_digits=4)),
+                ('platform_fee_rate', models.DecimalField(decimal_places=4, default=0.05, max_digits=5)),
+                ('boda_share', models.DecimalField(decimal_places=4, default=0.8, help_text='Share of the delivery fee paid to the rider', max_digits=5)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'pricing_rules',
+                'ordering': ['-updated_at'],
+            },
+        ),
+    ]
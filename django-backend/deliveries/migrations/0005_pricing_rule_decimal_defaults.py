@@ -0,0 +1,24 @@
+# Generated migration for exact decimal defaults on pricing rules
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deliveries', '0004_pricing_rules'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pricingrule',
+            name='boda_share',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0.8'), help_text='Share of the delivery fee paid to the rider', max_digits=5),
+        ),
+        migrations.AlterField(
+            model_name='pricingrule',
+            name='platform_fee_rate',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0.05'), max_digits=5),
+        ),
+    ]
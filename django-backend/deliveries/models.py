@@ -1,6 +1,9 @@
 """
 Models for deliveries and boda riders.
 """
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.conf import settings
 import uuid
@@ -65,6 +68,109 @@ class Delivery(models.Model):
     class Meta:
         db_table = 'deliveries'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['boda', '-created_at'], name='deliveries_boda_created_idx'),
+            models.Index(fields=['boda', 'updated_at'], name='deliveries_boda_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Delivery for Order {self.order.id}"
+
+
+class DeliveryCard(models.Model):
+    """Rider-facing copy of a delivery, kept in step by ``deliveries.cards``.
+
+    Holds everything the rider feeds show, including the order number and
+    customer contact, so they are served from this one table without joins.
+    """
+
+    delivery = models.OneToOneField(Delivery, on_delete=models.CASCADE, primary_key=True, related_name='card')
+    order_id = models.UUIDField()
+    boda_id = models.UUIDField(blank=True, null=True)
+    customer_id = models.UUIDField(blank=True, null=True)
+    status = models.CharField(max_length=20)
+    order_number = models.CharField(max_length=8)
+    pickup_address = models.TextField()
+    pickup_latitude = models.DecimalField(max_digits=10, decimal_places=8, blank=True, null=True)
+    pickup_longitude = models.DecimalField(max_digits=11, decimal_places=8, blank=True, null=True)
+    delivery_address = models.TextField()
+    delivery_latitude = models.DecimalField(max_digits=10, decimal_places=8, blank=True, null=True)
+    delivery_longitude = models.DecimalField(max_digits=11, decimal_places=8, blank=True, null=True)
+    geocell = models.CharField(max_length=12, blank=True, null=True)
+    distance_km = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
+    estimated_time = models.IntegerField(blank=True, null=True)
+    delivery_fee = models.DecimalField(max_digits=10, decimal_places=2)
+    boda_earnings = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    customer_name = models.CharField(max_length=150, blank=True)
+    customer_phone = models.CharField(max_length=20, blank=True, null=True)
+    actual_pickup_time = models.DateTimeField(blank=True, null=True)
+    actual_delivery_time = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'delivery_cards'
+        indexes = [
+            models.Index(fields=['status', 'geocell'], name='delivery_cards_feed_idx'),
+            models.Index(fields=['boda_id', 'status'], name='delivery_cards_boda_idx'),
+            models.Index(fields=['customer_id'], name='delivery_cards_customer_idx'),
+        ]
+
+    def __str__(self):
+        return f"Card for delivery {self.delivery_id} ({self.status})"
+
+
+def validate_surge_schedule(schedule):
+    """Raise ValidationError unless ``schedule`` is ``[[start_hour, end_hour, multiplier], ...]``."""
+    if not isinstance(schedule, list):
+        raise ValidationError('Surge schedule must be a list of [start_hour, end_hour, multiplier]')
+    for entry in schedule:
+        if not isinstance(entry, list) or len(entry) != 3:
+            raise ValidationError(f'Surge window {entry!r} must be [start_hour, end_hour, multiplier]')
+        start, end, multiplier = entry
+        if not all(type(hour) is int and 0 <= hour <= 24 for hour in (start, end)):
+            raise ValidationError(f'Surge window {entry!r} hours must be whole numbers from 0 to 24')
+        if start == end:
+            raise ValidationError(f'Surge window {entry!r} is empty')
+        if isinstance(multiplier, bool) or not isinstance(multiplier, (int, float)) or not 0 < multiplier <= 10:
+            raise ValidationError(f'Surge window {entry!r} multiplier must be a number above 0 and at most 10')
+
+
+class PricingRule(models.Model):
+    """Delivery tariff. The newest active rule prices every quote (``deliveries.pricing``)."""
+
+    name = models.CharField(max_length=100)
+    is_active = models.BooleanField(default=False)
+    base_fee = models.DecimalField(max_digits=10, decimal_places=2, default=300)
+    per_km_fee = models.DecimalField(max_digits=10, decimal_places=2, default=150)
+    min_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    max_fee = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    flat_fee = models.DecimalField(
+        max_digits=10, decimal_places=2, default=500,
+        help_text='Charged when the shop or drop-off point has no coordinates'
+    )
+    surge_schedule = models.JSONField(
+        default=list, blank=True,
+        help_text='[[start_hour, end_hour, multiplier], ...] in local time, end exclusive'
+    )
+    supply_target = models.PositiveSmallIntegerField(
+        default=0, help_text='Available riders near the pickup below which supply surge applies (0 disables)'
+    )
+    max_supply_surge = models.DecimalField(max_digits=4, decimal_places=2, default=1.5)
+    platform_fee_rate = models.DecimalField(max_digits=5, decimal_places=4, default=Decimal('0.05'))
+    boda_share = models.DecimalField(
+        max_digits=5, decimal_places=4, default=Decimal('0.8'), help_text='Share of the delivery fee paid to the rider'
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'pricing_rules'
+        ordering = ['-updated_at']
+
+    def __str__(self):
+        return f"{self.name}{' (active)' if self.is_active else ''}"
+
+    def clean(self):
+        try:
+            validate_surge_schedule(self.surge_schedule)
+        except ValidationError as exc:
+            raise ValidationError({'surge_schedule': exc.messages})
@@ -0,0 +1,195 @@
+"""
+Delivery pricing.
+
+A delivery fee is ``base_fee + per_km_fee * km`` over the routed distance
+from the shop to the drop-off point, multiplied by the time-of-day surge
+and by a supply surge when few riders are available near the pickup, then
+clamped to ``[min_fee, max_fee]`` and rounded to whole shillings. When
+either end has no coordinates the rule's flat fee applies.
+
+The tariff comes from the newest active ``PricingRule``, or from settings
+when there is none. It is held in process and read again from the
+database every ``PRICING_RELOAD_SECONDS``, so an edited rule reaches every
+worker within that interval whatever the cache backend, at one single-row
+query per interval rather than per quote. The worker that saves a rule
+reloads it at once. Rider supply is counted per geocell from one query every
+``RIDER_SUPPLY_SECONDS``.
+"""
+import logging
+import threading
+import time
+from collections import Counter, namedtuple
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from .geo import geohash
+from .models import BodaProfile, PricingRule, validate_surge_schedule
+from .routing import get_router
+
+logger = logging.getLogger(__name__)
+
+# Riders count as near a pickup in the same ~5 km geocell
+SUPPLY_PRECISION = 5
+
+# Fees are rounded to whole shillings
+FEE_STEP = Decimal('1')
+CENTS = Decimal('0.01')
+
+Tariff = namedtuple('Tariff', [
+    'base_fee', 'per_km_fee', 'min_fee', 'max_fee', 'flat_fee', 'surge_schedule',
+    'supply_target', 'max_supply_surge', 'platform_fee_rate', 'boda_share',
+])
+
+Quote = namedtuple('Quote', ['delivery_fee', 'platform_fee', 'distance_km', 'minutes', 'surge'])
+
+_lock = threading.Lock()
+_tariff = None
+_tariff_expires = 0.0
+_supply = None
+_supply_loaded = 0.0
+
+
+def default_tariff():
+    return Tariff(
+        base_fee=float(settings.DELIVERY_BASE_FEE),
+        per_km_fee=float(settings.DELIVERY_FEE_PER_KM),
+        min_fee=0.0,
+        max_fee=None,
+        flat_fee=Decimal(settings.DELIVERY_FLAT_FEE).quantize(CENTS),
+        surge_schedule=(),
+        supply_target=0,
+        max_supply_surge=1.0,
+        platform_fee_rate=Decimal('0.05'),
+        boda_share=Decimal('0.8'),
+    )
+
+
+def _surge_schedule(rule):
+    try:
+        validate_surge_schedule(rule.surge_schedule)
+    except ValidationError as exc:
+        # Saved around the admin's validation; price without time surge
+        # rather than fail every quote
+        logger.error('Ignoring invalid surge schedule on pricing rule %s: %s', rule.pk, exc.messages[0])
+        return ()
+    return tuple((start, end, float(multiplier)) for start, end, multiplier in rule.surge_schedule)
+
+
+def _tariff_from_rule(rule):
+    return Tariff(
+        base_fee=float(rule.base_fee),
+        per_km_fee=float(rule.per_km_fee),
+        min_fee=float(rule.min_fee),
+        max_fee=float(rule.max_fee) if rule.max_fee is not None else None,
+        flat_fee=rule.flat_fee,
+        surge_schedule=_surge_schedule(rule),
+        supply_target=rule.supply_target,
+        max_supply_surge=float(rule.max_supply_surge),
+        platform_fee_rate=rule.platform_fee_rate,
+        boda_share=rule.boda_share,
+    )
+
+
+def current_tariff():
+    """The active tariff, read from the database at most every ``PRICING_RELOAD_SECONDS``."""
+    global _tariff, _tariff_expires
+    now = time.monotonic()
+    if _tariff is not None and now < _tariff_expires:
+        return _tariff
+    with _lock:
+        if _tariff is None or now >= _tariff_expires:
+            rule = PricingRule.objects.filter(is_active=True).first()
+            _tariff = _tariff_from_rule(rule) if rule is not None else default_tariff()
+            _tariff_expires = now + settings.PRICING_RELOAD_SECONDS
+    return _tariff
+
+
+def expire_tariff():
+    """Reload the tariff on this worker's next quote."""
+    global _tariff_expires
+    _tariff_expires = 0.0
+
+
+def reset_pricing():
+    """Forget the in-process tariff and rider supply."""
+    global _tariff, _supply
+    _tariff = _supply = None
+
+
+def rider_supply():
+    """Available verified riders per geocell, recounted every ``RIDER_SUPPLY_SECONDS``."""
+    global _supply, _supply_loaded
+    now = time.monotonic()
+    if _supply is None or now - _supply_loaded >= settings.RIDER_SUPPLY_SECONDS:
+        positions = BodaProfile.objects.filter(
+            is_available=True, is_verified=True, current_latitude__isnull=False, current_longitude__isnull=False,
+        ).values_list('current_latitude', 'current_longitude')
+        _supply = Counter(geohash(latitude, longitude, SUPPLY_PRECISION) for latitude, longitude in positions)
+        _supply_loaded = now
+    return _supply
+
+
+def time_surge(tariff, hour):
+    """Multiplier of the schedule window containing ``hour``; windows may wrap midnight."""
+    for start, end, multiplier in tariff.surge_schedule:
+        if start <= hour < end or (end < start and (hour >= start or hour < end)):
+            return multiplier
+    return 1.0
+
+
+def quote_deliveries(shops, latitude, longitude, subtotals):
+    """
+    Price delivering to one drop-off point from each of ``shops``.
+
+    ``subtotals`` are the order subtotals, for the platform fee. Distances
+    and fees for all shops are computed together; returns one ``Quote``
+    per shop, in order.
+    """
+    tariff = current_tariff()
+    platform_fees = [
+        (Decimal(subtotal) * tariff.platform_fee_rate).quantize(CENTS, rounding=ROUND_HALF_UP)
+        for subtotal in subtotals
+    ]
+    located = [
+        index for index, shop in enumerate(shops)
+        if shop.latitude is not None and shop.longitude is not None
+    ]
+    quotes = [Quote(tariff.flat_fee, fee, None, None, 1.0) for fee in platform_fees]
+    if latitude is None or longitude is None or not located:
+        return quotes
+
+    shop_lats = [float(shops[index].latitude) for index in located]
+    shop_lngs = [float(shops[index].longitude) for index in located]
+    distances, minutes = get_router().route_many(shop_lats, shop_lngs, float(latitude), float(longitude))
+
+    surge = np.ones(len(located))
+    if tariff.surge_schedule:
+        surge *= time_surge(tariff, timezone.localtime().hour)
+    if tariff.supply_target:
+        supply = rider_supply()
+        riders = np.array([
+            supply.get(geohash(lat, lng, SUPPLY_PRECISION), 0) for lat, lng in zip(shop_lats, shop_lngs)
+        ])
+        shortfall = 1 - np.minimum(riders, tariff.supply_target) / tariff.supply_target
+        surge *= 1 + (tariff.max_supply_surge - 1) * shortfall
+
+    fees = (tariff.base_fee + tariff.per_km_fee * distances) * surge
+    fees = np.clip(fees, tariff.min_fee, tariff.max_fee if tariff.max_fee is not None else np.inf)
+    for position, index in enumerate(located):
+        quotes[index] = Quote(
+            Decimal(float(fees[position])).quantize(FEE_STEP, rounding=ROUND_HALF_UP).quantize(CENTS),
+            platform_fees[index],
+            round(float(distances[position]), 2),
+            round(float(minutes[position])),
+            round(float(surge[position]), 2),
+        )
+    return quotes
+
+
+def boda_share():
+    """Share of a delivery fee paid to the rider under the active tariff."""
+    return current_tariff().boda_share
@@ -2,7 +2,7 @@
 Serializers for deliveries and boda riders.
 """
 from rest_framework import serializers
-from .models import BodaProfile, Delivery
+from .models import BodaProfile, Delivery, DeliveryCard
 
 
 class BodaProfileSerializer(serializers.ModelSerializer):
@@ -33,11 +33,11 @@ class DeliveryListSerializer(serializers.ModelSerializer):
         model = Delivery
         fields = [
             'id', 'order_id', 'order_number', 'pickup_address', 'delivery_address',
-            'distance_km', 'delivery_fee', 'status'
+            'distance_km', 'delivery_fee', 'status', 'updated_at'
         ]
     
     def get_order_number(self, obj):
-        return str(obj.order.id)[:8].upper()
+        return str(obj.order_id)[:8].upper()
 
 
 class DeliveryDetailSerializer(serializers.ModelSerializer):
@@ -57,10 +57,48 @@ class DeliveryDetailSerializer(serializers.ModelSerializer):
         ]
     
     def get_order_number(self, obj):
-        return str(obj.order.id)[:8].upper()
+        return str(obj.order_id)[:8].upper()
     
     def get_customer_name(self, obj):
         return obj.order.user.full_name
     
     def get_customer_phone(self, obj):
         return obj.order.user.phone
+
+
+class DeliveryFeedSerializer(serializers.ModelSerializer):
+    """Serializer for open deliveries in the rider feed, from cards."""
+    
+    id = serializers.UUIDField(source='delivery_id')
+    latitude = serializers.SerializerMethodField()
+    longitude = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = DeliveryCard
+        fields = [
+            'id', 'order_id', 'order_number', 'pickup_address', 'delivery_address',
+            'distance_km', 'delivery_fee', 'status', 'updated_at', 'geocell', 'latitude', 'longitude'
+        ]
+    
+    def _point(self, obj):
+        if obj.pickup_latitude is not None:
+            return obj.pickup_latitude, obj.pickup_longitude
+        return obj.delivery_latitude, obj.delivery_longitude
+    
+    def get_latitude(self, obj):
+        latitude = self._point(obj)[0]
+        return round(float(latitude), 5) if latitude is not None else None
+    
+    def get_longitude(self, obj):
+        longitude = self._point(obj)[1]
+        return round(float(longitude), 5) if longitude is not None else None
+
+
+class DeliveryCardSerializer(serializers.ModelSerializer):
+    """Serializer for a rider's active delivery, from its card."""
+    
+    id = serializers.UUIDField(source='delivery_id')
+    
+    class Meta:
+        model = DeliveryCard
+        fields = DeliveryDetailSerializer.Meta.fields
@@ -0,0 +1,64 @@
+"""
+Signal handlers for deliveries.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.state_machine import transitioned
+from core.sync import record_tombstone
+from orders.archive import is_archiving
+from .cards import refresh_cards, refresh_customer
+from .models import BodaProfile, Delivery, PricingRule
+from .pricing import expire_tariff
+from .routing import route
+
+CUSTOMER_CARD_FIELDS = {'first_name', 'last_name', 'username', 'phone'}
+
+
+@receiver(post_delete, sender=Delivery)
+def delivery_deleted(sender, instance, **kwargs):
+    if instance.boda_id is None or is_archiving():
+        return
+    rider_id = BodaProfile.objects.filter(id=instance.boda_id).values_list('user_id', flat=True).first()
+    record_tombstone(instance, rider_id)
+
+
+@receiver(pre_save, sender=Delivery)
+def fill_route(sender, instance, raw=False, **kwargs):
+    if raw or instance.distance_km is not None:
+        return
+    points = (instance.pickup_latitude, instance.pickup_longitude,
+              instance.delivery_latitude, instance.delivery_longitude)
+    if None in points:
+        return
+    found = route(*points)
+    instance.distance_km = Decimal(str(round(found.distance_km, 2)))
+    if instance.estimated_time is None:
+        instance.estimated_time = round(found.minutes)
+
+
+@receiver(post_save, sender=Delivery)
+def delivery_saved(sender, instance, **kwargs):
+    refresh_cards([instance.pk])
+
+
+@receiver(transitioned, sender=Delivery)
+def delivery_transitioned(sender, object_ids, **kwargs):
+    refresh_cards(object_ids)
+
+
+@receiver(post_save, sender=get_user_model())
+def customer_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not CUSTOMER_CARD_FIELDS & set(update_fields)):
+        return
+    refresh_customer(instance)
+
+
+@receiver(post_save, sender=PricingRule)
+@receiver(post_delete, sender=PricingRule)
+def pricing_rule_changed(sender, **kwargs):
+    transaction.on_commit(expire_tariff)
@@ -0,0 +1,14 @@
+"""
+Delivery status transitions.
+"""
+from core.state_machine import StateMachine
+from .models import Delivery
+
+DELIVERY_MACHINE = StateMachine(Delivery, {
+    'pending': ['assigned'],
+    'assigned': ['picked_up'],
+    'picked_up': ['in_transit'],
+    'in_transit': ['delivered', 'failed'],
+})
+
+ACTIVE_STATUSES = ['assigned', 'picked_up', 'in_transit']
@@ -0,0 +1,61 @@
+"""
+Background jobs for deliveries.
+"""
+from decimal import Decimal
+
+from django.db.models import F
+from django.utils import timezone
+
+from core.jobs import task
+from .models import BodaProfile, Delivery
+
+
+# Order status implied by each delivery status
+ORDER_STATUS_FOR_DELIVERY = {
+    'assigned': 'picked_up',
+    'picked_up': 'in_transit',
+    'in_transit': 'in_transit',
+    'delivered': 'delivered',
+    'failed': 'cancelled',
+}
+
+# Order statuses an order passes through while it is being delivered
+ORDER_DELIVERY_PATH = ['picked_up', 'in_transit', 'delivered']
+
+
+@task('deliveries.sync_order_status')
+def sync_order_status(delivery_id):
+    """
+    Mirror a delivery's current status onto its order.
+
+    The order status is derived from the delivery as it is now rather than
+    from the job payload, and the order is walked through any intermediate
+    statuses, so jobs finishing out of order still converge.
+    """
+    from orders.models import Order
+    from orders.states import ORDER_MACHINE
+
+    delivery = Delivery.objects.filter(id=delivery_id).values('order_id', 'status').first()
+    if delivery is None or delivery['status'] not in ORDER_STATUS_FOR_DELIVERY:
+        return
+
+    target = ORDER_STATUS_FOR_DELIVERY[delivery['status']]
+    if target in ORDER_DELIVERY_PATH:
+        steps = ORDER_DELIVERY_PATH[:ORDER_DELIVERY_PATH.index(target) + 1]
+    else:
+        steps = [target]
+
+    order = Order.objects.only('id', 'status').get(id=delivery['order_id'])
+    for step in steps:
+        if ORDER_MACHINE.can_transition(order.status, step):
+            ORDER_MACHINE.transition(order, step)
+
+
+@task('deliveries.record_completed_delivery')
+def record_completed_delivery(boda_id, earnings):
+    """Add a completed delivery to the rider's running totals."""
+    BodaProfile.objects.filter(id=boda_id).update(
+        total_deliveries=F('total_deliveries') + 1,
+        total_earnings=F('total_earnings') + Decimal(earnings),
+        updated_at=timezone.now(),
+    )
@@ -6,6 +6,7 @@ from .views import (
     BodaProfileView,
     AvailableDeliveriesView,
     MyDeliveriesView,
+    DeliverySyncView,
     ActiveDeliveryView,
     AcceptDeliveryView,
     UpdateDeliveryStatusView,
@@ -16,6 +17,7 @@ urlpatterns = [
     path('boda/profile/', BodaProfileView.as_view(), name='boda-profile'),
     path('deliveries/available/', AvailableDeliveriesView.as_view(), name='deliveries-available'),
     path('deliveries/my-deliveries/', MyDeliveriesView.as_view(), name='my-deliveries'),
+    path('deliveries/sync/', DeliverySyncView.as_view(), name='deliveries-sync'),
     path('deliveries/active/', ActiveDeliveryView.as_view(), name='active-delivery'),
     path('deliveries/stats/', BodaStatsView.as_view(), name='boda-stats'),
     path('deliveries/<uuid:pk>/accept/', AcceptDeliveryView.as_view(), name='accept-delivery'),
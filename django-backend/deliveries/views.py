@@ -4,15 +4,22 @@ Views for deliveries and boda riders.
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.db import transaction
 from django.utils import timezone
 from django.db.models import Sum, Count, Q
-from decimal import Decimal
-from .models import BodaProfile, Delivery
+from core.conditional import ConditionalGetMixin
+from core.jobs import enqueue
+from core.state_machine import TransitionError, StaleStateError
+from core.sync import DeltaSyncMixin
+from orders.payments.splits import boda_amount
+from .cards import COMPACT_LIMIT, compact, feed_version, get_available_feed, near
+from .models import BodaProfile, Delivery, DeliveryCard
+from .states import DELIVERY_MACHINE, ACTIVE_STATUSES
 from .serializers import (
     BodaProfileSerializer,
     BodaProfileUpdateSerializer,
+    DeliveryCardSerializer,
     DeliveryListSerializer,
-    DeliveryDetailSerializer,
 )
 
 
@@ -44,20 +51,49 @@ class BodaProfileView(generics.RetrieveUpdateAPIView):
         return profile
 
 
-class AvailableDeliveriesView(generics.ListAPIView):
-    """List available deliveries for boda riders."""
+FEED_PAGE_SIZE = 50
+MAX_FEED_PAGE_SIZE = 200
+# Values of ?compact= that ask for the column-oriented payload
+COMPACT_TRUE = ('1', 'true', 'yes')
+
+
+class AvailableDeliveriesView(ConditionalGetMixin, APIView):
+    """
+    List available deliveries for boda riders, served from delivery cards.
+    
+    Newest first, at most ``limit`` rows. Pass ``lat`` and ``lng`` for
+    deliveries near the rider only, closest pickup first, and ``compact=1``
+    for a column-oriented payload of the first few rows.
+    """
     
-    serializer_class = DeliveryListSerializer
     permission_classes = [IsBodaRider]
-
-    def get_queryset(self):
-        return Delivery.objects.filter(
-            status='pending',
-            boda__isnull=True
-        ).select_related('order')
+    query_budget = 2
+    
+    def get_validator_queryset(self):
+        return None
+    
+    def get_validator_version(self):
+        # Every card write bumps the feed version
+        return feed_version()
+    
+    def get(self, request):
+        feed = get_available_feed()
+        
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', FEED_PAGE_SIZE)), MAX_FEED_PAGE_SIZE))
+            latitude = request.query_params.get('lat')
+            longitude = request.query_params.get('lng')
+            if latitude is not None and longitude is not None:
+                feed = near(feed, float(latitude), float(longitude))
+        except ValueError:
+            return Response({'error': 'limit, lat and lng must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if request.query_params.get('compact', '').lower() in COMPACT_TRUE:
+            return Response(compact(feed, min(limit, COMPACT_LIMIT)))
+        return Response(feed[:limit])
 
 
-class MyDeliveriesView(generics.ListAPIView):
+class MyDeliveriesView(ConditionalGetMixin, generics.ListAPIView):
     """List boda rider's deliveries."""
     
     serializer_class = DeliveryListSerializer
@@ -77,21 +113,37 @@ class MyDeliveriesView(generics.ListAPIView):
             return Delivery.objects.none()
 
 
-class ActiveDeliveryView(APIView):
+class DeliverySyncView(DeltaSyncMixin, generics.ListAPIView):
+    """Sync the rider's delivery history (see ``DeltaSyncMixin``)."""
+    
+    serializer_class = DeliveryListSerializer
+    permission_classes = [IsBodaRider]
+
+    def get_queryset(self):
+        return Delivery.objects.filter(boda__user=self.request.user)
+
+
+class ActiveDeliveryView(ConditionalGetMixin, APIView):
     """Get active delivery for boda rider."""
     
     permission_classes = [IsBodaRider]
     
+    def get_validator_queryset(self):
+        return None
+    
+    def get_validator_version(self):
+        return feed_version()
+    
     def get(self, request):
         try:
             boda = request.user.boda_profile
-            delivery = Delivery.objects.filter(
-                boda=boda,
-                status__in=['assigned', 'picked_up', 'in_transit']
-            ).select_related('order', 'order__user').first()
+            card = DeliveryCard.objects.filter(
+                boda_id=boda.id,
+                status__in=ACTIVE_STATUSES
+            ).first()
             
-            if delivery:
-                return Response(DeliveryDetailSerializer(delivery).data)
+            if card:
+                return Response(DeliveryCardSerializer(card).data)
             return Response(None)
         except BodaProfile.DoesNotExist:
             return Response({'error': 'Boda profile not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -101,6 +153,7 @@ class AcceptDeliveryView(APIView):
     """Accept a delivery."""
     
     permission_classes = [IsBodaRider]
+    shed_priority = 'critical'
     
     def post(self, request, pk):
         try:
@@ -117,25 +170,30 @@ class AcceptDeliveryView(APIView):
         # Check for active delivery
         active = Delivery.objects.filter(
             boda=boda,
-            status__in=['assigned', 'picked_up', 'in_transit']
+            status__in=ACTIVE_STATUSES
         ).exists()
         
         if active:
             return Response({'error': 'You already have an active delivery'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            delivery = Delivery.objects.get(id=pk, status='pending', boda__isnull=True)
+            delivery = Delivery.objects.select_related('order').get(id=pk, status='pending', boda__isnull=True)
         except Delivery.DoesNotExist:
             return Response({'error': 'Delivery not available'}, status=status.HTTP_404_NOT_FOUND)
         
-        delivery.boda = boda
-        delivery.status = 'assigned'
-        delivery.boda_earnings = delivery.delivery_fee * Decimal('0.8')  # 80% to boda
-        delivery.save()
-        
-        # Update order status
-        delivery.order.status = 'picked_up'
-        delivery.order.save()
+        with transaction.atomic():
+            try:
+                DELIVERY_MACHINE.transition(
+                    delivery, 'assigned', actor=request.user,
+                    guard={'boda__isnull': True},
+                    boda=boda,
+                    boda_earnings=boda_amount(delivery.order, delivery.delivery_fee),
+                )
+            except StaleStateError:
+                return Response({'error': 'Delivery not available'}, status=status.HTTP_409_CONFLICT)
+            
+            # Update order status in the background
+            enqueue('deliveries.sync_order_status', {'delivery_id': str(delivery.id)})
         
         return Response({'message': 'Delivery accepted'}, status=status.HTTP_200_OK)
 
@@ -144,6 +202,7 @@ class UpdateDeliveryStatusView(APIView):
     """Update delivery status."""
     
     permission_classes = [IsBodaRider]
+    shed_priority = 'critical'
     
     def patch(self, request, pk):
         try:
@@ -155,35 +214,32 @@ class UpdateDeliveryStatusView(APIView):
             return Response({'error': 'Delivery not found'}, status=status.HTTP_404_NOT_FOUND)
         
         new_status = request.data.get('status')
-        valid_transitions = {
-            'assigned': ['picked_up'],
-            'picked_up': ['in_transit'],
-            'in_transit': ['delivered', 'failed'],
-        }
         
-        if delivery.status not in valid_transitions:
+        if delivery.status not in ACTIVE_STATUSES:
             return Response({'error': 'Cannot update this delivery'}, status=status.HTTP_400_BAD_REQUEST)
         
-        if new_status not in valid_transitions.get(delivery.status, []):
+        if not DELIVERY_MACHINE.can_transition(delivery.status, new_status):
             return Response({'error': 'Invalid status transition'}, status=status.HTTP_400_BAD_REQUEST)
         
-        delivery.status = new_status
-        
+        changes = {}
         if new_status == 'picked_up':
-            delivery.actual_pickup_time = timezone.now()
-            delivery.order.status = 'in_transit'
+            changes['actual_pickup_time'] = timezone.now()
         elif new_status == 'delivered':
-            delivery.actual_delivery_time = timezone.now()
-            delivery.order.status = 'delivered'
-            # Update boda stats
-            boda.total_deliveries += 1
-            boda.total_earnings += delivery.boda_earnings
-            boda.save()
-        elif new_status == 'failed':
-            delivery.order.status = 'cancelled'
-        
-        delivery.save()
-        delivery.order.save()
+            changes['actual_delivery_time'] = timezone.now()
+        
+        with transaction.atomic():
+            try:
+                DELIVERY_MACHINE.transition(delivery, new_status, actor=request.user, **changes)
+            except TransitionError:
+                return Response({'error': 'Delivery status changed, please refresh'}, status=status.HTTP_409_CONFLICT)
+            
+            # Order status and boda stats are updated in the background
+            enqueue('deliveries.sync_order_status', {'delivery_id': str(delivery.id)})
+            if new_status == 'delivered':
+                enqueue('deliveries.record_completed_delivery', {
+                    'boda_id': str(boda.id),
+                    'earnings': str(delivery.boda_earnings),
+                })
         
         return Response({'message': f'Delivery status updated to {new_status}'}, status=status.HTTP_200_OK)
 
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import Image
+
+
+@admin.register(Image)
+class ImageAdmin(admin.ModelAdmin):
+    list_display = ['digest', 'format', 'width', 'height', 'size', 'status', 'created_at']
+    list_filter = ['status', 'format']
+    readonly_fields = ['digest', 'format', 'width', 'height', 'size', 'uploaded_by', 'created_at', 'updated_at']
@@ -0,0 +1,30 @@
+"""
+Models for uploaded images.
+"""
+from django.conf import settings
+from django.db import models
+
+
+class Image(models.Model):
+    """An uploaded original, identified by the SHA-256 of its bytes."""
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+    ]
+
+    digest = models.CharField(max_length=64, primary_key=True)
+    format = models.CharField(max_length=10)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'images'
+
+    def __str__(self):
+        return f"{self.digest[:12]}.{self.format} ({self.width}x{self.height})"
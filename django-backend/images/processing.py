@@ -0,0 +1,91 @@
+"""
+Validation, storage and thumbnail generation for uploaded images.
+"""
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image as PILImage, ImageOps
+
+from .storage import EXTENSIONS, THUMBNAIL_FORMATS, original_path, thumbnail_path
+
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+
+class InvalidImage(Exception):
+    """Raised when uploaded bytes are not an acceptable image."""
+
+
+def check_size(size):
+    """Raise InvalidImage if ``size`` bytes is over the upload limit."""
+    if size > settings.IMAGE_UPLOAD_MAX_BYTES:
+        raise InvalidImage(f'Images must be at most {settings.IMAGE_UPLOAD_MAX_BYTES // 1_000_000} MB')
+
+
+def inspect(data):
+    """Return ``(format, width, height)`` for image bytes, or raise InvalidImage."""
+    check_size(len(data))
+    try:
+        with PILImage.open(io.BytesIO(data)) as image:
+            image.verify()
+            fmt, (width, height) = image.format, image.size
+    except (OSError, SyntaxError, ValueError, PILImage.DecompressionBombError):
+        raise InvalidImage('File is not a valid image')
+    if fmt not in EXTENSIONS:
+        raise InvalidImage(f"Unsupported image format. Use one of: {', '.join(EXTENSIONS)}")
+    return fmt, width, height
+
+
+def digest_of(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _save(path, data):
+    # Content-addressed: an existing file already holds exactly these bytes
+    if not default_storage.exists(path):
+        default_storage.save(path, ContentFile(data))
+
+
+def store_original(digest, fmt, data):
+    path = original_path(digest, EXTENSIONS[fmt])
+    _save(path, data)
+    return path
+
+
+def _encode(image, extension):
+    buffer = io.BytesIO()
+    if extension == 'webp':
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    else:
+        if image.mode != 'RGB':
+            background = PILImage.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+            image = background
+        image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def generate_thumbnails(digest, fmt):
+    """
+    Write every configured thumbnail width in every thumbnail format.
+
+    Widths larger than the original are written at the original size so the
+    srcset emitted by ``image_set`` never points at a missing file.
+    """
+    with default_storage.open(original_path(digest, EXTENSIONS[fmt])) as f:
+        original = PILImage.open(f)
+        original.load()
+    original = ImageOps.exif_transpose(original)
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+
+    for width in sorted(settings.IMAGE_THUMBNAIL_WIDTHS):
+        resized = original
+        if width < original.width:
+            height = max(1, round(original.height * width / original.width))
+            resized = original.resize((width, height), PILImage.Resampling.LANCZOS)
+        for extension in THUMBNAIL_FORMATS:
+            _save(thumbnail_path(digest, width, extension), _encode(resized, extension))
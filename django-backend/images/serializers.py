@@ -0,0 +1,40 @@
+"""
+Serializers for images.
+"""
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+
+from .models import Image
+from .storage import EXTENSIONS, image_set, original_path
+
+
+class ImageSerializer(serializers.ModelSerializer):
+    """Serializer for an uploaded image with its responsive variants."""
+
+    url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Image
+        fields = ['digest', 'url', 'srcset', 'width', 'height', 'size', 'status', 'created_at']
+
+    def get_url(self, obj):
+        url = default_storage.url(original_path(obj.digest, EXTENSIONS[obj.format]))
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_srcset(self, obj):
+        return image_set(self.get_url(obj))
+
+
+class ImageSetField(serializers.Field):
+    """Read-only field rendering an image URL (or list of URLs) as srcset-ready sets."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if isinstance(value, (list, tuple)):
+            return [image_set(url) for url in value]
+        return image_set(value) if value else None
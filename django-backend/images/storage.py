@@ -0,0 +1,54 @@
+"""
+Content-addressed layout of image files under MEDIA_ROOT.
+
+Originals live at ``originals/ab/cd/<sha256>.<ext>`` and thumbnails at
+``thumbs/ab/cd/<sha256>-<width>.<format>``. A file's name is derived from
+its content, so files never change once written and can be cached forever.
+"""
+import re
+
+from django.conf import settings
+
+ORIGINALS_DIR = 'originals'
+THUMBNAILS_DIR = 'thumbs'
+THUMBNAIL_FORMATS = ['webp', 'jpg']
+
+# File extension for each Pillow format we accept
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+
+ORIGINAL_URL_RE = re.compile(
+    rf'^(?P<prefix>.*/){ORIGINALS_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/(?P<digest>[0-9a-f]{{64}})\.\w+$'
+)
+
+
+def _shard(digest):
+    return f'{digest[:2]}/{digest[2:4]}'
+
+
+def original_path(digest, extension):
+    return f'{ORIGINALS_DIR}/{_shard(digest)}/{digest}.{extension}'
+
+
+def thumbnail_path(digest, width, extension):
+    return f'{THUMBNAILS_DIR}/{_shard(digest)}/{digest}-{width}.{extension}'
+
+
+def image_set(url):
+    """
+    Return ``src`` plus ``srcset`` strings per format for an image URL.
+
+    Only URLs of content-addressed originals get thumbnails; any other URL
+    is passed through as ``src`` alone. Thumbnail names are derived from the
+    URL, so no database lookup is needed.
+    """
+    match = ORIGINAL_URL_RE.match(url or '')
+    if match is None:
+        return {'src': url}
+    prefix, digest = match['prefix'], match['digest']
+    image = {'src': url}
+    for extension in THUMBNAIL_FORMATS:
+        image[extension] = ', '.join(
+            f'{prefix}{thumbnail_path(digest, width, extension)} {width}w'
+            for width in settings.IMAGE_THUMBNAIL_WIDTHS
+        )
+    return image
@@ -0,0 +1,14 @@
+"""
+Background jobs for images.
+"""
+from core.jobs import task
+from .models import Image
+from .processing import generate_thumbnails
+
+
+@task('images.generate_thumbnails', queue='media', max_attempts=3)
+def make_thumbnails(digest):
+    """Render the responsive thumbnails for an uploaded original."""
+    image = Image.objects.get(pk=digest)
+    generate_thumbnails(image.digest, image.format)
+    Image.objects.filter(pk=digest).update(status='ready')
@@ -0,0 +1,9 @@
+"""
+URL patterns for images app.
+"""
+from django.urls import path
+from .views import ImageUploadView
+
+urlpatterns = [
+    path('images/', ImageUploadView.as_view(), name='image-upload'),
+]
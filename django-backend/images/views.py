@@ -0,0 +1,100 @@
+"""
+Views for image upload and serving.
+"""
+import mimetypes
+import posixpath
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponseNotModified, HttpResponseRedirect
+from rest_framework import permissions, status
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.jobs import enqueue
+from .models import Image
+from .processing import InvalidImage, check_size, digest_of, inspect, store_original
+from .serializers import ImageSerializer
+from .storage import EXTENSIONS, ORIGINALS_DIR, THUMBNAILS_DIR, original_path
+
+# Content-addressed files never change, so caches may keep them forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class ImageUploadView(APIView):
+    """Upload an image; identical bytes are stored once."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Refuse oversized uploads before reading them into memory
+            check_size(upload.size)
+            data = upload.read()
+            fmt, width, height = inspect(data)
+        except InvalidImage as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        digest = digest_of(data)
+        with transaction.atomic():
+            image, created = Image.objects.get_or_create(
+                digest=digest,
+                defaults={
+                    'format': fmt,
+                    'width': width,
+                    'height': height,
+                    'size': len(data),
+                    'uploaded_by': request.user,
+                },
+            )
+            if created:
+                store_original(digest, fmt, data)
+                enqueue('images.generate_thumbnails', {'digest': digest})
+
+        serializer = ImageSerializer(image, context={'request': request})
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+def serve_image(request, path):
+    """
+    Serve an original or thumbnail with immutable cache headers.
+
+    A thumbnail that has not been rendered yet redirects to its original,
+    briefly cached so clients pick up the thumbnail once it exists.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    if path.split('/', 1)[0] not in (ORIGINALS_DIR, THUMBNAILS_DIR) or '..' in path:
+        raise Http404
+
+    digest = posixpath.basename(path).split('-', 1)[0].split('.', 1)[0]
+    etag = f'"{posixpath.basename(path)}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    if not default_storage.exists(path):
+        original = Image.objects.filter(pk=digest).first()
+        if path.startswith(THUMBNAILS_DIR) and original is not None:
+            response = HttpResponseRedirect(
+                default_storage.url(original_path(digest, EXTENSIONS[original.format]))
+            )
+            response['Cache-Control'] = 'public, max-age=60'
+            return response
+        raise Http404
+
+    content_type, _ = mimetypes.guess_type(path)
+    response = FileResponse(default_storage.open(path), content_type=content_type or 'application/octet-stream')
+    response['ETag'] = etag
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CartItem, Order, OrderItem, Payment
+from .models import CartItem, Order, OrderItem, Payment, PaymentOutbox, PaymentCallback
 
 
 @admin.register(CartItem)
@@ -29,3 +29,17 @@ class PaymentAdmin(admin.ModelAdmin):
     list_display = ('order', 'amount', 'payment_method', 'payment_status', 'created_at')
     list_filter = ('payment_status', 'payment_method')
     search_fields = ('order__id', 'transaction_id')
+
+
+@admin.register(PaymentOutbox)
+class PaymentOutboxAdmin(admin.ModelAdmin):
+    list_display = ('payment', 'provider', 'status', 'attempts', 'available_at', 'created_at')
+    list_filter = ('status', 'provider')
+    search_fields = ('payment__order__id',)
+
+
+@admin.register(PaymentCallback)
+class PaymentCallbackAdmin(admin.ModelAdmin):
+    list_display = ('transaction_id', 'provider', 'status', 'received_at', 'processed_at')
+    list_filter = ('provider', 'status')
+    search_fields = ('transaction_id',)
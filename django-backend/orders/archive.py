@@ -0,0 +1,147 @@
+"""
+Archival of closed orders into the ``archived_orders`` cold table.
+
+Delivered and cancelled orders untouched for ``ORDER_ARCHIVE_AFTER_MONTHS``
+are copied, with their items, payment and delivery, into one compact
+``ArchivedOrder`` row each and then deleted from the hot tables. The hot
+tables and their indexes then only hold recent and open orders, which is
+all the order inbox, order list and rider feeds read.
+
+Reads of old history fall back to the archive: order detail looks there
+when the order is no longer in ``orders``, and the order lists append
+archived orders when asked with ``include_archived=1``.
+"""
+import contextvars
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.partitioning import add_months, ensure_partitions, month_start
+
+from .models import ArchivedOrder, Order
+from .serializers import SellerOrderSerializer
+
+ARCHIVABLE_STATUSES = ('delivered', 'cancelled')
+OPEN_DELIVERY_STATUSES = ('pending', 'assigned', 'picked_up', 'in_transit')
+DEFAULT_BATCH_SIZE = 500
+
+_archiving = contextvars.ContextVar('archiving_orders', default=False)
+
+
+def is_archiving():
+    """True while archived orders are being deleted from the hot tables."""
+    return _archiving.get()
+
+
+def archive_cutoff(months=None):
+    months = settings.ORDER_ARCHIVE_AFTER_MONTHS if months is None else months
+    return add_months(month_start(timezone.now()), -months)
+
+
+def archivable_orders(cutoff):
+    """Closed orders last changed before ``cutoff`` with nothing still in flight."""
+    return (
+        Order.objects.filter(status__in=ARCHIVABLE_STATUSES, updated_at__lt=cutoff)
+        .exclude(delivery__status__in=OPEN_DELIVERY_STATUSES)
+        .exclude(payment__payment_status='pending')
+    )
+
+
+def _payment_snapshot(order):
+    payment = getattr(order, 'payment', None)
+    if payment is None:
+        return None
+    return {
+        'id': payment.id,
+        'amount': payment.amount,
+        'payment_method': payment.payment_method,
+        'payment_status': payment.payment_status,
+        'transaction_id': payment.transaction_id,
+        'seller_amount': payment.seller_amount,
+        'platform_amount': payment.platform_amount,
+        'boda_amount': payment.boda_amount,
+        'created_at': payment.created_at,
+    }
+
+
+def _delivery_snapshot(order):
+    delivery = getattr(order, 'delivery', None)
+    if delivery is None:
+        return None
+    return {
+        'id': delivery.id,
+        'boda_id': delivery.boda_id,
+        'status': delivery.status,
+        'distance_km': delivery.distance_km,
+        'delivery_fee': delivery.delivery_fee,
+        'boda_earnings': delivery.boda_earnings,
+        'actual_pickup_time': delivery.actual_pickup_time,
+        'actual_delivery_time': delivery.actual_delivery_time,
+    }
+
+
+def _archive_batch(ids, cutoff):
+    with transaction.atomic():
+        orders = list(
+            archivable_orders(cutoff).filter(pk__in=ids)
+            .select_for_update(of=('self',))
+            .select_related('shop', 'user', 'payment', 'delivery')
+            .prefetch_related('items')
+        )
+        if not orders:
+            return 0
+
+        ensure_partitions(ArchivedOrder._meta.db_table, {month_start(order.created_at) for order in orders})
+        ArchivedOrder.objects.bulk_create([
+            ArchivedOrder(
+                id=order.id,
+                user_id=order.user_id,
+                shop_id=order.shop_id,
+                status=order.status,
+                total_amount=order.total_amount,
+                created_at=order.created_at,
+                closed_at=order.updated_at,
+                data=SellerOrderSerializer(order).data,
+                payment=_payment_snapshot(order),
+                delivery=_delivery_snapshot(order),
+            )
+            for order in orders
+        ], ignore_conflicts=True)
+
+        # Archived orders are still the client's history; don't tombstone them
+        token = _archiving.set(True)
+        try:
+            Order.objects.filter(pk__in=[order.id for order in orders]).delete()
+        finally:
+            _archiving.reset(token)
+    return len(orders)
+
+
+def archive_orders(months=None, batch_size=DEFAULT_BATCH_SIZE, limit=None):
+    """Archive closed orders older than ``months``; returns how many moved."""
+    cutoff = archive_cutoff(months)
+    archived = 0
+    while limit is None or archived < limit:
+        size = batch_size if limit is None else min(batch_size, limit - archived)
+        ids = list(archivable_orders(cutoff).order_by('updated_at').values_list('pk', flat=True)[:size])
+        if not ids:
+            break
+        moved = _archive_batch(ids, cutoff)
+        if not moved:
+            break
+        archived += moved
+    return archived
+
+
+def archived_data(archived):
+    """API representation of an archived order."""
+    return {**archived.data, 'archived': True}
+
+
+def archived_orders(status=None, **filters):
+    """API representations of archived orders matching ``filters``, newest first."""
+    queryset = ArchivedOrder.objects.filter(**filters)
+    if status:
+        queryset = queryset.filter(status=status)
+    return [archived_data(archived) for archived in queryset.only('data')]
@@ -0,0 +1,32 @@
+"""
+Management command to move old closed orders into the archive.
+Run with: python manage.py archive_orders [--months 6] [--batch-size 500] [--dry-run]
+"""
+from django.core.management.base import BaseCommand
+
+from core.partitioning import list_partitions
+from orders.archive import DEFAULT_BATCH_SIZE, archivable_orders, archive_cutoff, archive_orders
+from orders.models import ArchivedOrder
+
+
+class Command(BaseCommand):
+    help = 'Archive delivered and cancelled orders older than ORDER_ARCHIVE_AFTER_MONTHS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=None, help='Override ORDER_ARCHIVE_AFTER_MONTHS')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Orders moved per transaction')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after archiving this many orders')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many orders qualify')
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['months'])
+        if options['dry_run']:
+            count = archivable_orders(cutoff).count()
+            self.stdout.write(f'{count} order(s) closed before {cutoff:%Y-%m-%d} can be archived')
+            return
+
+        archived = archive_orders(options['months'], options['batch_size'], options['limit'])
+        self.stdout.write(f'Archived {archived} order(s) closed before {cutoff:%Y-%m-%d}')
+        partitions = list_partitions(ArchivedOrder._meta.db_table)
+        if partitions:
+            self.stdout.write(f"Archive partitions: {', '.join(partitions)}")
@@ -0,0 +1,33 @@
+"""
+Management command that runs the payment worker.
+Run with: python manage.py process_payments [--workers 4] [--once]
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from orders.payments.pipeline import dispatch_batch, ingest_callbacks
+
+
+class Command(BaseCommand):
+    help = 'Send queued payments to providers and apply provider callbacks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent provider requests')
+        parser.add_argument('--batch-size', type=int, default=100, help='Outbox rows claimed per batch')
+        parser.add_argument('--callback-batch-size', type=int, default=500, help='Callbacks applied per batch')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when idle')
+        parser.add_argument('--once', action='store_true', help='Exit when no work is left instead of polling')
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            while True:
+                sent = dispatch_batch(executor, options['batch_size'])
+                applied = ingest_callbacks(options['callback_batch_size'])
+                if sent or applied:
+                    self.stdout.write(f'Sent {sent} payment request(s), applied {applied} callback(s)')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['interval'])
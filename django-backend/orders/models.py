@@ -1,6 +1,7 @@
 """
 Models for orders and cart.
 """
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.conf import settings
 import uuid
@@ -44,6 +45,8 @@ class Order(models.Model):
     subtotal = models.DecimalField(max_digits=10, decimal_places=2)
     delivery_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     platform_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Rider's share of the delivery fee under the tariff at checkout
+    boda_share = models.DecimalField(max_digits=5, decimal_places=4, blank=True, null=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     delivery_address = models.TextField()
     delivery_latitude = models.DecimalField(max_digits=10, decimal_places=8, blank=True, null=True)
@@ -55,6 +58,13 @@ class Order(models.Model):
     class Meta:
         db_table = 'orders'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['shop', '-created_at'], name='orders_shop_created_idx'),
+            models.Index(fields=['shop', 'status'], name='orders_shop_status_idx'),
+            models.Index(fields=['shop', 'updated_at'], name='orders_shop_updated_idx'),
+            models.Index(fields=['user', '-created_at'], name='orders_user_created_idx'),
+            models.Index(fields=['user', 'updated_at'], name='orders_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.id} - {self.user.email}"
@@ -94,7 +104,7 @@ class Payment(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     payment_method = models.CharField(max_length=50)
     payment_status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
-    transaction_id = models.CharField(max_length=255, blank=True, null=True)
+    transaction_id = models.CharField(max_length=255, blank=True, null=True, db_index=True)
     seller_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     platform_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     boda_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -106,3 +116,91 @@ class Payment(models.Model):
 
     def __str__(self):
         return f"Payment for Order {self.order.id}"
+
+
+class PaymentOutbox(models.Model):
+    """Payment request waiting to be sent to a payment provider.
+
+    Rows are written in the checkout transaction and drained by
+    ``manage.py process_payments``, keeping provider calls out of the request.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    payment = models.ForeignKey(Payment, on_delete=models.CASCADE, related_name='outbox')
+    provider = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField()
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'payment_outbox'
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='payment_outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} request for Payment {self.payment_id} ({self.status})"
+
+
+class PaymentCallback(models.Model):
+    """Raw provider callback, stored on receipt and applied in batches."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    provider = models.CharField(max_length=50)
+    transaction_id = models.CharField(max_length=255)
+    status = models.CharField(max_length=20)
+    payload = models.JSONField(default=dict)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'payment_callbacks'
+        indexes = [
+            models.Index(fields=['processed_at', 'received_at'], name='payment_callback_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} callback {self.transaction_id} ({self.status})"
+
+
+class ArchivedOrder(models.Model):
+    """Closed order moved out of the hot tables by ``manage.py archive_orders``.
+
+    One row holds the order as the API returned it together with its items,
+    payment and delivery. On PostgreSQL the table is partitioned by month of
+    ``created_at``.
+    """
+
+    id = models.UUIDField(primary_key=True, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_orders')
+    shop = models.ForeignKey('shops.Shop', on_delete=models.CASCADE, related_name='archived_orders')
+    status = models.CharField(max_length=20)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField()
+    closed_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    payment = models.JSONField(blank=True, null=True, encoder=DjangoJSONEncoder)
+    delivery = models.JSONField(blank=True, null=True, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        db_table = 'archived_orders'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='archived_orders_user_idx'),
+            models.Index(fields=['shop', '-created_at'], name='archived_orders_shop_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived order {self.id} ({self.status})"
@@ -0,0 +1,7 @@
+"""
+Asynchronous payment processing.
+
+Checkout writes a ``PaymentOutbox`` row next to the ``Payment``; the
+``process_payments`` worker sends it to the configured provider, and provider
+callbacks are stored as ``PaymentCallback`` rows and applied in batches.
+"""
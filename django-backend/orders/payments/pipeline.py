@@ -0,0 +1,167 @@
+"""
+Outbox dispatch and callback ingestion for payments.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.jobs import claim_rows
+from orders.models import Payment, PaymentCallback, PaymentOutbox
+from .providers import get_provider, provider_for_method
+from .splits import calculate_split
+
+MAX_ATTEMPTS = 5
+LOCK_TIMEOUT = timedelta(minutes=5)
+UNMATCHED_CALLBACK_WINDOW = timedelta(hours=1)
+
+# Provider callback status -> Payment.payment_status
+CALLBACK_STATUSES = {
+    'completed': 'completed',
+    'success': 'completed',
+    'failed': 'failed',
+    'cancelled': 'failed',
+}
+
+
+def enqueue_payment(payment):
+    """
+    Queue ``payment`` for collection by its provider.
+
+    Call inside the transaction that creates the payment so the outbox row
+    commits or rolls back with it. Returns the outbox row, or None when the
+    payment method has no provider (cash on delivery).
+    """
+    provider = provider_for_method(payment.payment_method)
+    if provider is None:
+        return None
+    return PaymentOutbox.objects.create(
+        payment=payment,
+        provider=provider,
+        available_at=timezone.now(),
+    )
+
+
+def claim_outbox(batch_size):
+    """Mark up to ``batch_size`` due outbox rows as processing and return them."""
+    now = timezone.now()
+    due = (
+        PaymentOutbox.objects.filter(status='pending', available_at__lte=now)
+        | PaymentOutbox.objects.filter(status='processing', locked_at__lte=now - LOCK_TIMEOUT)
+    ).order_by('available_at')
+    ids = claim_rows(due, batch_size, status='processing', locked_at=now)
+    return list(PaymentOutbox.objects.filter(id__in=ids).select_related('payment'))
+
+
+def _send(row):
+    try:
+        return row, get_provider(row.provider).initiate(row.payment), None
+    except Exception as exc:
+        return row, None, exc
+
+
+def dispatch_batch(executor, batch_size=100):
+    """
+    Send one batch of outbox rows to their providers using ``executor``.
+
+    Provider calls run concurrently; the resulting state is written back with
+    one bulk update for the outbox rows and one for the payments.
+    """
+    rows = claim_outbox(batch_size)
+    if not rows:
+        return 0
+
+    now = timezone.now()
+    payments = []
+    for row, result, error in executor.map(_send, rows):
+        payment = row.payment
+        row.attempts += 1
+        row.locked_at = None
+        row.updated_at = now
+        if error is None:
+            row.status = 'sent'
+            row.last_error = None
+            payment.transaction_id = result.transaction_id
+            payment.updated_at = now
+            payments.append(payment)
+        elif row.attempts >= MAX_ATTEMPTS:
+            row.status = 'failed'
+            row.last_error = str(error)
+            payment.payment_status = 'failed'
+            payment.updated_at = now
+            payments.append(payment)
+        else:
+            row.status = 'pending'
+            row.last_error = str(error)
+            row.available_at = now + timedelta(seconds=2 ** row.attempts)
+
+    with transaction.atomic():
+        PaymentOutbox.objects.bulk_update(
+            rows, ['status', 'attempts', 'available_at', 'locked_at', 'last_error', 'updated_at']
+        )
+        Payment.objects.bulk_update(payments, ['transaction_id', 'payment_status', 'updated_at'])
+    return len(rows)
+
+
+def record_callbacks(provider, events):
+    """Store provider callback events for batched processing."""
+    PaymentCallback.objects.bulk_create([
+        PaymentCallback(
+            provider=provider,
+            transaction_id=event.transaction_id,
+            status=event.status,
+            payload=event.payload,
+        )
+        for event in events
+    ])
+
+
+def ingest_callbacks(batch_size=500):
+    """
+    Apply one batch of stored callbacks to their payments.
+
+    Completed payments get their seller/platform/boda split filled in; all
+    changed payments are written with a single bulk update. Callbacks for
+    transactions not yet known are retried on later batches for a while, then
+    dropped.
+    """
+    callbacks = list(
+        PaymentCallback.objects.filter(processed_at__isnull=True).order_by('received_at')[:batch_size]
+    )
+    if not callbacks:
+        return 0
+
+    now = timezone.now()
+    latest = {callback.transaction_id: callback for callback in callbacks}
+    payments = Payment.objects.filter(
+        transaction_id__in=latest.keys()
+    ).select_related('order')
+
+    updated = []
+    matched = set()
+    for payment in payments:
+        matched.add(payment.transaction_id)
+        new_status = CALLBACK_STATUSES.get(latest[payment.transaction_id].status)
+        if new_status is None or payment.payment_status != 'pending':
+            continue
+        payment.payment_status = new_status
+        if new_status == 'completed':
+            (payment.seller_amount,
+             payment.platform_amount,
+             payment.boda_amount) = calculate_split(payment.order)
+        payment.updated_at = now
+        updated.append(payment)
+
+    done = [
+        callback.id for callback in callbacks
+        if callback.transaction_id in matched
+        or callback.received_at <= now - UNMATCHED_CALLBACK_WINDOW
+    ]
+
+    with transaction.atomic():
+        Payment.objects.bulk_update(
+            updated,
+            ['payment_status', 'seller_amount', 'platform_amount', 'boda_amount', 'updated_at']
+        )
+        PaymentCallback.objects.filter(id__in=done).update(processed_at=now)
+    return len(done)
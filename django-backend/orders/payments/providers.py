@@ -0,0 +1,125 @@
+"""
+Payment provider clients.
+
+Providers are configured in ``settings.PAYMENT_PROVIDERS``; each entry names
+a ``PaymentProvider`` subclass, the payment methods it handles and its
+options.
+"""
+import hashlib
+import hmac
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+@dataclass
+class InitiateResult:
+    """Outcome of asking a provider to start collecting a payment."""
+
+    transaction_id: str
+    status: str = 'pending'
+
+
+@dataclass
+class CallbackEvent:
+    """A single payment status update reported by a provider."""
+
+    transaction_id: str
+    status: str
+    payload: dict
+
+
+class PaymentProvider:
+    """Base class for payment provider clients."""
+
+    def __init__(self, name, **options):
+        self.name = name
+        self.options = options
+
+    def initiate(self, payment):
+        """Start collecting ``payment`` and return an ``InitiateResult``."""
+        raise NotImplementedError
+
+    def verify_callback(self, request):
+        """Return True if the callback request really came from the provider."""
+        raise NotImplementedError
+
+    def parse_callback(self, data):
+        """Turn a callback body (one event or a list of events) into ``CallbackEvent``s."""
+        events = data if isinstance(data, list) else [data]
+        return [
+            CallbackEvent(
+                transaction_id=str(event['transaction_id']),
+                status=event['status'],
+                payload=event,
+            )
+            for event in events
+        ]
+
+
+def sign_payload(body, secret):
+    """Return the hex HMAC-SHA256 signature of a raw callback body."""
+    return hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+
+class MobileMoneySimulator(PaymentProvider):
+    """
+    Local stand-in for a mobile-money PSP.
+
+    ``initiate`` returns a fake transaction id and, like a real STK push,
+    reports the outcome later through the callback table. Options:
+    ``failure_rate`` (0-1), ``latency`` (seconds per request) and ``seed``.
+    """
+
+    def __init__(self, name, **options):
+        super().__init__(name, **options)
+        self.failure_rate = float(options.get('failure_rate', 0))
+        self.latency = float(options.get('latency', 0))
+        self.random = random.Random(options.get('seed'))
+
+    def initiate(self, payment):
+        from orders.models import PaymentCallback
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        transaction_id = f"SIM{uuid.uuid4().hex[:12].upper()}"
+        outcome = 'failed' if self.random.random() < self.failure_rate else 'completed'
+        PaymentCallback.objects.create(
+            provider=self.name,
+            transaction_id=transaction_id,
+            status=outcome,
+            payload={
+                'transaction_id': transaction_id,
+                'status': outcome,
+                'amount': str(payment.amount),
+            },
+        )
+        return InitiateResult(transaction_id=transaction_id)
+
+    def verify_callback(self, request):
+        signature = request.META.get('HTTP_X_SIGNATURE', '')
+        expected = sign_payload(request.body, settings.PAYMENT_WEBHOOK_SECRET)
+        return hmac.compare_digest(signature, expected)
+
+
+@lru_cache(maxsize=None)
+def get_provider(name):
+    """Return the configured provider instance called ``name``."""
+    config = settings.PAYMENT_PROVIDERS[name]
+    provider_class = import_string(config['CLASS'])
+    return provider_class(name, **config.get('OPTIONS', {}))
+
+
+def provider_for_method(payment_method):
+    """Return the provider name handling ``payment_method``, or None (e.g. cash)."""
+    for name, config in settings.PAYMENT_PROVIDERS.items():
+        if payment_method in config.get('METHODS', []):
+            return name
+    return None
+
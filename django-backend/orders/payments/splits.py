@@ -0,0 +1,34 @@
+"""
+Revenue split between seller, platform and boda rider.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from deliveries.pricing import boda_share
+
+CENTS = Decimal('0.01')
+
+
+def order_boda_share(order):
+    """Rider's share of ``order``'s delivery fee, as fixed at checkout."""
+    # Orders placed before the share was recorded use the active rule's
+    return order.boda_share if order.boda_share is not None else boda_share()
+
+
+def boda_amount(order, delivery_fee=None):
+    """Rider's earnings on ``delivery_fee`` (default: the order's fee)."""
+    fee = order.delivery_fee if delivery_fee is None else delivery_fee
+    return (fee * order_boda_share(order)).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def calculate_split(order):
+    """
+    Return ``(seller_amount, platform_amount, boda_amount)`` for an order.
+
+    The seller receives the subtotal, the rider the share of the delivery
+    fee recorded on the order at checkout, and the platform keeps its fee
+    plus the rest of the delivery fee.
+    """
+    seller_amount = order.subtotal.quantize(CENTS, rounding=ROUND_HALF_UP)
+    rider_amount = boda_amount(order)
+    platform_amount = order.total_amount - seller_amount - rider_amount
+    return seller_amount, platform_amount, rider_amount
@@ -0,0 +1,93 @@
+"""
+Checkout quotes.
+
+A quote prices the customer's whole cart, one order per shop, for a
+drop-off point in a single call to ``deliveries.pricing``. It comes with a
+signed token carrying the quoted fees. Checkout with that token charges
+exactly those fees without pricing again, as long as the token is fresh
+and neither the cart nor the drop-off point has changed.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+
+from deliveries.pricing import quote_deliveries
+
+QUOTE_SALT = 'orders.quote'
+
+
+class QuoteError(Exception):
+    """Raised when a quote token can't be honoured at checkout."""
+
+
+def group_cart(cart_items):
+    """Cart items by shop id: ``{shop_id: {'shop': shop, 'items': [...]}}``."""
+    groups = {}
+    for item in cart_items:
+        shop_id = str(item.product.shop.id)
+        if shop_id not in groups:
+            groups[shop_id] = {
+                'shop': item.product.shop,
+                'items': []
+            }
+        groups[shop_id]['items'].append(item)
+    return groups
+
+
+def subtotal(items):
+    return sum(
+        ((item.product.discount_price or item.product.price) * item.quantity for item in items),
+        Decimal('0')
+    )
+
+
+def price_cart(groups, latitude, longitude):
+    """Price every shop's order in ``groups``; returns ``{shop_id: Quote}``."""
+    shop_ids = list(groups)
+    quotes = quote_deliveries(
+        [groups[shop_id]['shop'] for shop_id in shop_ids],
+        latitude, longitude,
+        [subtotal(groups[shop_id]['items']) for shop_id in shop_ids],
+    )
+    return dict(zip(shop_ids, quotes))
+
+
+def _point(latitude, longitude):
+    return [None if value is None else str(value) for value in (latitude, longitude)]
+
+
+def sign_quote(user, groups, quotes, latitude, longitude):
+    """Token binding ``quotes`` to this user, cart and drop-off point."""
+    return signing.dumps({
+        'user': str(user.pk),
+        'point': _point(latitude, longitude),
+        'shops': {
+            shop_id: [str(subtotal(groups[shop_id]['items'])), str(quote.delivery_fee), str(quote.platform_fee)]
+            for shop_id, quote in quotes.items()
+        },
+    }, salt=QUOTE_SALT, compress=True)
+
+
+def read_quote(token, user, groups, latitude, longitude):
+    """
+    Quoted ``{shop_id: (delivery_fee, platform_fee)}`` for checking out ``groups``.
+
+    Raises ``QuoteError`` when the token is invalid, expired, or was issued
+    for another user, cart or drop-off point.
+    """
+    try:
+        data = signing.loads(token, salt=QUOTE_SALT, max_age=settings.DELIVERY_QUOTE_TTL)
+    except signing.SignatureExpired:
+        raise QuoteError('Quote expired; please request a new one')
+    except signing.BadSignature:
+        raise QuoteError('Invalid quote')
+
+    if data['user'] != str(user.pk) or data['point'] != _point(latitude, longitude):
+        raise QuoteError('Quote does not match this checkout')
+    shops = data['shops']
+    if set(shops) != set(groups) or any(
+        shops[shop_id][0] != str(subtotal(group['items'])) for shop_id, group in groups.items()
+    ):
+        raise QuoteError('Cart changed since the quote; please request a new one')
+    return {shop_id: (Decimal(fees[1]), Decimal(fees[2])) for shop_id, fees in shops.items()}
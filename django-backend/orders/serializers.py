@@ -56,7 +56,8 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = [
             'id', 'shop_id', 'status', 'subtotal', 'delivery_fee', 'platform_fee',
-            'total_amount', 'delivery_address', 'notes', 'created_at', 'shop', 'items'
+            'total_amount', 'delivery_address', 'notes', 'created_at', 'updated_at',
+            'shop', 'items'
         ]
     
     def get_shop(self, obj):
@@ -66,10 +67,33 @@ class OrderSerializer(serializers.ModelSerializer):
         }
 
 
-class OrderCreateSerializer(serializers.Serializer):
+class SellerOrderSerializer(OrderSerializer):
+    """Serializer for orders in a seller's inbox."""
+    
+    customer = serializers.SerializerMethodField()
+    
+    class Meta(OrderSerializer.Meta):
+        fields = OrderSerializer.Meta.fields + ['customer']
+    
+    def get_customer(self, obj):
+        return {
+            'name': obj.user.full_name,
+            'phone': obj.user.phone
+        }
+
+
+class OrderQuoteSerializer(serializers.Serializer):
+    """Drop-off point to price the cart for."""
+    
+    delivery_latitude = serializers.DecimalField(max_digits=10, decimal_places=8, required=False, allow_null=True)
+    delivery_longitude = serializers.DecimalField(max_digits=11, decimal_places=8, required=False, allow_null=True)
+
+
+class OrderCreateSerializer(OrderQuoteSerializer):
     """Serializer for creating orders."""
     
     delivery_address = serializers.CharField()
+    quote_token = serializers.CharField(required=False)
     phone = serializers.CharField()
     notes = serializers.CharField(required=False, allow_blank=True)
     payment_method = serializers.CharField()
@@ -0,0 +1,16 @@
+"""
+Signal handlers for orders.
+"""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from core.sync import record_tombstone
+from .archive import is_archiving
+from .models import Order
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    if is_archiving():
+        return
+    record_tombstone(instance, instance.user_id)
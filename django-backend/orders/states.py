@@ -0,0 +1,24 @@
+"""
+Order status transitions.
+"""
+from core.state_machine import StateMachine
+from .models import Order
+
+ORDER_MACHINE = StateMachine(Order, {
+    'pending': ['confirmed', 'preparing', 'ready', 'picked_up', 'cancelled'],
+    'confirmed': ['preparing', 'ready', 'picked_up', 'cancelled'],
+    'preparing': ['ready', 'picked_up', 'cancelled'],
+    'ready': ['picked_up', 'cancelled'],
+    'picked_up': ['in_transit', 'delivered', 'cancelled'],
+    'in_transit': ['delivered', 'cancelled'],
+})
+
+# Statuses a seller may set on their own orders
+SELLER_STATUSES = ['confirmed', 'preparing', 'ready', 'cancelled']
+
+# Statuses from which a seller may still cancel; once a rider has the goods
+# only the delivery can fail the order
+SELLER_CANCELLABLE = ['pending', 'confirmed', 'preparing', 'ready']
+
+# Statuses from which a customer may still cancel
+CUSTOMER_CANCELLABLE = ['pending', 'confirmed']
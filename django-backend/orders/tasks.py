@@ -0,0 +1,21 @@
+"""
+Background jobs for orders.
+"""
+from django.db.models import F
+from django.utils import timezone
+
+from core.jobs import task
+from .models import OrderItem
+
+
+@task('orders.restore_stock')
+def restore_stock(order_id):
+    """Return the stock held by a cancelled order to its products."""
+    from products.models import Product
+
+    items = OrderItem.objects.filter(order_id=order_id, product__isnull=False)
+    for product_id, quantity in items.values_list('product_id', 'quantity'):
+        Product.objects.filter(id=product_id).update(
+            stock_quantity=F('stock_quantity') + quantity,
+            updated_at=timezone.now(),
+        )
@@ -10,10 +10,14 @@ from .views import (
     CartClearView,
     CartCountView,
     OrderListView,
+    OrderSyncView,
     OrderDetailView,
     OrderCreateView,
+    OrderQuoteView,
     OrderCancelView,
     OrderStatusUpdateView,
+    OrderBulkStatusView,
+    PaymentCallbackView,
 )
 
 urlpatterns = [
@@ -27,8 +31,14 @@ urlpatterns = [
     
     # Orders
     path('orders/', OrderListView.as_view(), name='order-list'),
+    path('orders/sync/', OrderSyncView.as_view(), name='order-sync'),
+    path('orders/quote/', OrderQuoteView.as_view(), name='order-quote'),
     path('orders/create/', OrderCreateView.as_view(), name='order-create'),
+    path('orders/bulk-status/', OrderBulkStatusView.as_view(), name='order-bulk-status'),
     path('orders/<uuid:pk>/', OrderDetailView.as_view(), name='order-detail'),
     path('orders/<uuid:pk>/cancel/', OrderCancelView.as_view(), name='order-cancel'),
     path('orders/<uuid:pk>/status/', OrderStatusUpdateView.as_view(), name='order-status'),
+    
+    # Payments
+    path('payments/callback/<str:provider>/', PaymentCallbackView.as_view(), name='payment-callback'),
 ]
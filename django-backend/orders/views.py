@@ -4,13 +4,29 @@ Views for orders and cart.
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.conf import settings
 from django.db import transaction
+from django.http import Http404
 from decimal import Decimal
-from .models import CartItem, Order, OrderItem, Payment
+import uuid
+from core.conditional import ConditionalGetMixin
+from core.idempotency import idempotent
+from core.jobs import enqueue
+from core.state_machine import TransitionError
+from core.sync import DeltaSyncMixin
+from core.write_queue import serialized_write
+from deliveries.pricing import boda_share
+from .archive import archived_data, archived_orders
+from .models import ArchivedOrder, CartItem, Order, OrderItem, Payment
+from .payments.pipeline import enqueue_payment, record_callbacks
+from .payments.providers import get_provider
+from .quotes import QuoteError, group_cart, price_cart, read_quote, sign_quote, subtotal as cart_subtotal
+from .states import ORDER_MACHINE, SELLER_STATUSES, SELLER_CANCELLABLE, CUSTOMER_CANCELLABLE
 from .serializers import (
     CartItemSerializer,
     OrderSerializer,
     OrderCreateSerializer,
+    OrderQuoteSerializer,
 )
 
 
@@ -23,6 +39,7 @@ class CartListView(generics.ListAPIView):
     
     serializer_class = CartItemSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
 
     def get_queryset(self):
         return CartItem.objects.filter(user=self.request.user).select_related('product', 'product__shop')
@@ -33,6 +50,7 @@ class CartAddView(APIView):
     
     permission_classes = [permissions.IsAuthenticated]
     
+    @serialized_write
     def post(self, request):
         product_id = request.data.get('product_id')
         quantity = int(request.data.get('quantity', 1))
@@ -116,11 +134,12 @@ class CartCountView(APIView):
 # ORDER VIEWS
 # ============================================
 
-class OrderListView(generics.ListAPIView):
-    """List user's orders."""
+class OrderListView(ConditionalGetMixin, generics.ListAPIView):
+    """List user's orders; pass ``include_archived=1`` for old history too."""
     
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 5
 
     def get_queryset(self):
         queryset = Order.objects.filter(user=self.request.user).select_related('shop').prefetch_related('items')
@@ -130,23 +149,102 @@ class OrderListView(generics.ListAPIView):
             queryset = queryset.filter(status=status_filter)
         
         return queryset
+    
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get('include_archived'):
+            response.data = list(response.data) + archived_orders(
+                status=request.query_params.get('status'), user=request.user
+            )
+        return response
+
+
+class OrderSyncView(DeltaSyncMixin, generics.ListAPIView):
+    """Sync the user's order history (see ``DeltaSyncMixin``)."""
+    
+    serializer_class = OrderSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return Order.objects.filter(user=self.request.user).select_related('shop').prefetch_related('items')
 
 
-class OrderDetailView(generics.RetrieveAPIView):
-    """Get order details."""
+class OrderDetailView(ConditionalGetMixin, generics.RetrieveAPIView):
+    """Get order details, from the archive for old closed orders."""
     
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         return Order.objects.filter(user=self.request.user).select_related('shop').prefetch_related('items')
+    
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archived = ArchivedOrder.objects.filter(pk=kwargs['pk'], user=request.user).first()
+            if archived is None:
+                raise
+            return Response(archived_data(archived))
+
+
+class OrderQuoteView(APIView):
+    """
+    Price the cart for a drop-off point, one order per shop.
+    
+    Returns the fees of each shop's order and a ``quote_token``; checkout
+    with that token charges the quoted fees while the token is valid.
+    """
+    
+    permission_classes = [permissions.IsAuthenticated]
+    shed_priority = 'critical'
+    query_budget = 3
+    
+    def post(self, request):
+        serializer = OrderQuoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        latitude = serializer.validated_data.get('delivery_latitude')
+        longitude = serializer.validated_data.get('delivery_longitude')
+        
+        groups = group_cart(
+            CartItem.objects.filter(user=request.user).select_related('product', 'product__shop')
+        )
+        if not groups:
+            return Response({'error': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        quotes = price_cart(groups, latitude, longitude)
+        shops = []
+        for shop_id, quote in quotes.items():
+            shop_subtotal = cart_subtotal(groups[shop_id]['items'])
+            shops.append({
+                'shop_id': shop_id,
+                'shop_name': groups[shop_id]['shop'].name,
+                'subtotal': str(shop_subtotal),
+                'delivery_fee': str(quote.delivery_fee),
+                'platform_fee': str(quote.platform_fee),
+                'total': str(shop_subtotal + quote.delivery_fee + quote.platform_fee),
+                'distance_km': quote.distance_km,
+                'estimated_minutes': quote.minutes,
+                'surge': quote.surge,
+            })
+        
+        return Response({
+            'shops': shops,
+            'delivery_fee': str(sum(quote.delivery_fee for quote in quotes.values())),
+            'total': str(sum(Decimal(shop['total']) for shop in shops)),
+            'quote_token': sign_quote(request.user, groups, quotes, latitude, longitude),
+            'expires_in': settings.DELIVERY_QUOTE_TTL,
+        })
 
 
 class OrderCreateView(APIView):
-    """Create a new order from cart items."""
+    """Create a new order from cart items, at the fees of ``quote_token`` if given."""
     
     permission_classes = [permissions.IsAuthenticated]
+    shed_priority = 'critical'
     
+    @serialized_write
+    @idempotent('checkout')
     @transaction.atomic
     def post(self, request):
         serializer = OrderCreateSerializer(data=request.data)
@@ -158,15 +256,24 @@ class OrderCreateView(APIView):
             return Response({'error': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Group cart items by shop
-        shop_items = {}
-        for item in cart_items:
-            shop_id = str(item.product.shop.id)
-            if shop_id not in shop_items:
-                shop_items[shop_id] = {
-                    'shop': item.product.shop,
-                    'items': []
-                }
-            shop_items[shop_id]['items'].append(item)
+        shop_items = group_cart(cart_items)
+        latitude = serializer.validated_data.get('delivery_latitude')
+        longitude = serializer.validated_data.get('delivery_longitude')
+        
+        token = serializer.validated_data.get('quote_token')
+        if token:
+            try:
+                fees = read_quote(token, request.user, shop_items, latitude, longitude)
+            except QuoteError as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+        else:
+            fees = {
+                shop_id: (quote.delivery_fee, quote.platform_fee)
+                for shop_id, quote in price_cart(shop_items, latitude, longitude).items()
+            }
+        # Fixed now so the payment split and the rider's earnings agree
+        # even if the pricing rule changes before they are computed
+        rider_share = boda_share()
         
         created_orders = []
         
@@ -175,12 +282,8 @@ class OrderCreateView(APIView):
             items = data['items']
             
             # Calculate totals
-            subtotal = sum(
-                (item.product.discount_price or item.product.price) * item.quantity
-                for item in items
-            )
-            delivery_fee = Decimal('500')  # Fixed delivery fee
-            platform_fee = subtotal * Decimal('0.05')  # 5% platform fee
+            subtotal = cart_subtotal(items)
+            delivery_fee, platform_fee = fees[shop_id]
             total_amount = subtotal + delivery_fee + platform_fee
             
             # Create order
@@ -190,8 +293,11 @@ class OrderCreateView(APIView):
                 subtotal=subtotal,
                 delivery_fee=delivery_fee,
                 platform_fee=platform_fee,
+                boda_share=rider_share,
                 total_amount=total_amount,
                 delivery_address=serializer.validated_data['delivery_address'],
+                delivery_latitude=latitude,
+                delivery_longitude=longitude,
                 notes=serializer.validated_data.get('notes', '')
             )
             
@@ -210,14 +316,17 @@ class OrderCreateView(APIView):
                 
                 # Update stock
                 item.product.stock_quantity -= item.quantity
-                item.product.save()
+                item.product.save(update_fields=['stock_quantity', 'updated_at'])
             
-            # Create payment record
-            Payment.objects.create(
+            # Create payment record; collection happens in process_payments
+            payment = Payment.objects.create(
                 order=order,
                 amount=total_amount,
                 payment_method=serializer.validated_data['payment_method']
             )
+            enqueue_payment(payment)
+            if len(items) > 1:
+                enqueue('products.record_co_purchases', {'order_id': str(order.id)})
             
             created_orders.append(order)
         
@@ -235,26 +344,29 @@ class OrderCancelView(APIView):
     
     permission_classes = [permissions.IsAuthenticated]
     
+    @transaction.atomic
     def post(self, request, pk):
         try:
             order = Order.objects.get(id=pk, user=request.user)
         except Order.DoesNotExist:
             return Response({'error': 'Order not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        if order.status not in ['pending', 'confirmed']:
+        if order.status not in CUSTOMER_CANCELLABLE:
             return Response(
                 {'error': 'Cannot cancel order at this stage'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        order.status = 'cancelled'
-        order.save()
+        try:
+            ORDER_MACHINE.transition(order, 'cancelled', actor=request.user)
+        except TransitionError:
+            return Response(
+                {'error': 'Cannot cancel order at this stage'},
+                status=status.HTTP_409_CONFLICT
+            )
         
-        # Restore stock
-        for item in order.items.all():
-            if item.product:
-                item.product.stock_quantity += item.quantity
-                item.product.save()
+        # Restore stock in the background
+        enqueue('orders.restore_stock', {'order_id': str(order.id)})
         
         return Response({'message': 'Order cancelled'}, status=status.HTTP_200_OK)
 
@@ -264,6 +376,7 @@ class OrderStatusUpdateView(APIView):
     
     permission_classes = [permissions.IsAuthenticated]
     
+    @transaction.atomic
     def patch(self, request, pk):
         try:
             if request.user.role == 'admin':
@@ -274,12 +387,117 @@ class OrderStatusUpdateView(APIView):
             return Response({'error': 'Order not found'}, status=status.HTTP_404_NOT_FOUND)
         
         new_status = request.data.get('status')
-        valid_statuses = ['confirmed', 'preparing', 'ready', 'cancelled']
         
-        if new_status not in valid_statuses:
+        if new_status not in SELLER_STATUSES:
             return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
         
-        order.status = new_status
-        order.save()
+        if new_status == 'cancelled' and order.status not in SELLER_CANCELLABLE:
+            return Response(
+                {'error': 'Cannot cancel order at this stage'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            ORDER_MACHINE.transition(order, new_status, actor=request.user)
+        except TransitionError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+        
+        if new_status == 'cancelled':
+            enqueue('orders.restore_stock', {'order_id': str(order.id)})
         
         return Response({'message': 'Order status updated'}, status=status.HTTP_200_OK)
+
+
+class OrderBulkStatusView(APIView):
+    """Update the status of many orders at once (for sellers).
+    
+    Takes ``status`` plus either ``order_ids`` or ``from_status`` (e.g. confirm
+    every pending order). Orders that cannot make the transition are skipped;
+    sellers can only cancel orders a rider hasn't picked up, and cancelled
+    orders get their stock back.
+    """
+    
+    permission_classes = [permissions.IsAuthenticated]
+    max_orders = 500
+    
+    @transaction.atomic
+    def post(self, request):
+        new_status = request.data.get('status')
+        order_ids = request.data.get('order_ids')
+        from_status = request.data.get('from_status')
+        
+        if new_status not in SELLER_STATUSES:
+            return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if request.user.role == 'admin':
+            queryset = Order.objects.all()
+        else:
+            queryset = Order.objects.filter(shop__owner=request.user)
+        
+        if order_ids:
+            if not isinstance(order_ids, list) or len(order_ids) > self.max_orders:
+                return Response(
+                    {'error': f'order_ids must be a list of at most {self.max_orders} ids'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                order_ids = [uuid.UUID(str(order_id)) for order_id in order_ids]
+            except ValueError:
+                return Response({'error': 'Invalid order id'}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(id__in=order_ids)
+        elif from_status:
+            queryset = queryset.filter(status=from_status)
+            queryset = queryset.filter(id__in=queryset.values('id')[:self.max_orders])
+        else:
+            return Response(
+                {'error': 'Provide order_ids or from_status'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        sources = SELLER_CANCELLABLE if new_status == 'cancelled' else None
+        moved, skipped = ORDER_MACHINE.bulk_transition(
+            queryset.order_by(), new_status, actor=request.user, sources=sources
+        )
+        
+        if new_status == 'cancelled':
+            for order_id in moved:
+                enqueue('orders.restore_stock', {'order_id': str(order_id)})
+        
+        return Response({
+            'updated': [str(pk) for pk in moved],
+            'skipped': [str(pk) for pk in skipped],
+        }, status=status.HTTP_200_OK)
+
+
+# ============================================
+# PAYMENT VIEWS
+# ============================================
+
+class PaymentCallbackView(APIView):
+    """Receive payment status callbacks from a provider.
+
+    Accepts a single event or a list of events. Events are stored and applied
+    in batches by ``process_payments``.
+    """
+    
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    # Providers retry until acknowledged; limiting them only delays payments
+    throttle_classes = []
+    shed_priority = 'critical'
+    
+    def post(self, request, provider):
+        if provider not in settings.PAYMENT_PROVIDERS:
+            return Response({'error': 'Unknown provider'}, status=status.HTTP_404_NOT_FOUND)
+        
+        client = get_provider(provider)
+        if not client.verify_callback(request):
+            return Response({'error': 'Invalid signature'}, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            events = client.parse_callback(request.data)
+        except (KeyError, TypeError):
+            return Response({'error': 'Malformed callback'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        record_callbacks(provider, events)
+        return Response({'received': len(events)}, status=status.HTTP_202_ACCEPTED)
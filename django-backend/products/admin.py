@@ -4,7 +4,8 @@ from .models import Category, Product, Review
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ('name', 'slug', 'parent', 'is_active', 'sort_order')
+    list_display = ('name', 'slug', 'path', 'parent', 'is_active', 'sort_order')
+    ordering = ('path',)
     list_filter = ('is_active', 'parent')
     search_fields = ('name', 'slug')
     prepopulated_fields = {'slug': ('name',)}
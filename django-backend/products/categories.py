@@ -0,0 +1,81 @@
+"""
+Category tree building and caching.
+"""
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Count
+
+from .models import Category, Product
+
+TREE_CACHE_KEY = 'categories:tree'
+TREE_CACHE_TIMEOUT = 300  # product counts may lag by up to this many seconds
+
+
+def build_category_tree():
+    """
+    Return active categories as a nested list with subtree product counts.
+
+    Uses one query for the categories and one GROUP BY for the counts;
+    counts are rolled up to ancestors in Python.
+    """
+    categories = list(
+        Category.objects.filter(is_active=True)
+        .order_by('depth', 'sort_order', 'name')
+        .values('id', 'name', 'slug', 'icon', 'parent_id', 'path', 'depth')
+    )
+    direct_counts = dict(
+        Product.objects.filter(is_active=True, category__isnull=False).order_by()
+        .values_list('category_id').annotate(count=Count('id'))
+    )
+
+    nodes = {}
+    roots = []
+    for category in categories:
+        node = {
+            'id': str(category['id']),
+            'name': category['name'],
+            'slug': category['slug'],
+            'icon': category['icon'],
+            'path': category['path'],
+            'product_count': direct_counts.get(category['id'], 0),
+            'children': [],
+        }
+        nodes[category['id']] = node
+        parent = nodes.get(category['parent_id'])
+        if parent is not None:
+            parent['children'].append(node)
+        elif category['parent_id'] is None:
+            roots.append(node)
+        # Children of inactive categories are left out with their parent
+
+    # Deepest first, so each child's total is final before it is added up
+    for category in reversed(categories):
+        parent = nodes.get(category['parent_id'])
+        if parent is not None and category['id'] in nodes:
+            parent['product_count'] += nodes[category['id']]['product_count']
+
+    return roots
+
+
+def get_category_tree():
+    """Return the cached category tree, building it on a miss."""
+    tree = cache.get(TREE_CACHE_KEY)
+    if tree is None:
+        tree = build_category_tree()
+        cache.set(TREE_CACHE_KEY, tree, TREE_CACHE_TIMEOUT)
+    return tree
+
+
+def invalidate_category_tree():
+    cache.delete(TREE_CACHE_KEY)
+
+
+def subtree_category_ids(category_id):
+    """Subquery of ids for ``category_id`` and all of its descendants."""
+    try:
+        root = Category.objects.filter(pk=category_id).values_list('path', flat=True).first()
+    except ValidationError:
+        root = None
+    if root is None:
+        return Category.objects.none().values('id')
+    return Category.objects.filter(path__startswith=root).values('id')
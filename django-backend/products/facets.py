@@ -0,0 +1,118 @@
+"""
+Facet counts for the product filter sidebar.
+
+All four facets (category, price bucket, shop, rating band) come from a
+single grouped query over the filtered products; results are cached per
+normalized filter set and catalogue version.
+"""
+import hashlib
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from .filters import normalized_filters
+
+# Upper bounds (KES) of the price histogram buckets; the last bucket is open
+PRICE_BUCKETS = [500, 1000, 2500, 5000, 10000, 25000, 50000]
+
+# Lower bounds of the rating bands, highest first
+RATING_BANDS = [4, 3, 2, 1]
+
+# Product fields that decide which products match a filter and where they
+# are counted; saves touching none of them leave cached facets valid
+FACET_FIELDS = frozenset([
+    'name', 'description', 'category', 'category_id', 'shop', 'shop_id',
+    'price', 'discount_price', 'rating', 'is_active', 'is_featured',
+])
+
+FACET_CACHE_TIMEOUT = 60
+CATALOG_VERSION_KEY = 'products:catalog_version'
+
+
+def catalog_version():
+    return cache.get_or_set(CATALOG_VERSION_KEY, 1, None)
+
+
+def bump_catalog_version():
+    """Invalidate every cached facet result and catalogue ETag."""
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, 1, None)
+
+
+def _price_bucket():
+    return Case(
+        *[When(price__lt=bound, then=Value(index)) for index, bound in enumerate(PRICE_BUCKETS)],
+        default=Value(len(PRICE_BUCKETS)),
+        output_field=IntegerField(),
+    )
+
+
+def _rating_band():
+    return Case(
+        *[When(rating__gte=bound, then=Value(bound)) for bound in RATING_BANDS],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _price_label(index):
+    low = PRICE_BUCKETS[index - 1] if index else 0
+    high = PRICE_BUCKETS[index] if index < len(PRICE_BUCKETS) else None
+    return {'min': low, 'max': high}
+
+
+def compute_facets(queryset):
+    """Return facet counts for ``queryset`` using one grouped query."""
+    rows = (
+        queryset.order_by()
+        .annotate(price_bucket=_price_bucket(), rating_band=_rating_band())
+        .values('category_id', 'category__name', 'shop_id', 'shop__name', 'price_bucket', 'rating_band')
+        .annotate(count=Count('id'))
+    )
+
+    categories = defaultdict(int)
+    shops = defaultdict(int)
+    prices = defaultdict(int)
+    ratings = defaultdict(int)
+    names = {}
+    for row in rows:
+        if row['category_id'] is not None:
+            categories[row['category_id']] += row['count']
+            names[row['category_id']] = row['category__name']
+        shops[row['shop_id']] += row['count']
+        names[row['shop_id']] = row['shop__name']
+        prices[row['price_bucket']] += row['count']
+        ratings[row['rating_band']] += row['count']
+
+    def by_count(counts):
+        return sorted(counts.items(), key=lambda item: -item[1])
+
+    return {
+        'categories': [
+            {'id': str(pk), 'name': names[pk], 'count': count} for pk, count in by_count(categories)
+        ],
+        'shops': [
+            {'id': str(pk), 'name': names[pk], 'count': count} for pk, count in by_count(shops)
+        ],
+        'price': [
+            {**_price_label(index), 'count': prices[index]}
+            for index in range(len(PRICE_BUCKETS) + 1) if prices[index]
+        ],
+        'rating': [
+            {'min': band, 'count': ratings[band]} for band in RATING_BANDS + [0] if ratings[band]
+        ],
+    }
+
+
+def get_facets(queryset, params):
+    """Return cached facet counts for the filters in ``params``."""
+    filters = repr(normalized_filters(params)).encode('utf-8')
+    key = f'products:facets:{catalog_version()}:{hashlib.blake2b(filters, digest_size=16).hexdigest()}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(key, facets, FACET_CACHE_TIMEOUT)
+    return facets
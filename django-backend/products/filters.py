@@ -0,0 +1,79 @@
+"""
+Catalogue filtering shared by product listing and facets.
+"""
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from .categories import subtree_category_ids
+
+# Query parameters that change which products match
+FILTER_PARAMS = ['search', 'category_id', 'shop_id', 'min_price', 'max_price', 'min_rating', 'featured']
+
+
+def normalized_filters(params):
+    """Return the filter parameters present in ``params`` as a sorted tuple."""
+    return tuple(sorted(
+        (name, params.get(name).strip()) for name in FILTER_PARAMS if params.get(name)
+    ))
+
+
+def _uuid(value, name):
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        raise ValidationError({name: 'Must be a valid id'})
+
+
+def _number(value, name):
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        number = None
+    if number is None or not number.is_finite():
+        raise ValidationError({name: 'Must be a number'})
+    return number
+
+
+def filter_products(queryset, params):
+    """
+    Apply the catalogue filters in ``params`` (a QueryDict or dict) to ``queryset``.
+
+    Raises ``ValidationError`` for malformed ids and numbers.
+    """
+    # Search
+    search = params.get('search')
+    if search:
+        queryset = queryset.filter(
+            Q(name__icontains=search) | Q(description__icontains=search)
+        )
+    
+    # Filter by category, including its subcategories
+    category_id = params.get('category_id')
+    if category_id:
+        queryset = queryset.filter(category_id__in=subtree_category_ids(category_id))
+    
+    shop_id = params.get('shop_id')
+    if shop_id:
+        queryset = queryset.filter(shop_id=_uuid(shop_id, 'shop_id'))
+    
+    # Filter by price range
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+    if min_price:
+        queryset = queryset.filter(price__gte=_number(min_price, 'min_price'))
+    if max_price:
+        queryset = queryset.filter(price__lte=_number(max_price, 'max_price'))
+    
+    min_rating = params.get('min_rating')
+    if min_rating:
+        queryset = queryset.filter(rating__gte=_number(min_rating, 'min_rating'))
+    
+    # Featured products
+    featured = params.get('featured')
+    if featured:
+        queryset = queryset.filter(is_featured=True)
+    
+    return queryset
@@ -0,0 +1,202 @@
+"""
+Bulk catalogue import from CSV or NDJSON.
+
+Rows are streamed from the uploaded file, validated in chunks and upserted
+with ``INSERT ... ON CONFLICT (shop, sku) DO UPDATE``. An update only
+touches the columns a row gives, so a file with just ``sku,name,price``
+reprices products without clearing their stock, images or category. Each
+chunk commits on its own and updates the import's progress, so a
+large file shows progress while it runs and a retried import simply
+upserts the same rows again.
+"""
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+from core.jobs import LeaseLost, heartbeat
+
+from .categories import invalidate_category_tree
+from .facets import bump_catalog_version
+from .models import Category, Product, ProductImport
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+IMAGE_SEPARATOR = '|'
+
+UPSERT_FIELDS = [
+    'name', 'description', 'price', 'discount_price', 'stock_quantity',
+    'category', 'images', 'is_featured', 'is_active',
+]
+
+
+class ImportRowSerializer(serializers.Serializer):
+    """
+    One catalogue row; ``category`` is a category slug.
+
+    Optional fields have no defaults: a field missing from the row is left
+    out of ``validated_data`` and keeps its current value on update.
+    """
+
+    sku = serializers.CharField(max_length=64)
+    name = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    discount_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False, allow_null=True
+    )
+    stock_quantity = serializers.IntegerField(min_value=0, required=False)
+    category = serializers.CharField(required=False, allow_null=True)
+    images = serializers.ListField(child=serializers.URLField(), required=False)
+    is_featured = serializers.BooleanField(required=False)
+    is_active = serializers.BooleanField(required=False)
+
+    def to_internal_value(self, data):
+        # CSV cells are strings: blank means "not given" and images are pipe-separated
+        data = {key: value for key, value in data.items() if key and value not in ('', None)}
+        if isinstance(data.get('images'), str):
+            data['images'] = [url.strip() for url in data['images'].split(IMAGE_SEPARATOR) if url.strip()]
+        return super().to_internal_value(data)
+
+    def validate_category(self, value):
+        if value is None:
+            return None
+        try:
+            return self.context['categories'][value]
+        except KeyError:
+            raise serializers.ValidationError(f"Unknown category '{value}'")
+
+    def validate(self, attrs):
+        if attrs.get('discount_price') is not None and attrs['discount_price'] >= attrs['price']:
+            raise serializers.ValidationError({'discount_price': 'Must be lower than price'})
+        return attrs
+
+
+def iter_rows(fileobj, fmt):
+    """Yield ``(row_number, data)`` pairs; invalid NDJSON lines yield an error string."""
+    text = codecs.getreader('utf-8-sig')(fileobj)
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(text), start=2):
+            yield number, row
+        return
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield number, f'Invalid JSON: {exc.msg}'
+            continue
+        yield number, row if isinstance(row, dict) else 'Each line must be a JSON object'
+
+
+class CatalogueImporter:
+    """Validates and upserts rows of one ``ProductImport``."""
+
+    def __init__(self, product_import, chunk_size=CHUNK_SIZE, progress=None):
+        self.product_import = product_import
+        self.shop_id = product_import.shop_id
+        self.chunk_size = chunk_size
+        self.progress = progress or (lambda product_import: None)
+        self.categories = {slug: pk for slug, pk in Category.objects.values_list('slug', 'id')}
+        self.seen_skus = {}
+        self.errors = []
+        self.counts = {'processed_rows': 0, 'created_count': 0, 'updated_count': 0, 'error_count': 0}
+
+    def error(self, number, errors, sku=None):
+        self.counts['error_count'] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': number, 'sku': sku, 'errors': errors})
+
+    def validate(self, chunk):
+        """Return the chunk's valid products and the columns each row gives."""
+        products, columns = [], []
+        for number, row in chunk:
+            if isinstance(row, str):
+                self.error(number, {'row': [row]})
+                continue
+            serializer = ImportRowSerializer(data=row, context={'categories': self.categories})
+            if not serializer.is_valid():
+                self.error(number, serializer.errors, row.get('sku'))
+                continue
+            data = serializer.validated_data
+            sku = data['sku']
+            if sku in self.seen_skus:
+                self.error(number, {'sku': [f'Duplicate SKU; first seen on row {self.seen_skus[sku]}']}, sku)
+                continue
+            self.seen_skus[sku] = number
+            fields = {name: value for name, value in data.items() if name != 'sku'}
+            if 'category' in fields:
+                fields['category_id'] = fields.pop('category')
+            products.append(Product(shop_id=self.shop_id, sku=sku, **fields))
+            columns.append(tuple(name for name in UPSERT_FIELDS if name in data))
+        return products, columns
+
+    def upsert(self, products, columns):
+        skus = [product.sku for product in products]
+        # One statement per set of given columns, so updates never write the rest
+        groups = {}
+        for product, given in zip(products, columns):
+            groups.setdefault(given, []).append(product)
+        with transaction.atomic():
+            existing = Product.objects.filter(shop_id=self.shop_id, sku__in=skus).count()
+            for given, group in groups.items():
+                Product.objects.bulk_create(
+                    group,
+                    update_conflicts=True,
+                    unique_fields=['shop', 'sku'],
+                    update_fields=[*given, 'updated_at'],
+                )
+            self.counts['created_count'] += len(products) - existing
+            self.counts['updated_count'] += existing
+            self.save_progress()
+
+    def save_progress(self, **extra):
+        ProductImport.objects.filter(pk=self.product_import.pk).update(
+            errors=self.errors, **self.counts, **extra
+        )
+        self.product_import.errors = self.errors
+        for name, value in {**self.counts, **extra}.items():
+            setattr(self.product_import, name, value)
+        self.progress(self.product_import)
+
+    def run(self, fileobj):
+        rows = iter_rows(fileobj, self.product_import.format)
+        while chunk := list(islice(rows, self.chunk_size)):
+            # Keep the job claimed while a large file is still going
+            heartbeat()
+            self.counts['processed_rows'] += len(chunk)
+            products, columns = self.validate(chunk)
+            if products:
+                self.upsert(products, columns)
+            else:
+                self.save_progress()
+
+
+def run_import(import_id, chunk_size=CHUNK_SIZE, progress=None):
+    """Process a queued import; returns the finished ``ProductImport``."""
+    product_import = ProductImport.objects.get(pk=import_id)
+    ProductImport.objects.filter(pk=import_id).update(status='running', started_at=timezone.now())
+    importer = CatalogueImporter(product_import, chunk_size, progress)
+    try:
+        with default_storage.open(product_import.file, 'rb') as f:
+            importer.run(f)
+    except LeaseLost:
+        # Another worker has taken over this import
+        raise
+    except Exception as exc:
+        importer.error(None, {'file': [f'Import stopped: {exc}']})
+        importer.save_progress(status='failed', finished_at=timezone.now())
+        raise
+    finally:
+        # bulk_create sends no signals
+        bump_catalog_version()
+        invalidate_category_tree()
+
+    importer.save_progress(status='completed', finished_at=timezone.now())
+    default_storage.delete(product_import.file)
+    return product_import
@@ -0,0 +1,121 @@
+"""
+Batched stock and price updates for a seller's products.
+
+A batch is applied with one locking read and one UPDATE that sets each
+touched column through a CASE on the product id, so a few hundred stock
+adjustments cost two statements instead of a full save() per product.
+Stock changes are recorded as ``StockEvent`` rows and announced through
+``inventory_changed`` once the transaction commits.
+"""
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.dispatch import Signal
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Product, StockEvent
+
+MAX_BATCH_SIZE = 1000
+
+# Sent after commit with ``shop``, ``events`` (StockEvent list) and
+# ``price_changed`` (ids of products whose price changed).
+inventory_changed = Signal()
+
+
+class InventoryUpdateSerializer(serializers.Serializer):
+    """One product's stock and/or price change."""
+
+    product_id = serializers.UUIDField()
+    stock_delta = serializers.IntegerField(required=False)
+    stock_set = serializers.IntegerField(required=False, min_value=0)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    discount_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False, allow_null=True
+    )
+
+    def validate(self, attrs):
+        if 'stock_delta' in attrs and 'stock_set' in attrs:
+            raise serializers.ValidationError('Pass either stock_delta or stock_set, not both')
+        if len(attrs) == 1:
+            raise serializers.ValidationError('Nothing to update')
+        return attrs
+
+
+def _case(field, values):
+    """CASE expression setting ``field`` per product id, unchanged elsewhere."""
+    return Case(
+        *[When(id=pk, then=Value(value)) for pk, value in values.items()],
+        default=F(field),
+        output_field=Product._meta.get_field(field),
+    )
+
+
+def apply_inventory_updates(shop, updates):
+    """
+    Apply validated updates to products of ``shop``.
+
+    Returns ``(updated_ids, errors)``; ``errors`` lists updates that were
+    skipped with their index in the batch. Several updates to the same
+    product are applied in order.
+    """
+    errors = []
+    with transaction.atomic():
+        current = {
+            product.pk: product for product in
+            Product.objects.select_for_update()
+            .filter(shop=shop, id__in={update['product_id'] for update in updates})
+            .only('id', 'stock_quantity', 'price', 'discount_price')
+        }
+        original_stock = {pk: product.stock_quantity for pk, product in current.items()}
+        changed = {'stock_quantity': {}, 'price': {}, 'discount_price': {}}
+
+        for index, update in enumerate(updates):
+            product = current.get(update['product_id'])
+            if product is None:
+                errors.append({'index': index, 'product_id': str(update['product_id']),
+                               'errors': ['Product not found in your shop']})
+                continue
+
+            stock = product.stock_quantity
+            if 'stock_set' in update:
+                stock = update['stock_set']
+            elif 'stock_delta' in update:
+                stock += update['stock_delta']
+            price = update.get('price', product.price)
+            discount = update['discount_price'] if 'discount_price' in update else product.discount_price
+
+            problems = []
+            if stock < 0:
+                problems.append(f'Stock would drop below zero (currently {product.stock_quantity})')
+            if discount is not None and discount >= price:
+                problems.append('discount_price must be lower than price')
+            if problems:
+                errors.append({'index': index, 'product_id': str(product.pk), 'errors': problems})
+                continue
+
+            for field, value in (('stock_quantity', stock), ('price', price), ('discount_price', discount)):
+                if value != getattr(product, field) or product.pk in changed[field]:
+                    changed[field][product.pk] = value
+                    setattr(product, field, value)
+
+        updated_ids = set().union(*changed.values())
+        if updated_ids:
+            now = timezone.now()
+            Product.objects.filter(shop=shop, id__in=updated_ids).update(
+                updated_at=now,
+                **{field: _case(field, values) for field, values in changed.items() if values},
+            )
+            events = StockEvent.objects.bulk_create([
+                StockEvent(
+                    product_id=pk, shop=shop, old_quantity=original_stock[pk],
+                    new_quantity=current[pk].stock_quantity, created_at=now,
+                )
+                for pk in changed['stock_quantity']
+                if current[pk].stock_quantity != original_stock[pk]
+            ])
+            price_changed = set(changed['price']) | set(changed['discount_price'])
+            transaction.on_commit(lambda: inventory_changed.send(
+                sender=Product, shop=shop, events=events, price_changed=price_changed,
+            ))
+
+    return sorted(updated_ids, key=str), errors
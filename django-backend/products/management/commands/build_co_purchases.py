@@ -0,0 +1,15 @@
+"""
+Management command to rebuild the "customers also bought" index from order history.
+Run with: python manage.py build_co_purchases
+"""
+from django.core.management.base import BaseCommand
+
+from products.recommendations import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild co-purchase counts and related-product lists'
+
+    def handle(self, *args, **options):
+        pairs, products = rebuild()
+        self.stdout.write(f'Indexed {pairs} product pair(s) across {products} product(s)')
@@ -0,0 +1,38 @@
+"""
+Management command to rebuild product and shop popularity scores.
+Run with: python manage.py compute_rankings [--interval 900]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.ranking import CHUNK_SIZE, compute_rankings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild time-decayed popularity and trending scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Rows read and scores written per batch',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Keep running and rebuild every N seconds (0 runs once)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            products, shops = compute_rankings(options['chunk_size'])
+            self.stdout.write(
+                f'Scored {products} product(s) and {shops} shop(s) in {time.monotonic() - started:.1f}s'
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,57 @@
+"""
+Management command to import a shop's catalogue from a CSV or NDJSON file.
+Run with: python manage.py import_products --shop <shop id or owner email> catalogue.csv
+"""
+import os
+import uuid
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importer import CHUNK_SIZE, run_import
+from products.models import ProductImport
+from shops.models import Shop
+
+
+class Command(BaseCommand):
+    help = 'Upsert products by SKU from a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file')
+        parser.add_argument('--shop', required=True, help='Shop id or the owner\'s email')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Default: from the file extension')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows validated and upserted per batch')
+
+    def handle(self, *args, **options):
+        try:
+            lookup = {'id': uuid.UUID(options['shop'])}
+        except ValueError:
+            lookup = {'owner__email': options['shop']}
+        shop = Shop.objects.filter(**lookup).first()
+        if shop is None:
+            raise CommandError(f"Shop not found: {options['shop']}")
+
+        fmt = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        fmt = 'ndjson' if fmt == 'jsonl' else fmt
+        if fmt not in dict(ProductImport.FORMAT_CHOICES):
+            raise CommandError('Pass --format csv or --format ndjson')
+
+        product_import = ProductImport(shop=shop, format=fmt)
+        with open(options['path'], 'rb') as f:
+            product_import.file = default_storage.save(f'imports/{product_import.id}.{fmt}', File(f))
+        product_import.save()
+
+        def progress(current):
+            self.stdout.write(
+                f'  {current.processed_rows} rows: {current.created_count} created, '
+                f'{current.updated_count} updated, {current.error_count} errors'
+            )
+
+        result = run_import(product_import.id, options['chunk_size'], progress)
+        for error in result.errors:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']} ({error['sku']}): {error['errors']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f'Import {result.id} {result.status}: {result.created_count} created, '
+            f'{result.updated_count} updated, {result.error_count} errors'
+        ))
@@ -0,0 +1,43 @@
+# Generated migration for category materialized paths
+
+from django.db import migrations, models
+
+
+def build_paths(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    children = {}
+    for category in Category.objects.all():
+        children.setdefault(category.parent_id, []).append(category)
+
+    stack = [(category, '', 0) for category in children.get(None, [])]
+    while stack:
+        category, prefix, depth = stack.pop()
+        category.path = f'{prefix}{category.slug}/'
+        category.depth = depth
+        category.save(update_fields=['path', 'depth'])
+        stack.extend((child, category.path, depth + 1) for child in children.get(category.id, []))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_review'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(build_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['path'], name='categories_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated migration for product review aggregates
+
+from django.db import migrations, models
+from django.db.models import Avg, Count
+
+
+def backfill_ratings(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Review = apps.get_model('products', 'Review')
+    aggregates = (
+        Review.objects.filter(product__isnull=False).order_by()
+        .values('product_id').annotate(avg=Avg('rating'), count=Count('id'))
+    )
+    for row in aggregates:
+        Product.objects.filter(id=row['product_id']).update(
+            rating=round(row['avg'], 2), review_count=row['count']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_category_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='review_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated migration for product ranking scores
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductScore',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='products.product')),
+                ('popularity', models.FloatField(default=0)),
+                ('trending', models.FloatField(default=0)),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'product_scores',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='products_reviews_idx',
+        ),
+        migrations.AddIndex(
+            model_name='productscore',
+            index=models.Index(fields=['-popularity'], name='product_scores_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productscore',
+            index=models.Index(fields=['-trending'], name='product_scores_trending_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated migration for stock change events
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_import'),
+        ('shops', '0002_shop_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('old_quantity', models.IntegerField()),
+                ('new_quantity', models.IntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_events', to='products.product')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_events', to='shops.shop')),
+            ],
+            options={
+                'db_table': 'stock_events',
+                'indexes': [models.Index(fields=['shop', 'created_at'], name='stock_events_shop_idx')],
+            },
+        ),
+    ]
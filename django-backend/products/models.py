@@ -1,7 +1,10 @@
 """
 Models for products and categories.
 """
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce, Concat, Substr
 from django.conf import settings
 import uuid
 
@@ -15,6 +18,10 @@ class Category(models.Model):
     description = models.TextField(blank=True, null=True)
     icon = models.CharField(max_length=50, blank=True, null=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, blank=True, null=True, related_name='children')
+    # Materialized path of slugs from the root, e.g. "electronics/phones/".
+    # Maintained by save(); a subtree is every row whose path starts with its root's.
+    path = models.CharField(max_length=255, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(editable=False, default=0)
     is_active = models.BooleanField(default=True)
     sort_order = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -23,9 +30,52 @@ class Category(models.Model):
         verbose_name_plural = 'Categories'
         db_table = 'categories'
         ordering = ['sort_order', 'name']
+        indexes = [
+            # varchar_pattern_ops lets PostgreSQL use the index for LIKE 'prefix%'
+            models.Index(fields=['path'], name='categories_path_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return self.name
+    
+    def _build_path(self):
+        """Return ``(path, depth)`` for the category's current parent and slug."""
+        if self.parent_id is None:
+            return f'{self.slug}/', 0
+        parent = Category.objects.only('path', 'depth').get(pk=self.parent_id)
+        if self.path and parent.path.startswith(self.path):
+            raise ValueError('A category cannot be moved under itself or its descendants')
+        return f'{parent.path}{self.slug}/', parent.depth + 1
+    
+    def clean(self):
+        try:
+            self._build_path()
+        except ValueError as exc:
+            raise ValidationError({'parent': str(exc)})
+    
+    def save(self, *args, **kwargs):
+        old_path, old_depth = self.path, self.depth
+        self.path, self.depth = self._build_path()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'path', 'depth'}
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if old_path and old_path != self.path:
+                # Re-root the whole subtree in one UPDATE
+                Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(self.path), Substr('path', len(old_path) + 1),
+                                output_field=models.CharField()),
+                    depth=F('depth') + (self.depth - old_depth),
+                )
+    
+    def get_descendants(self, include_self=True):
+        """Return the categories in this category's subtree."""
+        queryset = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
 
 
 class Product(models.Model):
@@ -34,6 +84,8 @@ class Product(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     shop = models.ForeignKey('shops.Shop', on_delete=models.CASCADE, related_name='products')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='products')
+    # Seller's own stock-keeping unit; the upsert key for bulk imports
+    sku = models.CharField(max_length=64, blank=True, null=True)
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -42,12 +94,32 @@ class Product(models.Model):
     images = models.JSONField(default=list)
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
+    # Review aggregates, maintained by products.signals
+    rating = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    review_count = models.IntegerField(default=0)
+    # Stored copy of current_price so listings can sort on it in SQL
+    effective_price = models.GeneratedField(
+        expression=Coalesce('discount_price', 'price'),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'products'
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'sku'], name='products_shop_sku_uniq'),
+        ]
+        # One partial index per public sort in products.sorting
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='products_newest_idx', condition=Q(is_active=True)),
+            models.Index(fields=['effective_price', 'id'], name='products_price_idx', condition=Q(is_active=True)),
+            models.Index(
+                fields=['-rating', '-review_count', '-id'], name='products_rating_idx', condition=Q(is_active=True)
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -76,3 +148,121 @@ class Review(models.Model):
 
     def __str__(self):
         return f"Review by {self.user.email} - {self.rating} stars"
+
+
+class ProductScore(models.Model):
+    """Time-decayed ranking scores for a product, rebuilt by compute_rankings."""
+
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='score')
+    popularity = models.FloatField(default=0)
+    trending = models.FloatField(default=0)
+    units_sold = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'product_scores'
+        indexes = [
+            models.Index(fields=['-popularity'], name='product_scores_popular_idx'),
+            models.Index(fields=['-trending'], name='product_scores_trending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.popularity:.2f}/{self.trending:.2f}"
+
+
+class CoPurchase(models.Model):
+    """Number of orders containing both ``product`` and ``other``.
+
+    Each pair is stored in both directions so neighbours of a product are a
+    single index range scan.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    other = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'co_purchases'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'other'], name='co_purchases_pair_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['product', '-count'], name='co_purchases_top_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} + {self.other_id}: {self.count}"
+
+
+class RelatedProducts(models.Model):
+    """Top co-purchased neighbours of a product, best first."""
+
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='related')
+    neighbours = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'related_products'
+        verbose_name_plural = 'related products'
+
+    def __str__(self):
+        return f"{self.product_id} ({len(self.neighbours)} neighbours)"
+
+
+class ProductImport(models.Model):
+    """A bulk catalogue upload and its progress."""
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('ndjson', 'NDJSON'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    shop = models.ForeignKey('shops.Shop', on_delete=models.CASCADE, related_name='imports')
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    file = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'product_imports'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Import {self.id} for {self.shop_id} ({self.status})"
+
+
+class StockEvent(models.Model):
+    """A change to a product's stock level made through the inventory API."""
+
+    id = models.BigAutoField(primary_key=True)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_events')
+    shop = models.ForeignKey('shops.Shop', on_delete=models.CASCADE, related_name='stock_events')
+    old_quantity = models.IntegerField()
+    new_quantity = models.IntegerField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'stock_events'
+        indexes = [
+            models.Index(fields=['shop', 'created_at'], name='stock_events_shop_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.old_quantity} -> {self.new_quantity}"
@@ -0,0 +1,211 @@
+"""
+Offline popularity and trending scores.
+
+Order items and reviews from the scoring window are streamed in chunks and
+scored with NumPy: each sale counts its quantity, each review a weight
+scaled by its rating, both decayed exponentially by age. Popularity uses a
+long half-life and trending a short one. Results replace the contents of
+the ``product_scores`` and ``shop_scores`` tables, which listings and the
+home feed read instead of aggregating orders per request.
+"""
+from datetime import timedelta
+from itertools import islice
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from orders.models import OrderItem
+from shops.models import Shop, ShopScore
+from shops.serializers import ShopListSerializer
+
+from .models import Product, ProductScore, Review
+from .serializers import ProductListSerializer
+
+SCORING_WINDOW = timedelta(days=180)
+POPULARITY_HALF_LIFE_DAYS = 30.0
+TRENDING_HALF_LIFE_DAYS = 3.0
+# A five-star review counts as much as this many units sold
+REVIEW_WEIGHT = 2.0
+CHUNK_SIZE = 5000
+
+HOME_FEED_CACHE_KEY = 'products:home_feed'
+RANKING_VERSION_KEY = 'products:ranking_version'
+HOME_FEED_TIMEOUT = 300
+HOME_FEED_SIZE = 12
+HOME_FEED_SHOPS = 8
+
+SECONDS_PER_DAY = 86400.0
+
+
+class ScoreAccumulator:
+    """Running per-key totals of decayed popularity, trending and units sold."""
+
+    def __init__(self):
+        self.index = {}
+        self.totals = np.zeros((3, 0))
+
+    def add(self, keys, popularity, trending, units):
+        codes = np.fromiter(
+            (self.index.setdefault(key, len(self.index)) for key in keys), dtype=np.intp, count=len(keys)
+        )
+        size = len(self.index)
+        if size > self.totals.shape[1]:
+            self.totals = np.pad(self.totals, ((0, 0), (0, size - self.totals.shape[1])))
+        for row, weights in enumerate((popularity, trending, units)):
+            self.totals[row] += np.bincount(codes, weights=weights, minlength=size)
+
+    def items(self):
+        popularity, trending, units = self.totals
+        for key, code in self.index.items():
+            yield key, float(popularity[code]), float(trending[code]), int(round(units[code]))
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _ages_in_days(timestamps, now):
+    seconds = np.fromiter((ts.timestamp() for ts in timestamps), dtype=float, count=len(timestamps))
+    return np.maximum(now.timestamp() - seconds, 0.0) / SECONDS_PER_DAY
+
+
+def _decay(weights, ages, half_life_days):
+    return weights * np.exp2(-ages / half_life_days)
+
+
+def score_sales(products, shops, now, chunk_size=CHUNK_SIZE):
+    """Accumulate decayed units sold from non-cancelled orders in the window."""
+    rows = (
+        OrderItem.objects.filter(
+            product__isnull=False, order__created_at__gte=now - SCORING_WINDOW
+        )
+        .exclude(order__status='cancelled')
+        .values_list('product_id', 'product__shop_id', 'quantity', 'order__created_at')
+        .iterator(chunk_size=chunk_size)
+    )
+    for chunk in _chunks(rows, chunk_size):
+        product_ids, shop_ids, quantities, created = zip(*chunk)
+        units = np.asarray(quantities, dtype=float)
+        ages = _ages_in_days(created, now)
+        popularity = _decay(units, ages, POPULARITY_HALF_LIFE_DAYS)
+        trending = _decay(units, ages, TRENDING_HALF_LIFE_DAYS)
+        products.add(product_ids, popularity, trending, units)
+        shops.add(shop_ids, popularity, trending, units)
+
+
+def score_reviews(products, shops, now, chunk_size=CHUNK_SIZE):
+    """Accumulate decayed review weight; product reviews also count for the shop."""
+    rows = (
+        Review.objects.filter(created_at__gte=now - SCORING_WINDOW)
+        .values_list('product_id', 'product__shop_id', 'shop_id', 'rating', 'created_at')
+        .iterator(chunk_size=chunk_size)
+    )
+    for chunk in _chunks(rows, chunk_size):
+        product_ids, product_shop_ids, shop_ids, ratings, created = zip(*chunk)
+        weights = np.asarray(ratings, dtype=float) / 5.0 * REVIEW_WEIGHT
+        ages = _ages_in_days(created, now)
+        popularity = _decay(weights, ages, POPULARITY_HALF_LIFE_DAYS)
+        trending = _decay(weights, ages, TRENDING_HALF_LIFE_DAYS)
+        units = np.zeros(len(chunk))
+
+        has_product = np.fromiter((pk is not None for pk in product_ids), dtype=bool, count=len(chunk))
+        if has_product.any():
+            products.add(
+                [pk for pk in product_ids if pk is not None],
+                popularity[has_product], trending[has_product], units[has_product],
+            )
+        owners = [product_shop or shop for product_shop, shop in zip(product_shop_ids, shop_ids)]
+        has_shop = np.fromiter((pk is not None for pk in owners), dtype=bool, count=len(chunk))
+        if has_shop.any():
+            shops.add(
+                [pk for pk in owners if pk is not None],
+                popularity[has_shop], trending[has_shop], units[has_shop],
+            )
+
+
+def _save_scores(score_model, target_model, field, accumulator, now, batch_size):
+    """Upsert scores in batches, then drop rows that were not recomputed."""
+    items = list(accumulator.items())
+    with transaction.atomic():
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            # Rows deleted since the scores were read would violate the FK
+            existing = set(
+                target_model.objects.filter(pk__in=[key for key, *_ in batch]).values_list('pk', flat=True)
+            )
+            score_model.objects.bulk_create(
+                [
+                    score_model(
+                        **{f'{field}_id': key},
+                        popularity=popularity,
+                        trending=trending,
+                        units_sold=units,
+                        computed_at=now,
+                    )
+                    for key, popularity, trending, units in batch
+                    if key in existing
+                ],
+                update_conflicts=True,
+                unique_fields=[field],
+                update_fields=['popularity', 'trending', 'units_sold', 'computed_at'],
+            )
+        score_model.objects.filter(computed_at__lt=now).delete()
+    return len(items)
+
+
+def ranking_version():
+    return cache.get_or_set(RANKING_VERSION_KEY, 1, None)
+
+
+def bump_ranking_version():
+    """Invalidate ETags of listings ordered by score."""
+    try:
+        cache.incr(RANKING_VERSION_KEY)
+    except ValueError:
+        cache.set(RANKING_VERSION_KEY, 1, None)
+
+
+def compute_rankings(chunk_size=CHUNK_SIZE):
+    """Rebuild product and shop scores; returns ``(products, shops)`` scored."""
+    now = timezone.now()
+    products, shops = ScoreAccumulator(), ScoreAccumulator()
+    score_sales(products, shops, now, chunk_size)
+    score_reviews(products, shops, now, chunk_size)
+
+    scored = (
+        _save_scores(ProductScore, Product, 'product', products, now, chunk_size),
+        _save_scores(ShopScore, Shop, 'shop', shops, now, chunk_size),
+    )
+    cache.delete(HOME_FEED_CACHE_KEY)
+    bump_ranking_version()
+    return scored
+
+
+def get_home_feed():
+    """Return the cached trending, popular and top-shop sections of the home page."""
+    feed = cache.get(HOME_FEED_CACHE_KEY)
+    if feed is not None:
+        return feed
+
+    products = Product.objects.filter(
+        is_active=True, score__isnull=False
+    ).select_related('shop', 'category', 'score')
+    top_shops = Shop.objects.filter(
+        is_active=True, score__isnull=False
+    ).order_by('-score__popularity')[:HOME_FEED_SHOPS]
+
+    feed = {
+        'trending': ProductListSerializer(
+            products.order_by('-score__trending')[:HOME_FEED_SIZE], many=True
+        ).data,
+        'popular': ProductListSerializer(
+            products.order_by('-score__popularity')[:HOME_FEED_SIZE], many=True
+        ).data,
+        'top_shops': ShopListSerializer(top_shops, many=True).data,
+    }
+    cache.set(HOME_FEED_CACHE_KEY, feed, HOME_FEED_TIMEOUT)
+    return feed
@@ -0,0 +1,135 @@
+"""
+"Customers also bought" recommendations.
+
+``CoPurchase`` counts how many orders contain each pair of products. New
+orders bump their pairs incrementally (the ``products.record_co_purchases``
+job) and refresh the top-K neighbour list stored per product in
+``RelatedProducts``; ``build_co_purchases`` rebuilds everything from order
+history. Requests read the neighbour list through the cache and never
+aggregate order items.
+"""
+from collections import Counter, defaultdict
+from itertools import combinations, groupby
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from orders.models import OrderItem
+
+from .models import CoPurchase, Product, RelatedProducts
+from .serializers import ProductListSerializer
+
+TOP_K = 12
+# Orders with more distinct products than this contribute no pairs; they are
+# bulk purchases and would add O(n^2) rows of noise.
+MAX_ORDER_PRODUCTS = 50
+BATCH_SIZE = 1000
+
+RELATED_CACHE_TIMEOUT = 600
+
+
+def related_cache_key(product_id):
+    return f'products:related:{product_id}'
+
+
+def _pairs(product_ids):
+    for a, b in combinations(sorted(set(product_ids)), 2):
+        yield a, b
+        yield b, a
+
+
+def refresh_neighbours(product_ids):
+    """Recompute the stored top-K list for each product and drop its cached response."""
+    for product_id in product_ids:
+        neighbours = list(
+            CoPurchase.objects.filter(product_id=product_id)
+            .order_by('-count', 'other_id')
+            .values_list('other_id', flat=True)[:TOP_K]
+        )
+        RelatedProducts.objects.update_or_create(
+            product_id=product_id, defaults={'neighbours': [str(pk) for pk in neighbours]}
+        )
+    cache.delete_many([related_cache_key(pk) for pk in product_ids])
+
+
+def record_order(order_id):
+    """Add the product pairs of one order to the co-purchase counts."""
+    product_ids = set(
+        OrderItem.objects.filter(order_id=order_id, product__isnull=False).values_list('product_id', flat=True)
+    )
+    if not 2 <= len(product_ids) <= MAX_ORDER_PRODUCTS:
+        return
+
+    with transaction.atomic():
+        CoPurchase.objects.bulk_create(
+            [CoPurchase(product_id=a, other_id=b) for a, b in _pairs(product_ids)],
+            ignore_conflicts=True,
+        )
+        # Every stored pair within the set belongs to this order; self-pairs never exist
+        CoPurchase.objects.filter(
+            product_id__in=product_ids, other_id__in=product_ids
+        ).update(count=F('count') + 1)
+        refresh_neighbours(product_ids)
+
+
+def rebuild():
+    """Rebuild all co-purchase counts and neighbour lists from order history."""
+    counts = Counter()
+    items = (
+        OrderItem.objects.filter(product__isnull=False)
+        .order_by('order_id')
+        .values_list('order_id', 'product_id')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    for _, rows in groupby(items, key=lambda row: row[0]):
+        product_ids = {product_id for _, product_id in rows}
+        if len(product_ids) <= MAX_ORDER_PRODUCTS:
+            counts.update(_pairs(product_ids))
+
+    neighbours = defaultdict(list)
+    for (a, b), count in counts.items():
+        neighbours[a].append((-count, str(b)))
+
+    with transaction.atomic():
+        CoPurchase.objects.all().delete()
+        RelatedProducts.objects.all().delete()
+        CoPurchase.objects.bulk_create(
+            (CoPurchase(product_id=a, other_id=b, count=count) for (a, b), count in counts.items()),
+            batch_size=BATCH_SIZE,
+        )
+        RelatedProducts.objects.bulk_create(
+            (
+                RelatedProducts(product_id=pk, neighbours=[other for _, other in sorted(ranked)[:TOP_K]])
+                for pk, ranked in neighbours.items()
+            ),
+            batch_size=BATCH_SIZE,
+        )
+    cache.delete_many([related_cache_key(pk) for pk in neighbours])
+    return len(counts), len(neighbours)
+
+
+def get_related(product):
+    """Return serialized related products, padded with same-category products."""
+    key = related_cache_key(product.pk)
+    related = cache.get(key)
+    if related is not None:
+        return related
+
+    neighbour_ids = (
+        RelatedProducts.objects.filter(product_id=product.pk).values_list('neighbours', flat=True).first() or []
+    )
+    products = Product.objects.filter(is_active=True).select_related('shop', 'category')
+    by_id = {str(p.pk): p for p in products.filter(id__in=neighbour_ids)}
+    chosen = [by_id[pk] for pk in neighbour_ids if pk in by_id]
+
+    if len(chosen) < TOP_K and product.category_id:
+        chosen += list(
+            products.filter(category_id=product.category_id)
+            .exclude(id__in=[product.pk, *by_id])
+            .order_by('-created_at')[:TOP_K - len(chosen)]
+        )
+
+    related = ProductListSerializer(chosen, many=True).data
+    cache.set(key, related, RELATED_CACHE_TIMEOUT)
+    return related
@@ -2,13 +2,14 @@
 Serializers for products and categories.
 """
 from rest_framework import serializers
-from .models import Category, Product, Review
+from images.serializers import ImageSetField
+from .models import Category, Product, ProductImport, Review, StockEvent
 
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'description', 'icon', 'parent', 'is_active', 'sort_order']
+        fields = ['id', 'name', 'slug', 'description', 'icon', 'parent', 'path', 'depth', 'is_active', 'sort_order']
 
 
 class ProductListSerializer(serializers.ModelSerializer):
@@ -17,13 +18,14 @@ class ProductListSerializer(serializers.ModelSerializer):
     shop = serializers.SerializerMethodField()
     category = CategorySerializer(read_only=True)
     current_price = serializers.ReadOnlyField()
+    image_sets = ImageSetField(source='images')
     
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'description', 'price', 'discount_price', 'current_price',
-            'stock_quantity', 'images', 'is_active', 'is_featured', 'created_at',
-            'shop', 'category'
+            'stock_quantity', 'images', 'image_sets', 'is_active', 'is_featured', 'rating', 'review_count',
+            'created_at', 'shop', 'category'
         ]
     
     def get_shop(self, obj):
@@ -54,13 +56,14 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     reviews = ReviewSerializer(many=True, read_only=True)
     current_price = serializers.ReadOnlyField()
+    image_sets = ImageSetField(source='images')
     
     class Meta:
         model = Product
         fields = [
-            'id', 'name', 'description', 'price', 'discount_price', 'current_price',
-            'stock_quantity', 'images', 'is_active', 'is_featured', 'created_at',
-            'shop', 'category', 'reviews'
+            'id', 'sku', 'name', 'description', 'price', 'discount_price', 'current_price',
+            'stock_quantity', 'images', 'image_sets', 'is_active', 'is_featured', 'rating', 'review_count',
+            'created_at', 'shop', 'category', 'reviews'
         ]
     
     def get_shop(self, obj):
@@ -80,12 +83,42 @@ class ProductCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = [
-            'name', 'description', 'price', 'discount_price',
+            'sku', 'name', 'description', 'price', 'discount_price',
             'stock_quantity', 'category_id', 'images', 'is_featured'
         ]
     
+    def validate_sku(self, value):
+        if not value:
+            return None
+        shop = self.instance.shop if self.instance else self.context['request'].user.shop
+        duplicates = Product.objects.filter(shop=shop, sku=value)
+        if self.instance:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError('Your shop already has a product with this SKU')
+        return value
+    
     def create(self, validated_data):
         category_id = validated_data.pop('category_id')
         validated_data['category_id'] = category_id
         validated_data['shop'] = self.context['request'].user.shop
         return super().create(validated_data)
+
+
+class ProductImportSerializer(serializers.ModelSerializer):
+    """Serializer for bulk import progress and its per-row error report."""
+    
+    class Meta:
+        model = ProductImport
+        fields = [
+            'id', 'format', 'status', 'processed_rows', 'created_count', 'updated_count',
+            'error_count', 'errors', 'created_at', 'started_at', 'finished_at'
+        ]
+
+
+class StockEventSerializer(serializers.ModelSerializer):
+    """Serializer for stock change events."""
+    
+    class Meta:
+        model = StockEvent
+        fields = ['id', 'product_id', 'old_quantity', 'new_quantity', 'created_at']
@@ -0,0 +1,64 @@
+"""
+Signal handlers for products and categories.
+"""
+from django.core.cache import cache
+from django.db.models import Avg, Count
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from shops.models import Shop
+
+from .categories import invalidate_category_tree
+from .facets import FACET_FIELDS, bump_catalog_version
+from .inventory import inventory_changed
+from .models import Category, Product, Review
+from .ranking import HOME_FEED_CACHE_KEY
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    invalidate_category_tree()
+    # Product responses embed category names
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Shop)
+def shop_changed(sender, **kwargs):
+    # Product responses embed shop names and ratings
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_changed(sender, update_fields=None, **kwargs):
+    # Stock-only saves (checkout) show up in updated_at-based ETags already
+    if update_fields is not None and not FACET_FIELDS & update_fields:
+        return
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    """Keep the product's rating and review count in step with its reviews."""
+    if instance.product_id is None:
+        return
+    stats = Review.objects.filter(product_id=instance.product_id).aggregate(
+        avg=Avg('rating'), count=Count('id')
+    )
+    Product.objects.filter(id=instance.product_id).update(
+        rating=round(stats['avg'] or 0, 2),
+        review_count=stats['count'],
+        updated_at=timezone.now(),
+    )
+    bump_catalog_version()
+
+
+@receiver(inventory_changed)
+def inventory_updated(sender, price_changed, **kwargs):
+    """Drop cached listings that embed prices or stock levels."""
+    if price_changed:
+        bump_catalog_version()
+    cache.delete(HOME_FEED_CACHE_KEY)
@@ -0,0 +1,91 @@
+"""
+Public sort keys for product listings.
+
+Only the orderings registered here can be requested. Each ends in a unique
+tie-breaker so keyset cursors are stable, and each is backed by one of the
+partial indexes declared on ``Product`` or by the indexed score table.
+"""
+from django.db.models import FloatField, Value
+from django.db.models.functions import Cast, Coalesce, Cos, Power, Radians, Sqrt
+from rest_framework.exceptions import ValidationError
+
+DEFAULT_SORT = 'newest'
+
+# Kilometres per degree of latitude
+KM_PER_DEGREE = 111.32
+
+
+class SortOption:
+    """An ordering exposed to clients as a ``sort`` key."""
+
+    def __init__(self, ordering, annotate=None, scored=False):
+        self.ordering = ordering
+        self.annotate = annotate
+        # Ordered by ProductScore, which changes with each ranking run
+        self.scored = scored
+
+    def apply(self, queryset, params):
+        if self.annotate is not None:
+            queryset = self.annotate(queryset, params)
+        return queryset.order_by(*self.ordering)
+
+    def position(self, obj):
+        """Return the values of ``obj`` for each field in the ordering."""
+        return [getattr(obj, field.lstrip('-')) for field in self.ordering]
+
+
+def _coordinate(params, name):
+    try:
+        return float(params[name])
+    except (KeyError, TypeError, ValueError):
+        raise ValidationError({name: 'Required as a number when sorting by distance'})
+
+
+def annotate_distance(queryset, params):
+    """Annotate ``distance`` (km) from ``lat``/``lng`` to each product's shop."""
+    lat = _coordinate(params, 'lat')
+    lng = _coordinate(params, 'lng')
+    # Equirectangular approximation; accurate to well under 1% at city scale
+    d_lat = Cast('shop__latitude', FloatField()) - lat
+    d_lng = (Cast('shop__longitude', FloatField()) - lng) * Cos(Radians(lat))
+    return queryset.filter(
+        shop__latitude__isnull=False, shop__longitude__isnull=False
+    ).annotate(
+        distance=Sqrt(Power(d_lat, 2) + Power(d_lng, 2)) * KM_PER_DEGREE
+    )
+
+
+def annotate_score(name):
+    """Annotate ``<name>_score`` from the precomputed ``ProductScore`` table."""
+    def annotate(queryset, params):
+        # Products created since the last ranking run have no score row yet
+        return queryset.annotate(**{f'{name}_score': Coalesce(f'score__{name}', Value(0.0))})
+    return annotate
+
+
+SORT_OPTIONS = {
+    'newest': SortOption(('-created_at', '-id')),
+    'price_asc': SortOption(('effective_price', 'id')),
+    'price_desc': SortOption(('-effective_price', '-id')),
+    'rating': SortOption(('-rating', '-review_count', '-id')),
+    # The storefront's "Popular" sort: best sellers first, by decayed units
+    # sold from the ranking run (there is no sales_count column)
+    'popular': SortOption(('-popularity_score', '-id'), annotate=annotate_score('popularity'), scored=True),
+    'trending': SortOption(('-trending_score', '-id'), annotate=annotate_score('trending'), scored=True),
+    'distance': SortOption(('distance', 'id'), annotate=annotate_distance),
+}
+
+
+def get_sort(params):
+    """Return the ``SortOption`` named by the ``sort`` parameter."""
+    key = params.get('sort') or DEFAULT_SORT
+    try:
+        return SORT_OPTIONS[key]
+    except KeyError:
+        raise ValidationError({'sort': f"Unknown sort '{key}'. Choose one of: {', '.join(SORT_OPTIONS)}"})
+
+
+# Earlier names, still sent by bookmarked storefront URLs and older clients
+SORT_OPTIONS['popularity'] = SORT_OPTIONS['popular']
+SORT_OPTIONS['price_low'] = SORT_OPTIONS['price_asc']
+SORT_OPTIONS['price_high'] = SORT_OPTIONS['price_desc']
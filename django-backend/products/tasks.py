@@ -0,0 +1,18 @@
+"""
+Background jobs for products.
+"""
+from core.jobs import task
+from .importer import run_import
+from .recommendations import record_order
+
+
+@task('products.record_co_purchases')
+def record_co_purchases(order_id):
+    """Fold a new order's product pairs into the recommendation index."""
+    record_order(order_id)
+
+
+@task('products.run_import', max_attempts=2, atomic=False)
+def import_catalogue(import_id):
+    """Process an uploaded catalogue file; each chunk commits on its own."""
+    run_import(import_id)
@@ -4,21 +4,35 @@ URL patterns for products app.
 from django.urls import path
 from .views import (
     CategoryListView,
+    CategoryTreeView,
     CategoryDetailView,
+    HomeFeedView,
+    InventoryUpdateView,
     ProductListView,
     ProductDetailView,
     ProductCreateView,
     ProductUpdateView,
     ProductDeleteView,
+    ProductImportView,
+    ProductImportDetailView,
+    RelatedProductsView,
     ReviewCreateView,
+    StockEventListView,
 )
 
 urlpatterns = [
     path('categories/', CategoryListView.as_view(), name='category-list'),
+    path('categories/tree/', CategoryTreeView.as_view(), name='category-tree'),
     path('categories/<uuid:pk>/', CategoryDetailView.as_view(), name='category-detail'),
     path('products/', ProductListView.as_view(), name='product-list'),
+    path('products/home-feed/', HomeFeedView.as_view(), name='product-home-feed'),
+    path('products/import/', ProductImportView.as_view(), name='product-import'),
+    path('products/import/<uuid:pk>/', ProductImportDetailView.as_view(), name='product-import-detail'),
+    path('products/inventory/', InventoryUpdateView.as_view(), name='product-inventory'),
+    path('products/stock-events/', StockEventListView.as_view(), name='product-stock-events'),
     path('products/create/', ProductCreateView.as_view(), name='product-create'),
     path('products/<uuid:pk>/', ProductDetailView.as_view(), name='product-detail'),
+    path('products/<uuid:pk>/related/', RelatedProductsView.as_view(), name='product-related'),
     path('products/<uuid:pk>/update/', ProductUpdateView.as_view(), name='product-update'),
     path('products/<uuid:pk>/delete/', ProductDeleteView.as_view(), name='product-delete'),
     path('reviews/', ReviewCreateView.as_view(), name='review-create'),
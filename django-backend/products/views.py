@@ -1,18 +1,40 @@
 """
 Views for products and categories.
 """
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.dateparse import parse_datetime
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Q
-from .models import Category, Product, Review
+from core.conditional import ConditionalGetMixin
+from core.jobs import enqueue
+from core.pagination import decode_cursor, encode_cursor, int_param, keyset_filter
+from core.sync import parse_since
+from core.write_queue import serialized_write
+from shops.models import Shop
+from .categories import get_category_tree
+from .facets import catalog_version, get_facets
+from .filters import filter_products
+from .inventory import MAX_BATCH_SIZE as MAX_INVENTORY_BATCH
+from .inventory import InventoryUpdateSerializer, apply_inventory_updates
+from .models import Category, Product, ProductImport, Review, StockEvent
+from .ranking import get_home_feed, ranking_version
+from .recommendations import get_related
 from .serializers import (
     CategorySerializer,
     ProductListSerializer,
     ProductDetailSerializer,
     ProductCreateSerializer,
+    ProductImportSerializer,
     ReviewSerializer,
+    StockEventSerializer,
 )
+from .sorting import get_sort
 
 
 class CategoryListView(generics.ListAPIView):
@@ -21,6 +43,17 @@ class CategoryListView(generics.ListAPIView):
     queryset = Category.objects.filter(is_active=True)
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
+    replica_reads = True
+
+
+class CategoryTreeView(APIView):
+    """Get active categories as a tree with product counts per subtree."""
+    
+    permission_classes = [permissions.AllowAny]
+    replica_reads = True
+    
+    def get(self, request):
+        return Response(get_category_tree())
 
 
 class CategoryDetailView(generics.RetrieveAPIView):
@@ -29,78 +62,122 @@ class CategoryDetailView(generics.RetrieveAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
+    replica_reads = True
 
 
-class ProductListView(generics.ListAPIView):
+MAX_PAGE_SIZE = 100
+
+
+class ProductListView(ConditionalGetMixin, generics.ListAPIView):
     """List products with filtering and search."""
     
     serializer_class = ProductListSerializer
     permission_classes = [permissions.AllowAny]
+    replica_reads = True
+    throttle_scope = 'catalogue'
+    shed_priority = 'low'
+    cache_public = True
+    cache_max_age = settings.CATALOGUE_MAX_AGE
+    query_budget = 7
+    # Deep offsets and facet counts are the slowest catalogue queries
+    statement_timeout = 5
 
     def get_queryset(self):
         queryset = Product.objects.filter(is_active=True).select_related('shop', 'category')
+        queryset = filter_products(queryset, self.request.query_params)
         
-        # Search
-        search = self.request.query_params.get('search')
-        if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) | Q(description__icontains=search)
-            )
-        
-        # Filter by category
-        category_id = self.request.query_params.get('category_id')
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-        
-        # Filter by price range
-        min_price = self.request.query_params.get('min_price')
-        max_price = self.request.query_params.get('max_price')
-        if min_price:
-            queryset = queryset.filter(price__gte=min_price)
-        if max_price:
-            queryset = queryset.filter(price__lte=max_price)
-        
-        # Featured products
-        featured = self.request.query_params.get('featured')
-        if featured:
-            queryset = queryset.filter(is_featured=True)
-        
-        # Sorting
-        sort = self.request.query_params.get('sort', '-created_at')
-        if sort == 'price_asc':
-            queryset = queryset.order_by('price')
-        elif sort == 'price_desc':
-            queryset = queryset.order_by('-price')
-        elif sort == 'newest':
-            queryset = queryset.order_by('-created_at')
-        else:
-            queryset = queryset.order_by(sort)
-        
-        return queryset
+        # Sorting, restricted to the registered index-backed orderings
+        self.sort = get_sort(self.request.query_params)
+        return self.sort.apply(queryset, self.request.query_params)
+    
+    def has_validators(self):
+        # A LIKE scan is too costly to run once more just for the ETag
+        return not self.request.query_params.get('search')
+    
+    def get_validator_version(self):
+        # Listings embed shop and category names; score sorts follow rankings
+        if get_sort(self.request.query_params).scored:
+            return catalog_version(), ranking_version()
+        return catalog_version()
     
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
         
-        # Pagination
-        limit = int(request.query_params.get('limit', 20))
-        offset = int(request.query_params.get('offset', 0))
+        # Pagination: keyset when a cursor is given, offset otherwise
+        limit = int_param(request.query_params, 'limit', 20, 1, MAX_PAGE_SIZE)
+        cursor = request.query_params.get('cursor')
+        
+        data = {}
+        if cursor:
+            values = decode_cursor(cursor, len(self.sort.ordering))
+            page = queryset.filter(keyset_filter(self.sort.ordering, values))
+        else:
+            offset = int_param(request.query_params, 'offset', 0, 0)
+            # Counted already when the ETag was computed
+            data['count'] = self.validator_count if self.validator_count is not None else queryset.count()
+            page = queryset[offset:]
         
-        total = queryset.count()
-        products = queryset[offset:offset + limit]
+        products = list(page[:limit + 1])
+        has_more = len(products) > limit
+        products = products[:limit]
         
         serializer = self.get_serializer(products, many=True)
-        return Response({
-            'results': serializer.data,
-            'count': total
-        })
+        data['results'] = serializer.data
+        data['next_cursor'] = encode_cursor(self.sort.position(products[-1])) if has_more else None
+        
+        # Filter sidebar counts, computed over the same filters
+        if request.query_params.get('facets'):
+            facet_queryset = filter_products(Product.objects.filter(is_active=True), request.query_params)
+            data['facets'] = get_facets(facet_queryset, request.query_params)
+        
+        return Response(data)
+
 
+class HomeFeedView(APIView):
+    """Trending and popular products and top shops for the home page."""
+    
+    permission_classes = [permissions.AllowAny]
+    replica_reads = True
+    throttle_scope = 'catalogue'
+    shed_priority = 'low'
+    query_budget = 4
+    
+    def get(self, request):
+        return Response(get_home_feed())
 
-class ProductDetailView(generics.RetrieveAPIView):
+
+class ProductDetailView(ConditionalGetMixin, generics.RetrieveAPIView):
     """Get product details."""
     
-    queryset = Product.objects.select_related('shop', 'category').prefetch_related('reviews')
+    queryset = Product.objects.select_related('shop', 'category').prefetch_related(
+        Prefetch('reviews', queryset=Review.objects.select_related('user'))
+    )
     serializer_class = ProductDetailSerializer
     permission_classes = [permissions.AllowAny]
+    replica_reads = True
+    throttle_scope = 'catalogue'
+    cache_public = True
+    cache_max_age = settings.CATALOGUE_MAX_AGE
+    query_budget = 4
+    
+    def get_validator_version(self):
+        return catalog_version()
+
+
+class RelatedProductsView(APIView):
+    """Products frequently bought together with a product."""
+    
+    permission_classes = [permissions.AllowAny]
+    replica_reads = True
+    throttle_scope = 'catalogue'
+    shed_priority = 'low'
+    query_budget = 5
+    
+    def get(self, request, pk):
+        product = Product.objects.filter(pk=pk, is_active=True).only('id', 'category_id').first()
+        if product is None:
+            return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(get_related(product))
 
 
 class ProductCreateView(generics.CreateAPIView):
@@ -118,6 +195,130 @@ class ProductCreateView(generics.CreateAPIView):
         return super().create(request, *args, **kwargs)
 
 
+class ProductImportView(APIView):
+    """Upload a CSV or NDJSON catalogue; rows are upserted by SKU in the background."""
+    
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    
+    def post(self, request):
+        shop = Shop.objects.filter(owner=request.user).first()
+        if shop is None:
+            return Response({'error': 'Only sellers can import products'}, status=status.HTTP_403_FORBIDDEN)
+        
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if upload.size > settings.PRODUCT_IMPORT_MAX_BYTES:
+            return Response({'error': 'File is too large'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        fmt = request.data.get('format') or upload.name.rsplit('.', 1)[-1].lower()
+        if fmt == 'jsonl':
+            fmt = 'ndjson'
+        if fmt not in dict(ProductImport.FORMAT_CHOICES):
+            return Response(
+                {'error': 'format must be csv or ndjson'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        with transaction.atomic():
+            product_import = ProductImport(shop=shop, created_by=request.user, format=fmt)
+            product_import.file = default_storage.save(f'imports/{product_import.id}.{fmt}', upload)
+            product_import.save()
+            enqueue('products.run_import', {'import_id': str(product_import.id)})
+        
+        return Response(ProductImportSerializer(product_import).data, status=status.HTTP_202_ACCEPTED)
+
+
+class ProductImportDetailView(generics.RetrieveAPIView):
+    """Progress and error report of a catalogue import."""
+    
+    serializer_class = ProductImportSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        return ProductImport.objects.filter(shop__owner=self.request.user)
+
+
+class InventoryUpdateView(APIView):
+    """Apply a batch of stock and price changes to the seller's products."""
+    
+    permission_classes = [permissions.IsAuthenticated]
+    
+    @serialized_write
+    def post(self, request):
+        shop = Shop.objects.filter(owner=request.user).first()
+        if shop is None:
+            return Response({'error': 'Only sellers can update inventory'}, status=status.HTTP_403_FORBIDDEN)
+        
+        updates = request.data.get('updates')
+        if not isinstance(updates, list) or not updates:
+            return Response({'error': 'updates must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(updates) > MAX_INVENTORY_BATCH:
+            return Response(
+                {'error': f'At most {MAX_INVENTORY_BATCH} updates per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        valid, errors = [], []
+        for index, update in enumerate(updates):
+            serializer = InventoryUpdateSerializer(data=update)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+        
+        updated, skipped = apply_inventory_updates(shop, [update for _, update in valid])
+        # Map positions within the valid subset back to the request's indexes
+        for error in skipped:
+            error['index'] = valid[error['index']][0]
+        
+        return Response({
+            'updated': [str(pk) for pk in updated],
+            'errors': sorted(errors + skipped, key=lambda error: error['index'])
+        })
+
+
+class StockEventListView(generics.ListAPIView):
+    """
+    Stock changes in the seller's shop, oldest first.
+
+    Pass ``since`` to start after a point in time, then ``cursor`` with the
+    returned ``next_cursor`` until it is null. Events of one inventory batch
+    share a timestamp, so pages are cut on ``(created_at, id)``.
+    """
+    
+    serializer_class = StockEventSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    ordering = ('created_at', 'id')
+    
+    def get_queryset(self):
+        queryset = StockEvent.objects.filter(shop__owner=self.request.user).order_by(*self.ordering)
+        cursor = self.request.query_params.get('cursor')
+        if cursor:
+            created_at, event_id = decode_cursor(cursor, len(self.ordering))
+            try:
+                position = (parse_datetime(created_at), int(event_id))
+            except (TypeError, ValueError):
+                position = (None, None)
+            if position[0] is None:
+                raise ValidationError({'cursor': 'Invalid cursor'})
+            return queryset.filter(keyset_filter(self.ordering, position))
+        since = parse_since(self.request)
+        if since is not None:
+            queryset = queryset.filter(created_at__gt=since)
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        events = list(self.get_queryset()[:MAX_INVENTORY_BATCH + 1])
+        has_more = len(events) > MAX_INVENTORY_BATCH
+        events = events[:MAX_INVENTORY_BATCH]
+        return Response({
+            'results': self.get_serializer(events, many=True).data,
+            'next_cursor': encode_cursor([events[-1].created_at, events[-1].id]) if has_more else None,
+        })
+
+
 class ProductUpdateView(generics.UpdateAPIView):
     """Update a product (seller only)."""
     
@@ -0,0 +1,28 @@
+# Generated migration for shop ranking scores
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shops', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShopScore',
+            fields=[
+                ('shop', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='shops.shop')),
+                ('popularity', models.FloatField(default=0)),
+                ('trending', models.FloatField(default=0)),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'shop_scores',
+                'indexes': [models.Index(fields=['-popularity'], name='shop_scores_popular_idx'), models.Index(fields=['-trending'], name='shop_scores_trending_idx')],
+            },
+        ),
+    ]
@@ -33,3 +33,23 @@ class Shop(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class ShopScore(models.Model):
+    """Time-decayed ranking scores for a shop, rebuilt by compute_rankings."""
+
+    shop = models.OneToOneField(Shop, on_delete=models.CASCADE, primary_key=True, related_name='score')
+    popularity = models.FloatField(default=0)
+    trending = models.FloatField(default=0)
+    units_sold = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'shop_scores'
+        indexes = [
+            models.Index(fields=['-popularity'], name='shop_scores_popular_idx'),
+            models.Index(fields=['-trending'], name='shop_scores_trending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.shop_id}: {self.popularity:.2f}/{self.trending:.2f}"
@@ -2,16 +2,19 @@
 Serializers for shops.
 """
 from rest_framework import serializers
+from images.serializers import ImageSetField
 from .models import Shop
 
 
 class ShopListSerializer(serializers.ModelSerializer):
     """Serializer for shop list."""
     
+    logo_image = ImageSetField(source='logo_url')
+    
     class Meta:
         model = Shop
         fields = [
-            'id', 'name', 'description', 'logo_url', 'address',
+            'id', 'name', 'description', 'logo_url', 'logo_image', 'address',
             'is_verified', 'rating', 'total_reviews'
         ]
 
@@ -19,12 +22,15 @@ class ShopListSerializer(serializers.ModelSerializer):
 class ShopDetailSerializer(serializers.ModelSerializer):
     """Serializer for shop details."""
     
+    logo_image = ImageSetField(source='logo_url')
+    banner_image = ImageSetField(source='banner_url')
+    
     class Meta:
         model = Shop
         fields = [
-            'id', 'name', 'description', 'logo_url', 'banner_url',
-            'address', 'latitude', 'longitude', 'phone', 'email',
-            'is_verified', 'is_active', 'rating', 'total_reviews',
+            'id', 'name', 'description', 'logo_url', 'logo_image',
+            'banner_url', 'banner_image', 'address', 'latitude', 'longitude',
+            'phone', 'email', 'is_verified', 'is_active', 'rating', 'total_reviews',
             'created_at', 'updated_at'
         ]
 
@@ -4,7 +4,12 @@ Views for shops.
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Sum, Count, Q
+from django.conf import settings
+from django.db.models import Sum, Count, Q, Prefetch
+from django.utils import timezone
+from core.conditional import ConditionalGetMixin
+from core.pagination import CreatedAtCursorPagination
+from core.sync import parse_since, next_since
 from .models import Shop
 from .serializers import (
     ShopListSerializer,
@@ -14,11 +19,16 @@ from .serializers import (
 )
 
 
-class ShopListView(generics.ListAPIView):
+class ShopListView(ConditionalGetMixin, generics.ListAPIView):
     """List all shops."""
     
     serializer_class = ShopListSerializer
     permission_classes = [permissions.AllowAny]
+    replica_reads = True
+    throttle_scope = 'catalogue'
+    shed_priority = 'low'
+    cache_public = True
+    cache_max_age = settings.CATALOGUE_MAX_AGE
 
     def get_queryset(self):
         queryset = Shop.objects.filter(is_active=True)
@@ -36,12 +46,15 @@ class ShopListView(generics.ListAPIView):
         return queryset
 
 
-class ShopDetailView(generics.RetrieveAPIView):
+class ShopDetailView(ConditionalGetMixin, generics.RetrieveAPIView):
     """Get shop details."""
     
     queryset = Shop.objects.all()
     serializer_class = ShopDetailSerializer
     permission_classes = [permissions.AllowAny]
+    replica_reads = True
+    cache_public = True
+    cache_max_age = settings.CATALOGUE_MAX_AGE
 
 
 class MyShopView(generics.RetrieveUpdateAPIView):
@@ -100,39 +113,72 @@ class MyShopStatsView(APIView):
         except Shop.DoesNotExist:
             return Response({'error': 'Shop not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        from orders.models import Order
+        from orders.models import ArchivedOrder, Order
         
+        # Totals span the archive too, which holds old closed orders
+        archived = ArchivedOrder.objects.filter(shop=shop).aggregate(
+            count=Count('id'), revenue=Sum('total_amount', filter=Q(status='delivered'))
+        )
         stats = {
             'total_products': shop.products.count(),
-            'total_orders': Order.objects.filter(shop=shop).count(),
+            'total_orders': Order.objects.filter(shop=shop).count() + archived['count'],
             'pending_orders': Order.objects.filter(shop=shop, status='pending').count(),
-            'total_revenue': Order.objects.filter(
+            'total_revenue': (Order.objects.filter(
                 shop=shop, status='delivered'
-            ).aggregate(total=Sum('total_amount'))['total'] or 0
+            ).aggregate(total=Sum('total_amount'))['total'] or 0) + (archived['revenue'] or 0)
         }
         
         return Response(stats)
 
 
 class MyShopOrdersView(generics.ListAPIView):
-    """Get shop orders."""
+    """Seller order inbox.
+    
+    Newest first with cursor pagination (``cursor``, ``limit``). Pass
+    ``since`` (the value returned by the previous call) to receive only
+    orders created or changed after it. Each page carries per-status counts
+    for the whole shop.
+    """
     
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
+    query_budget = 5
     
     def get_serializer_class(self):
-        from orders.serializers import OrderSerializer
-        return OrderSerializer
+        from orders.serializers import SellerOrderSerializer
+        return SellerOrderSerializer
     
     def get_queryset(self):
+        from orders.models import Order
+        queryset = Order.objects.filter(shop=self.shop).select_related('shop', 'user').prefetch_related(
+            Prefetch('items')
+        )
+        
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        
+        since = parse_since(self.request)
+        if since:
+            queryset = queryset.filter(updated_at__gt=since)
+        
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
         from orders.models import Order
         try:
-            shop = self.request.user.shop
-            queryset = Order.objects.filter(shop=shop).select_related('user').prefetch_related('items')
-            
-            status_filter = self.request.query_params.get('status')
-            if status_filter:
-                queryset = queryset.filter(status=status_filter)
-            
-            return queryset
+            self.shop = request.user.shop
         except Shop.DoesNotExist:
-            return Order.objects.none()
+            return Response({'error': 'Shop not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        started_at = timezone.now()
+        page = self.paginate_queryset(self.get_queryset())
+        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        
+        counts = dict(
+            Order.objects.filter(shop=self.shop).order_by()
+            .values_list('status').annotate(count=Count('id'))
+        )
+        response.data['counts'] = {value: counts.get(value, 0) for value, _ in Order.STATUS_CHOICES}
+        response.data['since'] = next_since(started_at)
+        return response
@@ -2,9 +2,11 @@
 Django settings for Sokoni Kiganjani project.
 """
 import os
+import sys
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 load_dotenv()
 
@@ -38,15 +40,21 @@ INSTALLED_APPS = [
     'orders',
     'shops',
     'deliveries',
+    'core',
+    'images',
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.RequestMetricsMiddleware',
+    'core.throttling.LoadSheddingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db_routing.ReplicaRoutingMiddleware',
+    'core.db_timeouts.StatementTimeoutMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -90,6 +98,21 @@ if USE_SQLITE:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+    # Single-box production profile: WAL lets reads proceed during writes,
+    # and write transactions take the lock up front (BEGIN IMMEDIATE) so
+    # they queue on busy_timeout instead of failing on lock upgrade.
+    if os.getenv('SQLITE_TUNING', 'True') == 'True':
+        DATABASES['default']['OPTIONS'] = {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '20')),
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', str(128 * 1024 * 1024)))};"
+                f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_KB', '32000'))};"
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        }
 else:
     DATABASES = {
         'default': {
@@ -99,6 +122,64 @@ else:
             'PASSWORD': os.getenv('DB_PASSWORD', ''),
             'HOST': os.getenv('DB_HOST', 'localhost'),
             'PORT': os.getenv('DB_PORT', '5432'),
+            # Persistent connections, verified before reuse by each request
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Server-side limit for any one statement; views may override
+                # it with statement_timeout (core.db_timeouts)
+                'options': f"-c statement_timeout={int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000'))}",
+            },
+        }
+    }
+
+    # Django's built-in psycopg 3 connection pool, shared by a process's
+    # threads. Pooled connections replace persistent ones.
+    if os.getenv('DB_POOL', 'False') == 'True':
+        from psycopg_pool import ConnectionPool
+
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            # Seconds to wait for a free connection before answering 503
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '5')),
+            'check': ConnectionPool.check_connection,
+        }
+
+# Queue hot write endpoints (core.write_queue) instead of letting them
+# contend for SQLite's single write lock
+SQLITE_SERIALIZE_WRITES = os.getenv('SQLITE_SERIALIZE_WRITES', 'True') == 'True'
+SQLITE_WRITE_QUEUE_TIMEOUT = float(os.getenv('SQLITE_WRITE_QUEUE_TIMEOUT', '15'))
+
+# Read replicas (core.db_routing): comma-separated SQLite files or PostgreSQL
+# hosts, exposed as replica1, replica2, ... Tests read through the primary.
+for index, replica in enumerate(filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        ('NAME' if USE_SQLITE else 'HOST'): BASE_DIR / replica if USE_SQLITE else replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.db_routing.PrimaryReplicaRouter']
+# Seconds a client reads from the primary after writing, covering replica lag
+READ_YOUR_WRITES_SECONDS = int(os.getenv('READ_YOUR_WRITES_SECONDS', '5'))
+REPLICA_HEALTH_CHECK_INTERVAL = float(os.getenv('REPLICA_HEALTH_CHECK_INTERVAL', '10'))
+
+# Cache (Redis when REDIS_URL is set, otherwise per-process memory)
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         }
     }
 
@@ -124,12 +205,24 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# HTTP caching (core.conditional): seconds clients and shared caches may reuse
+# catalogue responses before revalidating them with If-None-Match
+CATALOGUE_MAX_AGE = int(os.getenv('CATALOGUE_MAX_AGE', '30'))
+
+# Image uploads
+IMAGE_UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+IMAGE_THUMBNAIL_WIDTHS = [160, 320, 640, 1080]
+
+# Bulk catalogue uploads (products.importer)
+PRODUCT_IMPORT_MAX_BYTES = 50 * 1024 * 1024
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
@@ -139,8 +232,34 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'core.throttling.AnonBucketThrottle',
+        'core.throttling.UserBucketThrottle',
+        'core.throttling.ScopedBucketThrottle',
+    ),
+    # Token buckets (core.throttling): each holds one period's worth of requests
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': os.getenv('THROTTLE_ANON_RATE', '120/min'),
+        'user': os.getenv('THROTTLE_USER_RATE', '600/min'),
+        'catalogue': os.getenv('THROTTLE_CATALOGUE_RATE', '240/min'),
+        'search': os.getenv('THROTTLE_SEARCH_RATE', '30/min'),
+        'login': os.getenv('THROTTLE_LOGIN_RATE', '10/min'),
+    },
+    # Trusted proxies in front of the app. 0 identifies clients by
+    # REMOTE_ADDR; set it behind a load balancer so they are read from
+    # X-Forwarded-For, which clients could otherwise forge
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
 }
 
+# Rate limiting and load shedding (core.throttling). Past SHED_MAX_IN_FLIGHT
+# concurrent requests or SHED_LATENCY_SECONDS average latency in a worker,
+# low-priority requests get 503; past twice either, normal ones do too.
+THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', 'True').lower() == 'true'
+LOAD_SHEDDING_ENABLED = os.getenv('LOAD_SHEDDING_ENABLED', 'True').lower() == 'true'
+SHED_MAX_IN_FLIGHT = int(os.getenv('SHED_MAX_IN_FLIGHT', '16'))
+SHED_LATENCY_SECONDS = float(os.getenv('SHED_LATENCY_SECONDS', '2'))
+SHED_RETRY_AFTER_SECONDS = float(os.getenv('SHED_RETRY_AFTER_SECONDS', '5'))
+
 # JWT Configuration
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -149,3 +268,67 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+
+# Idempotency keys for retried checkouts (Idempotency-Key header on order create)
+IDEMPOTENCY_KEY_TTL = timedelta(hours=int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', '24')))
+IDEMPOTENCY_LOCK_TIMEOUT = timedelta(seconds=int(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT', '60')))
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv('IDEMPOTENCY_WAIT_TIMEOUT', '10'))
+
+# Payment providers, keyed by name. METHODS lists the checkout payment methods
+# each provider collects; methods without a provider (cash) are not sent out.
+PAYMENT_PROVIDERS = {
+    'simulator': {
+        'CLASS': 'orders.payments.providers.MobileMoneySimulator',
+        'METHODS': ['mobile_money'],
+        'OPTIONS': {
+            'failure_rate': float(os.getenv('PAYMENT_SIMULATOR_FAILURE_RATE', '0')),
+            'latency': float(os.getenv('PAYMENT_SIMULATOR_LATENCY', '0')),
+        },
+    },
+}
+PAYMENT_WEBHOOK_SECRET = os.getenv('PAYMENT_WEBHOOK_SECRET', SECRET_KEY)
+
+# Background job queues served by `manage.py run_workers`, with the maximum
+# number of jobs from each queue that a worker runs at once.
+JOB_QUEUES = {
+    'default': {'CONCURRENCY': int(os.getenv('JOB_DEFAULT_CONCURRENCY', '4'))},
+    # CPU-bound image resizing; run with --mode process
+    'media': {'CONCURRENCY': int(os.getenv('JOB_MEDIA_CONCURRENCY', '2'))},
+}
+
+# Request instrumentation (core.instrumentation)
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+# Behind a proxy, scrapers authenticate with this bearer token instead
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+SLOW_REQUEST_SECONDS = float(os.getenv('SLOW_REQUEST_SECONDS', '1.0'))
+SLOW_REQUEST_SAMPLE_RATE = float(os.getenv('SLOW_REQUEST_SAMPLE_RATE', '0.1'))
+# Views exceeding their query_budget raise under the test runner and log otherwise
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', str(sys.argv[1:2] == ['test'])).lower() == 'true'
+
+# How long deletion tombstones are kept for delta sync; clients with an older
+# watermark are told to run a full sync again.
+SYNC_TOMBSTONE_RETENTION = timedelta(days=int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', '90')))
+
+# Closed orders untouched for this many months move to the archive
+# (manage.py archive_orders)
+ORDER_ARCHIVE_AFTER_MONTHS = int(os.getenv('ORDER_ARCHIVE_AFTER_MONTHS', '6'))
+
+# Delivery distance and ETA (deliveries.routing). ROUTING_MODE is 'haversine',
+# or 'graph' to route over ROUTING_GRAPH_PATH (manage.py build_road_graph).
+ROUTING_MODE = os.getenv('ROUTING_MODE', 'haversine')
+ROUTING_GRAPH_PATH = os.getenv('ROUTING_GRAPH_PATH', str(BASE_DIR / 'road_graph.npz'))
+ROUTING_DETOUR_FACTOR = float(os.getenv('ROUTING_DETOUR_FACTOR', '1.3'))
+ROUTING_SPEED_KMH = float(os.getenv('ROUTING_SPEED_KMH', '22'))
+ROUTING_CACHE_SIZE = int(os.getenv('ROUTING_CACHE_SIZE', '100000'))
+
+# Delivery fee while no PricingRule is active (deliveries.pricing): base plus
+# a per-km rate over the routed distance, in TZS. Orders without both shop
+# and drop-off coordinates pay the flat fee.
+DELIVERY_BASE_FEE = os.getenv('DELIVERY_BASE_FEE', '300')
+DELIVERY_FEE_PER_KM = os.getenv('DELIVERY_FEE_PER_KM', '150')
+DELIVERY_FLAT_FEE = os.getenv('DELIVERY_FLAT_FEE', '500')
+# How often each worker rereads the active pricing rule and recounts riders
+PRICING_RELOAD_SECONDS = float(os.getenv('PRICING_RELOAD_SECONDS', '5'))
+RIDER_SUPPLY_SECONDS = float(os.getenv('RIDER_SUPPLY_SECONDS', '30'))
+# Seconds a checkout quote token stays valid
+DELIVERY_QUOTE_TTL = int(os.getenv('DELIVERY_QUOTE_TTL', '900'))
@@ -2,17 +2,23 @@
 URL configuration for sokoni project.
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from core.views import metrics_view
+from images.views import serve_image
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/auth/', include('accounts.urls')),
     path('api/', include('products.urls')),
     path('api/', include('orders.urls')),
     path('api/', include('shops.urls')),
     path('api/', include('deliveries.urls')),
+    path('api/', include('images.urls')),
+    # Content-addressed images, served with immutable cache headers
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>(originals|thumbs)/.+)$', serve_image),
 ]
 
 if settings.DEBUG: